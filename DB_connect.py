@@ -2,15 +2,20 @@ from random import choice
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, Column, BigInteger, Text, DateTime, String, Boolean, and_, Integer, text
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 import os
 from datetime import datetime
-import json
+import json_codec
+from store import iter_snapshot
+from schema import clean_text, encode_pg_params, encode_copy_row, DB_COLUMNS, DB_FIELD_MAP, DB_KINDS
 import time
 import io
 import uuid
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
+from logger import setup_logging
 import threading
+import logging
 import csv
 import tempfile
 
@@ -18,6 +23,8 @@ load_dotenv()
 
 BATCH_SIZE = 1000
 
+logger = logging.getLogger("DB_connect")
+
 # Load environment variables
 USER = os.getenv('PG_USER')
 PASSWORD = os.getenv('PG_PASSWORD')
@@ -54,6 +61,37 @@ class Munpia(Base):
         return f"<munpia(id={self.id}, title='{self.title}', author='{self.author}')>"
 
 
+# 표지 미러 매니페스트 (thumbnail.py)
+class MunpiaThumbnail(Base):
+    __tablename__ = 'munpia_thumbnail'
+
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    url = Column(Text)
+    path = Column(Text)
+    sha256 = Column(String(64))
+    size = Column(BigInteger)
+    content_type = Column(Text)
+    fetched_at = Column(DateTime(timezone=True))
+
+    def __repr__(self):
+        return f"<munpia_thumbnail(id={self.id}, path='{self.path}')>"
+
+
+class MunpiaDetail(Base):
+    __tablename__ = 'munpia_detail'
+
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    title = Column(Text)
+    description = Column(Text)
+    image = Column(Text)
+    keywords = Column(Text)  # JSON 배열 문자열 (sqlite detail 테이블과 같음)
+    author = Column(Text)
+    fetched_at = Column(DateTime(timezone=True))
+
+    def __repr__(self):
+        return f"<munpia_detail(id={self.id}, title='{self.title}')>"
+
+
 db_url = f'postgresql://{USER}:{PASSWORD}@{HOST}:{PORT}/{DBNAME}'
 engine = create_engine(db_url, pool_pre_ping=True)
 Session = sessionmaker(bind=engine)
@@ -61,22 +99,23 @@ Session = sessionmaker(bind=engine)
 def main_queries():
     with Session() as session:
         try:
-            print("--- 상위 5개 소설 조회 ---")
+            logger.info("--- 상위 5개 소설 조회 ---")
             novels = session.query(Munpia).limit(5).all();
-            [print(n) for n in novels]
-            print("\n--- ID=1 소설 조회 ---")
+            [logger.info(n) for n in novels]
+            logger.info("\n--- ID=1 소설 조회 ---")
             novel = session.query(Munpia).filter(Munpia.id == 1).first()
-            if novel: print(f"Found: {novel.title} by {novel.author}")
-            print("\n--- 마지막 5개 소설 조회 ---")
+            if novel: logger.info("Found: %s by %s", novel.title, novel.author)
+            logger.info("\n--- 마지막 5개 소설 조회 ---")
             last_novels = session.query(Munpia).order_by(Munpia.id.desc()).limit(5).all();
-            [print(n) for n in last_novels]
+            [logger.info(n) for n in last_novels]
         except Exception as e:
-            print(f"쿼리 중 에러 발생: {e}")
+            logger.error("쿼리 중 에러 발생: %s", e)
 
 def load_munpia_data(json_path='munpia_novel_info.json'):
-    # json_path: Munpia 소설 리스트가 저장된 JSON 파일 경로
-    with open(json_path, encoding='utf-8') as f:
-        return json.load(f)
+    # json_path: Munpia 소설 리스트가 저장된 스냅샷 경로 (JSON Lines면 한 줄씩 스트리밍)
+    # 스냅샷에는 날짜가 문자열로 저장되므로 datetime으로 다시 파싱해서 timestamptz 열에 넣음
+    # (전체 크롤링은 main.py가 메모리의 레코드를 store_db_munpia_pg_copy(novel_list=...)로 바로 넘겨 이 단계를 건너뜀)
+    return iter_snapshot(json_path, typed=True)
 
 
 def chunked(iterable, size):
@@ -90,17 +129,6 @@ def default_serializer(obj):
     return str(obj)
 
 
-def clean_text(val):
-    if val is None:
-        return ''
-    import re
-    cleaned = re.sub(r'<br\s*/?>', ' ', str(val), flags=re.IGNORECASE)
-    cleaned = re.sub(r'<[^>]+>', '', cleaned)
-    cleaned = cleaned.replace('\t', ' ').replace('\n', ' ').replace('\r', ' ')
-    cleaned = re.sub(r'\s+', ' ', cleaned)
-    return cleaned.strip()
-
-
 def store_db_munpia_pg_bulk_update(json_path='munpia_novel_info.json'):
     """임시 테이블을 사용한 bulk update 방식"""
     novel_list = load_munpia_data(json_path)
@@ -111,115 +139,21 @@ def store_db_munpia_pg_bulk_update(json_path='munpia_novel_info.json'):
         # 1. 이미 DB에 존재하는 id 조회
         db_novels_dict = {n.id: n for n in session.query(Munpia)}
         db_ids = set(db_novels_dict.keys())
-        print(f"DB에 {len(db_ids)}개 데이터 존재")
-
-        insert_data, update_data, update_log = [], [], []
-
-        # 2. 필드 매핑 (json key → db key)
-        field_map = {
-            "platform": "platform",
-            "title": "title",
-            "info": "info",
-            "author": "author",
-            "href": "location",
-            "thumbnail": "thumbnail",
-            "tag": "tags",
-            "the_number_of_serials": "chapter",
-            "view": "views",
-            "newstatus": "newstatus",
-            "finishstatus": "finishstatus",
-            "agegrade": "agegrade",
-            "registdate": "registdate",
-            "updatedate": "updatedate"
-        }
-
-        for novel in novel_list:
-            n_id = novel.get("id")
-            if n_id is None: continue
-
-            is_new = n_id not in db_ids
-            db_novel = None if is_new else db_novels_dict[n_id]
-            payload = {'id': n_id}
-            changes = {}
-
-            for json_key, orm_key in field_map.items():
-                new_val = novel.get(json_key)
-                old_val = None if is_new else getattr(db_novel, orm_key)
-
-                # Boolean/Integer/Datetime 변환
-                if orm_key in ["chapter", "views"]:
-                    new_val = int(new_val or 0)
-                if orm_key in ["newstatus", "finishstatus", "agegrade"]:
-                    new_val = bool(new_val) if new_val is not None else False
-                if orm_key in ["registdate", "updatedate"]:
-                    if new_val and not isinstance(new_val, datetime):
-                        try:
-                            new_val = datetime.fromisoformat(new_val)
-                        except Exception:
-                            new_val = dt
-                    
-                    # 날짜 비교 시 시간대 제거하여 정확한 비교
-                    if not is_new and old_val is not None and new_val is not None:
-                        # 기존 값에서 날짜 부분만 추출 (시간대 제거)
-                        old_date = old_val.replace(tzinfo=None).date()
-                        new_date = new_val.replace(tzinfo=None).date()
-                        if old_date == new_date:
-                            continue  # 날짜가 같으면 변경사항으로 간주하지 않음
-
-                if is_new or old_val != new_val:
-                    payload[orm_key] = new_val
-                    if not is_new:
-                        # info 등 텍스트 필드는 clean_text로 정제해서 비교 및 로그 기록
-                        if orm_key == "info":
-                            before_clean = clean_text(old_val)
-                            after_clean = clean_text(new_val)
-                            if before_clean != after_clean:
-                                changes[orm_key] = {
-                                    "before": before_clean,
-                                    "after": after_clean
-                                }
-                        else:
-                            if str(old_val) != str(new_val):
-                                changes[orm_key] = {"before": str(old_val), "after": str(new_val)}
-
-            # 신규 row라면
-            if is_new:
-                payload.setdefault('crawltime', dt)
-                insert_data.append(payload)
-            elif changes:  # 변경사항이 하나라도 있으면만 update_data에 추가
-                payload['crawltime'] = dt
-                for col in Munpia.__table__.columns:
-                    if col.key not in payload:
-                        payload[col.key] = getattr(db_novel, col.key)
-                if payload.get('author') is None:
-                    payload['author'] = 'Unknown'
-                if payload.get('title') is None:
-                    payload['title'] = 'Unknown Title'
-                if payload.get('platform') is None:
-                    payload['platform'] = 'Munpia'
-                update_data.append(payload)
-                update_log.append({"ID": n_id, "Changes": changes})
-
-        print(f"신규 {len(insert_data)}건, 업데이트 {len(update_data)}건")
-
-        # 중복 제거
-        unique_update_data = {}
-        for row in update_data:
-            unique_update_data[row['id']] = row
-        update_data = list(unique_update_data.values())
-        print(f"중복 제거 후 업데이트 {len(update_data)}건")
+        logger.info("DB에 %s개 데이터 존재", len(db_ids))
+
+        insert_data, update_data, update_log = diff_munpia_rows(novel_list, db_novels_dict, dt)
 
         # 3. Bulk Insert
         try:
             if insert_data:
-                print(f"신규 데이터 삽입 시작... ({len(insert_data)}건)")
+                logger.info("신규 데이터 삽입 시작... (%s건)", len(insert_data))
                 for i, batch in enumerate(chunked(insert_data, BATCH_SIZE)):
                     session.bulk_insert_mappings(Munpia, batch)
-                    print(f"  신규 데이터 배치 {i+1} 완료 ({len(batch)}건)")
+                    logger.debug("  신규 데이터 배치 %s 완료 (%s건)", i + 1, len(batch))
 
             # 4. Bulk Update (임시테이블 + UPDATE JOIN)
             if update_data:
-                print(f"임시 테이블을 사용한 bulk update 시작...")
+                logger.info("임시 테이블을 사용한 bulk update 시작...")
                 
                 # 임시 테이블 생성
                 temp_table_name = f"temp_munpia_update_{int(time.time())}"
@@ -245,60 +179,17 @@ def store_db_munpia_pg_bulk_update(json_path='munpia_novel_info.json'):
                 """
                 
                 session.execute(text(create_temp_table_sql))
-                print(f"임시 테이블 {temp_table_name} 생성 완료")
+                logger.info("임시 테이블 %s 생성 완료", temp_table_name)
                 
                 # 임시 테이블에 데이터 삽입
-                print(f"임시 테이블에 {len(update_data)}건 데이터 삽입 중...")
+                logger.info("임시 테이블에 %s건 데이터 삽입 중...", len(update_data))
                 
                 # 컬럼 순서 정의
-                columns = [
-                    'id', 'platform', 'title', 'info', 'author', 'location', 'thumbnail',
-                    'tags', 'chapter', 'views', 'newstatus', 'finishstatus', 'agegrade',
-                    'registdate', 'updatedate', 'crawltime'
-                ]
+                columns = DB_COLUMNS
                 
                 # 배치 단위로 임시 테이블에 삽입
                 for i, batch in enumerate(chunked(update_data, BATCH_SIZE)):
-                    batch_values = []
-                    for row in batch:
-                        values = []
-                        for col in columns:
-                            val = row.get(col, None)
-                            
-                            # 숫자 컬럼
-                            if col in ["chapter", "views"]:
-                                try:
-                                    values.append(int(val))
-                                except (ValueError, TypeError):
-                                    values.append(0)
-                            # 불린 컬럼
-                            elif col in ["newstatus", "finishstatus", "agegrade"]:
-                                values.append(bool(val))
-                            # 날짜 컬럼
-                            elif col in ["registdate", "updatedate", "crawltime"]:
-                                if isinstance(val, datetime):
-                                    values.append(val)
-                                elif val is None:
-                                    values.append(dt)
-                                else:
-                                    try:
-                                        values.append(datetime.fromisoformat(str(val)))
-                                    except Exception:
-                                        values.append(dt)
-                            # 텍스트 컬럼
-                            else:
-                                if val is None or val == '':
-                                    values.append(None)
-                                else:
-                                    cleaned = str(val)
-                                    # HTML 태그 및 특수문자 제거
-                                    import re
-                                    cleaned = re.sub(r'<br\s*/?>', ' ', cleaned, flags=re.IGNORECASE)
-                                    cleaned = re.sub(r'<[^>]+>', '', cleaned)  # 모든 HTML 태그 제거
-                                    cleaned = cleaned.replace('\t', ' ').replace('\n', ' ').replace('\r', ' ')
-                                    cleaned = re.sub(r'\s+', ' ', cleaned)
-                                    values.append(cleaned.strip())
-                        batch_values.append(tuple(values))
+                    batch_values = [encode_pg_params(row, dt) for row in batch]
                     
                     # 배치 삽입 - executemany 사용
                     insert_sql = f"INSERT INTO {temp_table_name} ({','.join(columns)}) VALUES ({','.join(['%s'] * len(columns))})"
@@ -307,10 +198,10 @@ def store_db_munpia_pg_bulk_update(json_path='munpia_novel_info.json'):
                     with session.connection().connection.cursor() as cursor:
                         cursor.executemany(insert_sql, batch_values)
                     
-                    print(f"  임시 테이블 배치 {i+1} 삽입 완료 ({len(batch)}건)")
+                    logger.debug("  임시 테이블 배치 %s 삽입 완료 (%s건)", i + 1, len(batch))
                 
                 # UPDATE JOIN 실행
-                print("UPDATE JOIN 실행 중...")
+                logger.info("UPDATE JOIN 실행 중...")
                 update_join_sql = f"""
                     UPDATE munpia SET
                         platform = t.platform,
@@ -334,27 +225,21 @@ def store_db_munpia_pg_bulk_update(json_path='munpia_novel_info.json'):
                 
                 result = session.execute(text(update_join_sql))
                 updated_count = result.rowcount
-                print(f"UPDATE JOIN 완료: {updated_count}건 업데이트")
+                logger.info("UPDATE JOIN 완료: %s건 업데이트", updated_count)
 
             session.commit()
-            print("DB 작업 커밋 완료")
+            logger.info("DB 작업 커밋 완료")
         except Exception as e:
-            print(f"[DB 작업 에러] 롤백합니다: {e}")
+            logger.error("[DB 작업 에러] 롤백합니다: %s", e)
             session.rollback()
             raise
 
     end_time = time.time()
-    print(f"총 {end_time - start_time:.2f}초 소요")
+    logger.info("총 %.2f초 소요", end_time - start_time)
 
     # 로그 기록
     if update_log:
-        log_directory = 'DB_Processing_Log'
-        if not os.path.exists(log_directory): os.makedirs(log_directory)
-        timestamp = time.strftime("%Y-%m-%d_%H-%M-%S")
-        log_file_path = os.path.join(log_directory, f'{timestamp}-munpia-bulk-update-log.json')
-        with open(log_file_path, 'w', encoding='utf-8') as f:
-            json.dump(update_log, f, ensure_ascii=False, indent=4, default=default_serializer)
-        print(f"변경로그 저장: {log_file_path}")
+        write_update_log(update_log, 'munpia-bulk-update')
 
 
 def store_db_munpia_pg(json_path='munpia_novel_info.json'):
@@ -366,130 +251,29 @@ def store_db_munpia_pg(json_path='munpia_novel_info.json'):
         # 1. 이미 DB에 존재하는 id 조회
         db_novels_dict = {n.id: n for n in session.query(Munpia)}
         db_ids = set(db_novels_dict.keys())
-        print(f"DB에 {len(db_ids)}개 데이터 존재")
-
-        insert_data, update_data, update_log = [], [], []
-
-        # 2. 필드 매핑 (json key → db key)
-        field_map = {
-            "platform": "platform",
-            "title": "title",
-            "info": "info",
-            "author": "author",
-            "href": "location",
-            "thumbnail": "thumbnail",
-            "tag": "tags",
-            "the_number_of_serials": "chapter",
-            "view": "views",
-            "newstatus": "newstatus",
-            "finishstatus": "finishstatus",
-            "agegrade": "agegrade",
-            "registdate": "registdate",
-            "updatedate": "updatedate"
-        }
-
-        for novel in novel_list:
-            n_id = novel.get("id")
-            if n_id is None: continue
-
-            is_new = n_id not in db_ids
-            db_novel = None if is_new else db_novels_dict[n_id]
-            payload = {'id': n_id}
-            changes = {}
-
-            for json_key, orm_key in field_map.items():
-                new_val = novel.get(json_key)
-                old_val = None if is_new else getattr(db_novel, orm_key)
-
-                # Boolean/Integer/Datetime 변환
-                if orm_key in ["chapter", "views"]:
-                    new_val = int(new_val or 0)
-                if orm_key in ["newstatus", "finishstatus", "agegrade"]:
-                    new_val = bool(new_val) if new_val is not None else False
-                if orm_key in ["registdate", "updatedate"]:
-                    if new_val and not isinstance(new_val, datetime):
-                        try:
-                            new_val = datetime.fromisoformat(new_val)
-                        except Exception:
-                            new_val = dt
-                    
-                    # 날짜 비교 시 시간대 제거하여 정확한 비교
-                    if not is_new and old_val is not None and new_val is not None:
-                        # 기존 값에서 날짜 부분만 추출 (시간대 제거)
-                        old_date = old_val.replace(tzinfo=None).date()
-                        new_date = new_val.replace(tzinfo=None).date()
-                        if old_date == new_date:
-                            continue  # 날짜가 같으면 변경사항으로 간주하지 않음
-
-                if is_new or old_val != new_val:
-                    payload[orm_key] = new_val
-                    if not is_new:
-                        # info 등 텍스트 필드는 clean_text로 정제해서 비교 및 로그 기록
-                        if orm_key == "info":
-                            before_clean = clean_text(old_val)
-                            after_clean = clean_text(new_val)
-                            if before_clean != after_clean:
-                                changes[orm_key] = {
-                                    "before": before_clean,
-                                    "after": after_clean
-                                }
-                        else:
-                            if str(old_val) != str(new_val):
-                                changes[orm_key] = {"before": str(old_val), "after": str(new_val)}
-
-            # 신규 row라면
-            if is_new:
-                payload.setdefault('crawltime', dt)
-                insert_data.append(payload)
-            elif changes:  # 변경사항이 하나라도 있으면만 update_data에 추가
-                payload['crawltime'] = dt
-                for col in Munpia.__table__.columns:
-                    if col.key not in payload:
-                        payload[col.key] = getattr(db_novel, col.key)
-                if payload.get('author') is None:
-                    payload['author'] = 'Unknown'
-                if payload.get('title') is None:
-                    payload['title'] = 'Unknown Title'
-                if payload.get('platform') is None:
-                    payload['platform'] = 'Munpia'
-                update_data.append(payload)
-                update_log.append({"ID": n_id, "Changes": changes})
-
-        print(f"신규 {len(insert_data)}건, 업데이트 {len(update_data)}건")
-
-        # 중복 제거
-        unique_update_data = {}
-        for row in update_data:
-            unique_update_data[row['id']] = row
-        update_data = list(unique_update_data.values())
-        print(f"중복 제거 후 업데이트 {len(update_data)}건")
+        logger.info("DB에 %s개 데이터 존재", len(db_ids))
+
+        insert_data, update_data, update_log = diff_munpia_rows(novel_list, db_novels_dict, dt)
 
         # 디버깅: author 필드가 누락된 데이터 확인
         missing_author_data = [row for row in update_data if row.get('author') is None]
         if missing_author_data:
-            print(f"경고: author 필드가 누락된 데이터 {len(missing_author_data)}건 발견")
+            logger.warning("경고: author 필드가 누락된 데이터 %s건 발견", len(missing_author_data))
             for i, row in enumerate(missing_author_data[:5]):  # 처음 5개만 출력
-                print(f"  {i+1}. ID: {row.get('id')}, title: {row.get('title')}, author: {row.get('author')}")
+                logger.debug("  %s. ID: %s, title: %s, author: %s", i + 1, row.get('id'), row.get('title'), row.get('author'))
 
         # 3. Bulk Insert
         try:
             if insert_data:
-                print(f"신규 데이터 삽입 시작... ({len(insert_data)}건)")
+                logger.info("신규 데이터 삽입 시작... (%s건)", len(insert_data))
                 for i, batch in enumerate(chunked(insert_data, BATCH_SIZE)):
                     session.bulk_insert_mappings(Munpia, batch)
-                    print(f"  신규 데이터 배치 {i+1} 완료 ({len(batch)}건)")
+                    logger.debug("  신규 데이터 배치 %s 완료 (%s건)", i + 1, len(batch))
             # 4. Bulk Update (임시테이블 + UPDATE JOIN)
             if update_data:
-                print(f"직접 UPDATE 문으로 데이터 업데이트 중...")
+                logger.info("직접 UPDATE 문으로 데이터 업데이트 중...")
                 
-                # 컬럼 순서 정의
-                columns = [
-                    'id', 'platform', 'title', 'info', 'author', 'location', 'thumbnail',
-                    'tags', 'chapter', 'views', 'newstatus', 'finishstatus', 'agegrade',
-                    'registdate', 'updatedate', 'crawltime'
-                ]
-                
-                print(f"총 {len(update_data)}건의 데이터를 처리합니다...")
+                logger.info("총 %s건의 데이터를 처리합니다...", len(update_data))
                 
                 def update_batch(batch_data, pbar, pbar_lock):
                     """배치 데이터를 업데이트하는 함수"""
@@ -509,51 +293,9 @@ def store_db_munpia_pg(json_path='munpia_novel_info.json'):
                                 WHERE id = %s;
                             """
                             
-                            # 값 준비
-                            values = []
-                            for col in columns:
-                                if col == 'id':
-                                    continue  # WHERE 절에서 사용
-                                val = row.get(col, None)
-                                
-                                # 숫자 컬럼
-                                if col in ["chapter", "views"]:
-                                    try:
-                                        values.append(int(val))
-                                    except (ValueError, TypeError):
-                                        values.append(0)
-                                # 불린 컬럼
-                                elif col in ["newstatus", "finishstatus", "agegrade"]:
-                                    values.append(bool(val))
-                                # 날짜 컬럼
-                                elif col in ["registdate", "updatedate", "crawltime"]:
-                                    if isinstance(val, datetime):
-                                        values.append(val)
-                                    elif val is None:
-                                        values.append(dt)
-                                    else:
-                                        try:
-                                            values.append(datetime.fromisoformat(str(val)))
-                                        except Exception:
-                                            values.append(dt)
-                                # 텍스트 컬럼
-                                else:
-                                    if val is None or val == '':
-                                        values.append(None)
-                                    else:
-                                        cleaned = str(val)
-                                        cleaned = cleaned.replace('\t', ' ').replace('\n', ' ').replace('\r', ' ')
-                                        cleaned = cleaned.replace('\v', ' ').replace('\f', ' ')
-                                        # HTML 태그 및 특수문자 제거
-                                        import re
-                                        cleaned = re.sub(r'<br\s*/?>', ' ', cleaned, flags=re.IGNORECASE)
-                                        cleaned = re.sub(r'<[^>]+>', '', cleaned)  # 모든 HTML 태그 제거
-                                        cleaned = cleaned.replace('\t', ' ').replace('\n', ' ').replace('\r', ' ')
-                                        cleaned = re.sub(r'\s+', ' ', cleaned)
-                                        values.append(cleaned.strip())
-                            
-                            # ID 추가 (WHERE 절용)
-                            values.append(row['id'])
+                            # 값 준비 (id는 WHERE 절용으로 마지막에)
+                            params = encode_pg_params(row, dt)
+                            values = params[1:] + params[:1]
                             
                             # UPDATE 실행
                             with local_session.connection().connection.cursor() as cursor:
@@ -569,7 +311,7 @@ def store_db_munpia_pg(json_path='munpia_novel_info.json'):
                         return updated_count
                     except Exception as e:
                         local_session.rollback()
-                        print(f"배치 업데이트 중 오류: {e}")
+                        logger.error("배치 업데이트 중 오류: %s", e)
                         return 0
                     finally:
                         local_session.close()
@@ -581,7 +323,7 @@ def store_db_munpia_pg(json_path='munpia_novel_info.json'):
                 for i in range(0, len(update_data), batch_size):
                     batches.append(update_data[i:i + batch_size])
                 
-                print(f"총 {len(batches)}개 배치를 병렬로 처리합니다...")
+                logger.info("총 %s개 배치를 병렬로 처리합니다...", len(batches))
                 
                 # 병렬 처리 실행
                 total_updated = 0
@@ -606,29 +348,23 @@ def store_db_munpia_pg(json_path='munpia_novel_info.json'):
                                     '총 업데이트': total_updated
                                 })
                             except Exception as e:
-                                print(f"  배치 {batch_num + 1} 처리 중 오류: {e}")
+                                logger.error("  배치 %s 처리 중 오류: %s", batch_num + 1, e)
                 
-                print(f"총 {total_updated}건 업데이트 완료")
+                logger.info("총 %s건 업데이트 완료", total_updated)
 
             session.commit()
-            print("DB 작업 커밋 완료")
+            logger.info("DB 작업 커밋 완료")
         except Exception as e:
-            print(f"[DB 작업 에러] 롤백합니다: {e}")
+            logger.error("[DB 작업 에러] 롤백합니다: %s", e)
             session.rollback()
             raise
 
     end_time = time.time()
-    print(f"총 {end_time - start_time:.2f}초 소요")
+    logger.info("총 %.2f초 소요", end_time - start_time)
 
     # 로그 기록
     if update_log:
-        log_directory = 'DB_Processing_Log'
-        if not os.path.exists(log_directory): os.makedirs(log_directory)
-        timestamp = time.strftime("%Y-%m-%d_%H-%M-%S")
-        log_file_path = os.path.join(log_directory, f'{timestamp}-munpia-update-log.json')
-        with open(log_file_path, 'w', encoding='utf-8') as f:
-            json.dump(update_log, f, ensure_ascii=False, indent=4, default=default_serializer)
-        print(f"변경로그 저장: {log_file_path}")
+        write_update_log(update_log, 'munpia-update')
 
 
 def store_db_munpia_pg_ctas(json_path='munpia_novel_info.json'):
@@ -641,120 +377,21 @@ def store_db_munpia_pg_ctas(json_path='munpia_novel_info.json'):
         # 1. 이미 DB에 존재하는 id 조회
         db_novels_dict = {n.id: n for n in session.query(Munpia)}
         db_ids = set(db_novels_dict.keys())
-        print(f"DB에 {len(db_ids)}개 데이터 존재")
-
-        insert_data, update_data, update_log = [], [], []
-
-        # 2. 필드 매핑 (json key → db key)
-        field_map = {
-            "platform": "platform",
-            "title": "title",
-            "info": "info",
-            "author": "author",
-            "href": "location",
-            "thumbnail": "thumbnail",
-            "tag": "tags",
-            "the_number_of_serials": "chapter",
-            "view": "views",
-            "newstatus": "newstatus",
-            "finishstatus": "finishstatus",
-            "agegrade": "agegrade",
-            "registdate": "registdate",
-            "updatedate": "updatedate"
-        }
-
-        for novel in novel_list:
-            n_id = novel.get("id")
-            if n_id is None: continue
-
-            is_new = n_id not in db_ids
-            db_novel = None if is_new else db_novels_dict[n_id]
-            payload = {'id': n_id}
-            changes = {}
-
-            for json_key, orm_key in field_map.items():
-                new_val = novel.get(json_key)
-                old_val = None if is_new else getattr(db_novel, orm_key)
-
-                # Boolean/Integer/Datetime 변환
-                if orm_key in ["chapter", "views"]:
-                    new_val = int(new_val or 0)
-                if orm_key in ["newstatus", "finishstatus", "agegrade"]:
-                    new_val = bool(new_val) if new_val is not None else False
-                if orm_key in ["registdate", "updatedate"]:
-                    if new_val and not isinstance(new_val, datetime):
-                        try:
-                            new_val = datetime.fromisoformat(new_val)
-                        except Exception:
-                            new_val = dt
-                    
-                    # 날짜 비교 시 시간대 제거하여 정확한 비교
-                    if not is_new and old_val is not None and new_val is not None:
-                        # 기존 값에서 날짜 부분만 추출 (시간대 제거)
-                        old_date = old_val.replace(tzinfo=None).date()
-                        new_date = new_val.replace(tzinfo=None).date()
-                        if old_date == new_date:
-                            continue  # 날짜가 같으면 변경사항으로 간주하지 않음
-
-                if is_new or old_val != new_val:
-                    payload[orm_key] = new_val
-                    if not is_new:
-                        # info 등 텍스트 필드는 clean_text로 정제해서 비교 및 로그 기록
-                        if orm_key == "info":
-                            before_clean = clean_text(old_val)
-                            after_clean = clean_text(new_val)
-                            if before_clean != after_clean:
-                                changes[orm_key] = {
-                                    "before": before_clean,
-                                    "after": after_clean
-                                }
-                        else:
-                            if str(old_val) != str(new_val):
-                                changes[orm_key] = {"before": str(old_val), "after": str(new_val)}
-
-            # 신규 row라면
-            if is_new:
-                payload.setdefault('crawltime', dt)
-                insert_data.append(payload)
-            elif changes:
-                # UPDATE 대상만
-                payload['crawltime'] = dt
-                # 빠진 컬럼 채우기
-                for col in Munpia.__table__.columns:
-                    if col.key not in payload:
-                        payload[col.key] = getattr(db_novel, col.key)
-                
-                # 필수 필드에 대한 기본값 설정
-                if payload.get('author') is None:
-                    payload['author'] = 'Unknown'
-                if payload.get('title') is None:
-                    payload['title'] = 'Unknown Title'
-                if payload.get('platform') is None:
-                    payload['platform'] = 'Munpia'
-                
-                update_data.append(payload)
-                update_log.append({"ID": n_id, "Changes": changes})
-
-        print(f"신규 {len(insert_data)}건, 업데이트 {len(update_data)}건")
+        logger.info("DB에 %s개 데이터 존재", len(db_ids))
 
-        # 중복 제거
-        unique_update_data = {}
-        for row in update_data:
-            unique_update_data[row['id']] = row
-        update_data = list(unique_update_data.values())
-        print(f"중복 제거 후 업데이트 {len(update_data)}건")
+        insert_data, update_data, update_log = diff_munpia_rows(novel_list, db_novels_dict, dt)
 
         # 3. Bulk Insert
         try:
             if insert_data:
-                print(f"신규 데이터 삽입 시작... ({len(insert_data)}건)")
+                logger.info("신규 데이터 삽입 시작... (%s건)", len(insert_data))
                 for i, batch in enumerate(chunked(insert_data, BATCH_SIZE)):
                     session.bulk_insert_mappings(Munpia, batch)
-                    print(f"  신규 데이터 배치 {i+1} 완료 ({len(batch)}건)")
+                    logger.debug("  신규 데이터 배치 %s 완료 (%s건)", i + 1, len(batch))
 
             # 4. CTAS 방식으로 업데이트
             if update_data:
-                print(f"CTAS 방식으로 업데이트 시작...")
+                logger.info("CTAS 방식으로 업데이트 시작...")
                 
                 # 업데이트할 ID 목록
                 update_ids = [row['id'] for row in update_data]
@@ -764,7 +401,7 @@ def store_db_munpia_pg_ctas(json_path='munpia_novel_info.json'):
                 temp_table_name = f"temp_munpia_ctas_{int(time.time())}"
                 
                 # 1단계: 기존 데이터를 복사하여 임시 테이블 생성
-                print("1단계: 기존 데이터로 임시 테이블 생성 중...")
+                logger.info("1단계: 기존 데이터로 임시 테이블 생성 중...")
                 ctas_sql = f"""
                     CREATE TABLE {temp_table_name} AS 
                     SELECT * FROM munpia 
@@ -773,14 +410,10 @@ def store_db_munpia_pg_ctas(json_path='munpia_novel_info.json'):
                 session.execute(text(ctas_sql))
                 
                 # 컬럼 순서 정의
-                columns = [
-                    'id', 'platform', 'title', 'info', 'author', 'location', 'thumbnail',
-                    'tags', 'chapter', 'views', 'newstatus', 'finishstatus', 'agegrade',
-                    'registdate', 'updatedate', 'crawltime'
-                ]
+                columns = DB_COLUMNS
                 
                 # 2단계: 업데이트할 데이터를 임시 테이블에 삽입
-                print("2단계: 업데이트 데이터를 임시 테이블에 삽입 중...")
+                logger.info("2단계: 업데이트 데이터를 임시 테이블에 삽입 중...")
                 
                 # 배치 단위로 삽입 (VALUES 절 길이 제한 해결)
                 batch_size = 1000  # 한 번에 처리할 데이터 수
@@ -789,47 +422,7 @@ def store_db_munpia_pg_ctas(json_path='munpia_novel_info.json'):
                         continue
                         
                     # SQLAlchemy 파라미터 바인딩 방식으로 변경
-                    batch_values = []
-                    for row in batch:
-                        values = []
-                        for col in columns:
-                            val = row.get(col, None)
-                            
-                            # 숫자 컬럼
-                            if col in ["chapter", "views"]:
-                                try:
-                                    values.append(int(val))
-                                except (ValueError, TypeError):
-                                    values.append(0)
-                            # 불린 컬럼
-                            elif col in ["newstatus", "finishstatus", "agegrade"]:
-                                values.append(bool(val))
-                            # 날짜 컬럼
-                            elif col in ["registdate", "updatedate", "crawltime"]:
-                                if isinstance(val, datetime):
-                                    values.append(val)
-                                elif val is None:
-                                    values.append(dt)
-                                else:
-                                    try:
-                                        values.append(datetime.fromisoformat(str(val)))
-                                    except Exception:
-                                        values.append(dt)
-                            # 텍스트 컬럼
-                            else:
-                                if val is None or val == '':
-                                    values.append(None)
-                                else:
-                                    cleaned = str(val)
-                                    # HTML 태그 및 특수문자 제거
-                                    import re
-                                    cleaned = re.sub(r'<br\s*/?>', ' ', cleaned, flags=re.IGNORECASE)
-                                    cleaned = re.sub(r'<[^>]+>', '', cleaned)  # 모든 HTML 태그 제거
-                                    cleaned = cleaned.replace('\t', ' ').replace('\n', ' ').replace('\r', ' ')
-                                    cleaned = re.sub(r'\s+', ' ', cleaned)
-                                    values.append(cleaned.strip())
-                        
-                        batch_values.append(tuple(values))
+                    batch_values = [encode_pg_params(row, dt) for row in batch]
                     
                     # executemany로 배치 삽입
                     insert_sql = f"INSERT INTO {temp_table_name} ({','.join(columns)}) VALUES ({','.join(['%s'] * len(columns))})"
@@ -837,10 +430,10 @@ def store_db_munpia_pg_ctas(json_path='munpia_novel_info.json'):
                     with session.connection().connection.cursor() as cursor:
                         cursor.executemany(insert_sql, batch_values)
                     
-                    print(f"  배치 {i+1} 삽입 완료 ({len(batch)}건)")
+                    logger.debug("  배치 %s 삽입 완료 (%s건)", i + 1, len(batch))
                 
                 # 3단계: 원본 테이블을 백업하고 임시 테이블을 교체
-                print("3단계: 테이블 교체 중...")
+                logger.info("3단계: 테이블 교체 중...")
                 backup_table_name = f"munpia_backup_{int(time.time())}"
                 
                 # 백업 생성
@@ -852,7 +445,7 @@ def store_db_munpia_pg_ctas(json_path='munpia_novel_info.json'):
                 session.execute(text(rename_sql))
                 
                 # 인덱스 및 제약조건 재생성 (필요한 경우)
-                print("4단계: 인덱스 및 제약조건 재생성 중...")
+                logger.info("4단계: 인덱스 및 제약조건 재생성 중...")
                 
                 # Primary Key 재생성
                 pk_sql = "ALTER TABLE munpia ADD CONSTRAINT munpia_pkey PRIMARY KEY (id);"
@@ -867,259 +460,283 @@ def store_db_munpia_pg_ctas(json_path='munpia_novel_info.json'):
                 """
                 session.execute(text(sequence_sql))
                 
-                print(f"CTAS 업데이트 완료: {len(update_data)}건 업데이트")
-                print(f"백업 테이블: {backup_table_name}")
+                logger.info("CTAS 업데이트 완료: %s건 업데이트", len(update_data))
+                logger.info("백업 테이블: %s", backup_table_name)
 
             session.commit()
-            print("DB 작업 커밋 완료")
+            logger.info("DB 작업 커밋 완료")
         except Exception as e:
-            print(f"[DB 작업 에러] 롤백합니다: {e}")
+            logger.error("[DB 작업 에러] 롤백합니다: %s", e)
             session.rollback()
             raise
 
     end_time = time.time()
-    print(f"총 {end_time - start_time:.2f}초 소요")
+    logger.info("총 %.2f초 소요", end_time - start_time)
 
     # 로그 기록
     if update_log:
-        log_directory = 'DB_Processing_Log'
-        if not os.path.exists(log_directory): os.makedirs(log_directory)
-        timestamp = time.strftime("%Y-%m-%d_%H-%M-%S")
-        log_file_path = os.path.join(log_directory, f'{timestamp}-munpia-ctas-log.json')
-        with open(log_file_path, 'w', encoding='utf-8') as f:
-            json.dump(update_log, f, ensure_ascii=False, indent=4, default=default_serializer)
-        print(f"변경로그 저장: {log_file_path}")
-
-
-def store_db_munpia_pg_copy(json_path='munpia_novel_info.json'):
-    """임시 테이블 + COPY 명령을 활용한 초고속 업데이트"""
-    novel_list = load_munpia_data(json_path)
+        write_update_log(update_log, 'munpia-ctas')
+
+
+def diff_munpia_rows(novel_list, db_novels_dict, dt):
+    """JSON 레코드와 DB 레코드를 비교해 (신규, 업데이트, 변경로그)를 반환"""
+    db_ids = set(db_novels_dict.keys())
+    insert_data, update_data, update_log = [], [], []
+    for novel in novel_list:
+        n_id = novel.get("id")
+        if n_id is None: continue
+        is_new = n_id not in db_ids
+        db_novel = None if is_new else db_novels_dict[n_id]
+        payload = {'id': n_id}
+        changes = {}
+        for json_key, orm_key in DB_FIELD_MAP.items():
+            kind = DB_KINDS[orm_key]
+            new_val = novel.get(json_key)
+            old_val = None if is_new else getattr(db_novel, orm_key)
+            if kind == "int":
+                new_val = int(new_val or 0)
+            if kind == "bool":
+                new_val = bool(new_val) if new_val is not None else False
+            if kind == "date":
+                if new_val and not isinstance(new_val, datetime):
+                    try:
+                        new_val = datetime.fromisoformat(new_val)
+                    except Exception:
+                        new_val = dt
+
+                # 날짜 비교 시 시간대 제거하여 정확한 비교
+                if not is_new and old_val is not None and new_val is not None:
+                    # 기존 값에서 날짜 부분만 추출 (시간대 제거)
+                    old_date = old_val.replace(tzinfo=None).date()
+                    new_date = new_val.replace(tzinfo=None).date()
+                    if old_date == new_date:
+                        continue  # 날짜가 같으면 변경사항으로 간주하지 않음
+            if is_new or old_val != new_val:
+                payload[orm_key] = new_val
+                if not is_new:
+                    # info 등 텍스트 필드는 clean_text로 정제해서 비교 및 로그 기록
+                    if orm_key == "info":
+                        before_clean = clean_text(old_val)
+                        after_clean = clean_text(new_val)
+                        if before_clean != after_clean:
+                            changes[orm_key] = {
+                                "before": before_clean,
+                                "after": after_clean
+                            }
+                    else:
+                        if str(old_val) != str(new_val):
+                            changes[orm_key] = {"before": str(old_val), "after": str(new_val)}
+        if is_new:
+            payload.setdefault('crawltime', dt)
+            insert_data.append(payload)
+        elif changes:
+            payload['crawltime'] = dt
+            for col in Munpia.__table__.columns:
+                if col.key not in payload:
+                    payload[col.key] = getattr(db_novel, col.key)
+            if payload.get('author') is None:
+                payload['author'] = 'Unknown'
+            if payload.get('title') is None:
+                payload['title'] = 'Unknown Title'
+            if payload.get('platform') is None:
+                payload['platform'] = 'Munpia'
+            update_data.append(payload)
+            update_log.append({"ID": n_id, "Changes": changes})
+    logger.info("신규 %s건, 업데이트 %s건", len(insert_data), len(update_data))
+    # 같은 소설이 여러 탭에 있으면 신규 삽입 시 PK가 겹치므로 신규도 함께 중복 제거
+    insert_data = list({row['id']: row for row in insert_data}.values())
+    unique_update_data = {}
+    for row in update_data:
+        unique_update_data[row['id']] = row
+    update_data = list(unique_update_data.values())
+    logger.info("중복 제거 후 신규 %s건, 업데이트 %s건", len(insert_data), len(update_data))
+    return insert_data, update_data, update_log
+
+
+def copy_update_rows(session, update_data, dt, show_progress=True):
+    """임시 테이블에 COPY로 넣은 뒤 UPDATE JOIN으로 munpia 테이블 갱신"""
+    logger.info("임시 테이블 + COPY 명령으로 업데이트 시작...")
+    temp_table_name = f"temp_munpia_copy_{uuid.uuid4().hex}"
+    create_temp_table_sql = f"""
+        CREATE TEMP TABLE {temp_table_name} (
+            id BIGINT PRIMARY KEY,
+            platform TEXT,
+            title TEXT,
+            info TEXT,
+            author TEXT,
+            location TEXT,
+            thumbnail TEXT,
+            tags TEXT,
+            chapter BIGINT,
+            views BIGINT,
+            newstatus BOOLEAN,
+            finishstatus BOOLEAN,
+            agegrade BOOLEAN,
+            registdate TIMESTAMP WITH TIME ZONE,
+            updatedate TIMESTAMP WITH TIME ZONE,
+            crawltime TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        ) ON COMMIT DROP;
+    """
+    session.execute(text(create_temp_table_sql))
+    logger.debug("임시 테이블 %s 생성 완료", temp_table_name)
+    columns = DB_COLUMNS
+    # CSV 임시 파일 생성 및 COPY
+    logger.debug("CSV 파일 생성 및 COPY 명령으로 %s건 삽입 중...", len(update_data))
+    with tempfile.NamedTemporaryFile('w+', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile, quoting=csv.QUOTE_MINIMAL)
+
+        # tqdm으로 진행률 표시
+        with tqdm(total=len(update_data), desc="CSV 생성", unit="건", disable=not show_progress) as pbar:
+            for row in update_data:
+                writer.writerow(encode_copy_row(row, dt))
+                pbar.update(1)
+
+        csvfile.flush()
+        csvfile.seek(0)
+
+        logger.debug("COPY 명령 실행 중...")
+        conn = session.connection().connection
+        with conn.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {temp_table_name} ({','.join(columns)}) FROM STDIN WITH (FORMAT CSV, HEADER FALSE, ENCODING 'UTF8')",
+                csvfile
+            )
+    logger.info("COPY로 %s건 임시 테이블에 삽입 완료", len(update_data))
+    # UPDATE JOIN
+    logger.debug("UPDATE JOIN 실행 중...")
+    update_join_sql = f"""
+        UPDATE munpia SET
+            platform = t.platform,
+            title = t.title,
+            info = t.info,
+            author = t.author,
+            location = t.location,
+            thumbnail = t.thumbnail,
+            tags = t.tags,
+            chapter = t.chapter,
+            views = t.views,
+            newstatus = t.newstatus,
+            finishstatus = t.finishstatus,
+            agegrade = t.agegrade,
+            registdate = t.registdate,
+            updatedate = t.updatedate,
+            crawltime = t.crawltime
+        FROM {temp_table_name} t
+        WHERE munpia.id = t.id;
+    """
+    result = session.execute(text(update_join_sql))
+    updated_count = result.rowcount
+    logger.info("UPDATE JOIN 완료: %s건 업데이트", updated_count)
+    return updated_count
+
+
+def write_update_log(update_log, name):
+    log_directory = 'DB_Processing_Log'
+    if not os.path.exists(log_directory): os.makedirs(log_directory)
+    timestamp = time.strftime("%Y-%m-%d_%H-%M-%S")
+    log_file_path = os.path.join(log_directory, f'{timestamp}-{name}-log.json')
+    json_codec.dump_file(update_log, log_file_path, indent=True, default=default_serializer)
+    logger.info("변경로그 저장: %s", log_file_path)
+
+
+def store_db_munpia_pg_copy(json_path='munpia_novel_info.json', novel_list=None):
+    """임시 테이블 + COPY 명령을 활용한 초고속 업데이트
+
+    novel_list(날짜가 datetime인 레코드 dict)가 있으면 스냅샷을 다시 읽어 날짜 문자열을 파싱하지 않는다.
+    """
+    if novel_list is None:
+        novel_list = load_munpia_data(json_path)
     start_time = time.time()
     dt = datetime.now()
 
     with Session() as session:
         db_novels_dict = {n.id: n for n in session.query(Munpia)}
-        db_ids = set(db_novels_dict.keys())
-        print(f"DB에 {len(db_ids)}개 데이터 존재")
-
-        insert_data, update_data, update_log = [], [], []
-        field_map = {
-            "platform": "platform",
-            "title": "title",
-            "info": "info",
-            "author": "author",
-            "href": "location",
-            "thumbnail": "thumbnail",
-            "tag": "tags",
-            "the_number_of_serials": "chapter",
-            "view": "views",
-            "newstatus": "newstatus",
-            "finishstatus": "finishstatus",
-            "agegrade": "agegrade",
-            "registdate": "registdate",
-            "updatedate": "updatedate"
-        }
-        for novel in novel_list:
-            n_id = novel.get("id")
-            if n_id is None: continue
-            is_new = n_id not in db_ids
-            db_novel = None if is_new else db_novels_dict[n_id]
-            payload = {'id': n_id}
-            changes = {}
-            for json_key, orm_key in field_map.items():
-                new_val = novel.get(json_key)
-                old_val = None if is_new else getattr(db_novel, orm_key)
-                if orm_key in ["chapter", "views"]:
-                    new_val = int(new_val or 0)
-                if orm_key in ["newstatus", "finishstatus", "agegrade"]:
-                    new_val = bool(new_val) if new_val is not None else False
-                if orm_key in ["registdate", "updatedate"]:
-                    if new_val and not isinstance(new_val, datetime):
-                        try:
-                            new_val = datetime.fromisoformat(new_val)
-                        except Exception:
-                            new_val = dt
-                    
-                    # 날짜 비교 시 시간대 제거하여 정확한 비교
-                    if not is_new and old_val is not None and new_val is not None:
-                        # 기존 값에서 날짜 부분만 추출 (시간대 제거)
-                        old_date = old_val.replace(tzinfo=None).date()
-                        new_date = new_val.replace(tzinfo=None).date()
-                        if old_date == new_date:
-                            continue  # 날짜가 같으면 변경사항으로 간주하지 않음
-                if is_new or old_val != new_val:
-                    payload[orm_key] = new_val
-                    if not is_new:
-                        # info 등 텍스트 필드는 clean_text로 정제해서 비교 및 로그 기록
-                        if orm_key == "info":
-                            before_clean = clean_text(old_val)
-                            after_clean = clean_text(new_val)
-                            if before_clean != after_clean:
-                                changes[orm_key] = {
-                                    "before": before_clean,
-                                    "after": after_clean
-                                }
-                        else:
-                            if str(old_val) != str(new_val):
-                                changes[orm_key] = {"before": str(old_val), "after": str(new_val)}
-            if is_new:
-                payload.setdefault('crawltime', dt)
-                insert_data.append(payload)
-            elif changes:
-                payload['crawltime'] = dt
-                for col in Munpia.__table__.columns:
-                    if col.key not in payload:
-                        payload[col.key] = getattr(db_novel, col.key)
-                if payload.get('author') is None:
-                    payload['author'] = 'Unknown'
-                if payload.get('title') is None:
-                    payload['title'] = 'Unknown Title'
-                if payload.get('platform') is None:
-                    payload['platform'] = 'Munpia'
-                update_data.append(payload)
-                update_log.append({"ID": n_id, "Changes": changes})
-        print(f"신규 {len(insert_data)}건, 업데이트 {len(update_data)}건")
-        unique_update_data = {}
-        for row in update_data:
-            unique_update_data[row['id']] = row
-        update_data = list(unique_update_data.values())
-        print(f"중복 제거 후 업데이트 {len(update_data)}건")
+        logger.info("DB에 %s개 데이터 존재", len(db_novels_dict))
+
+        insert_data, update_data, update_log = diff_munpia_rows(novel_list, db_novels_dict, dt)
         try:
             if insert_data:
-                print(f"신규 데이터 삽입 시작... ({len(insert_data)}건)")
+                logger.info("신규 데이터 삽입 시작... (%s건)", len(insert_data))
                 for i, batch in enumerate(chunked(insert_data, BATCH_SIZE)):
                     session.bulk_insert_mappings(Munpia, batch)
-                    print(f"  신규 데이터 배치 {i+1} 완료 ({len(batch)}건)")
+                    logger.debug("  신규 데이터 배치 %s 완료 (%s건)", i + 1, len(batch))
             if update_data:
-                print(f"임시 테이블 + COPY 명령으로 업데이트 시작...")
-                temp_table_name = f"temp_munpia_copy_{int(time.time())}"
-                create_temp_table_sql = f"""
-                    CREATE TEMP TABLE {temp_table_name} (
-                        id BIGINT PRIMARY KEY,
-                        platform TEXT,
-                        title TEXT,
-                        info TEXT,
-                        author TEXT,
-                        location TEXT,
-                        thumbnail TEXT,
-                        tags TEXT,
-                        chapter BIGINT,
-                        views BIGINT,
-                        newstatus BOOLEAN,
-                        finishstatus BOOLEAN,
-                        agegrade BOOLEAN,
-                        registdate TIMESTAMP WITH TIME ZONE,
-                        updatedate TIMESTAMP WITH TIME ZONE,
-                        crawltime TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-                    );
-                """
-                session.execute(text(create_temp_table_sql))
-                print(f"임시 테이블 {temp_table_name} 생성 완료")
-                columns = [
-                    'id', 'platform', 'title', 'info', 'author', 'location', 'thumbnail',
-                    'tags', 'chapter', 'views', 'newstatus', 'finishstatus', 'agegrade',
-                    'registdate', 'updatedate', 'crawltime'
-                ]
-                # CSV 임시 파일 생성 및 COPY
-                print(f"CSV 파일 생성 및 COPY 명령으로 {len(update_data)}건 삽입 중...")
-                with tempfile.NamedTemporaryFile('w+', newline='', encoding='utf-8') as csvfile:
-                    writer = csv.writer(csvfile, quoting=csv.QUOTE_MINIMAL)
-                    
-                    # tqdm으로 진행률 표시
-                    with tqdm(total=len(update_data), desc="CSV 생성", unit="건") as pbar:
-                        for row in update_data:
-                            values = []
-                            for col in columns:
-                                val = row.get(col, None)
-                                if col in ["chapter", "views"]:
-                                    try:
-                                        values.append(int(val))
-                                    except (ValueError, TypeError):
-                                        values.append(0)
-                                elif col in ["newstatus", "finishstatus", "agegrade"]:
-                                    values.append('t' if val else 'f')
-                                elif col in ["registdate", "updatedate", "crawltime"]:
-                                    if isinstance(val, datetime):
-                                        values.append(val.isoformat())
-                                    elif val is None:
-                                        values.append(dt.isoformat())
-                                    else:
-                                        try:
-                                            values.append(datetime.fromisoformat(str(val)).isoformat())
-                                        except Exception:
-                                            values.append(dt.isoformat())
-                                else:
-                                    if val is None or val == '':
-                                        values.append('')
-                                    else:
-                                        cleaned = str(val)
-                                        # HTML 태그 및 특수문자 제거
-                                        import re
-                                        cleaned = re.sub(r'<br\s*/?>', ' ', cleaned, flags=re.IGNORECASE)
-                                        cleaned = re.sub(r'<[^>]+>', '', cleaned)  # 모든 HTML 태그 제거
-                                        cleaned = cleaned.replace('\t', ' ').replace('\n', ' ').replace('\r', ' ')
-                                        cleaned = re.sub(r'\s+', ' ', cleaned)
-                                        values.append(cleaned.strip())
-                            writer.writerow(values)
-                            pbar.update(1)
-                    
-                    csvfile.flush()
-                    csvfile.seek(0)
-                    
-                    print("COPY 명령 실행 중...")
-                    conn = session.connection().connection
-                    with conn.cursor() as cursor:
-                        cursor.copy_expert(
-                            f"COPY {temp_table_name} ({','.join(columns)}) FROM STDIN WITH (FORMAT CSV, HEADER FALSE, ENCODING 'UTF8')",
-                            csvfile
-                        )
-                print(f"COPY로 {len(update_data)}건 임시 테이블에 삽입 완료")
-                # UPDATE JOIN
-                print("UPDATE JOIN 실행 중...")
-                update_join_sql = f"""
-                    UPDATE munpia SET
-                        platform = t.platform,
-                        title = t.title,
-                        info = t.info,
-                        author = t.author,
-                        location = t.location,
-                        thumbnail = t.thumbnail,
-                        tags = t.tags,
-                        chapter = t.chapter,
-                        views = t.views,
-                        newstatus = t.newstatus,
-                        finishstatus = t.finishstatus,
-                        agegrade = t.agegrade,
-                        registdate = t.registdate,
-                        updatedate = t.updatedate,
-                        crawltime = t.crawltime
-                    FROM {temp_table_name} t
-                    WHERE munpia.id = t.id;
-                """
-                result = session.execute(text(update_join_sql))
-                updated_count = result.rowcount
-                print(f"UPDATE JOIN 완료: {updated_count}건 업데이트")
+                copy_update_rows(session, update_data, dt)
             session.commit()
-            print("DB 작업 커밋 완료")
+            logger.info("DB 작업 커밋 완료")
         except Exception as e:
-            print(f"[DB 작업 에러] 롤백합니다: {e}")
+            logger.error("[DB 작업 에러] 롤백합니다: %s", e)
             session.rollback()
             raise
     end_time = time.time()
-    print(f"총 {end_time - start_time:.2f}초 소요")
+    logger.info("총 %.2f초 소요", end_time - start_time)
     if update_log:
-        log_directory = 'DB_Processing_Log'
-        if not os.path.exists(log_directory): os.makedirs(log_directory)
-        timestamp = time.strftime("%Y-%m-%d_%H-%M-%S")
-        log_file_path = os.path.join(log_directory, f'{timestamp}-munpia-copy-log.json')
-        with open(log_file_path, 'w', encoding='utf-8') as f:
-            json.dump(update_log, f, ensure_ascii=False, indent=4, default=default_serializer)
-        print(f"변경로그 저장: {log_file_path}")
+        write_update_log(update_log, 'munpia-copy')
+
+
+def store_db_munpia_pg_copy_rows(novel_list, dt):
+    """스트리밍용: 배치 하나를 COPY 방식으로 반영하고 변경로그를 반환 (배치에 든 id만 DB에서 조회)"""
+    ids = list({novel["id"] for novel in novel_list if novel.get("id") is not None})
+    with Session() as session:
+        db_novels_dict = {n.id: n for n in session.query(Munpia).filter(Munpia.id.in_(ids))}
+        insert_data, update_data, update_log = diff_munpia_rows(novel_list, db_novels_dict, dt)
+        try:
+            for batch in chunked(insert_data, BATCH_SIZE):
+                session.bulk_insert_mappings(Munpia, batch)
+            if update_data:
+                copy_update_rows(session, update_data, dt, show_progress=False)
+            session.commit()
+        except Exception as e:
+            logger.error("[DB 작업 에러] 롤백합니다: %s", e)
+            session.rollback()
+            raise
+    return update_log
+
+
+def store_thumbnail_manifest_pg(rows):
+    """thumbnail.py 매니페스트 행 (id, url, path, sha256, size, content_type, fetched_at)을 PG에 upsert"""
+    MunpiaThumbnail.__table__.create(engine, checkfirst=True)
+    columns = ["id", "url", "path", "sha256", "size", "content_type", "fetched_at"]
+    with Session() as session:
+        try:
+            for batch in chunked(rows, BATCH_SIZE):
+                stmt = pg_insert(MunpiaThumbnail).values([dict(zip(columns, row)) for row in batch])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[MunpiaThumbnail.id],
+                    set_={column: stmt.excluded[column] for column in columns[1:]})
+                session.execute(stmt)
+            session.commit()
+        except Exception as e:
+            logger.error("[DB 작업 에러] 롤백합니다: %s", e)
+            session.rollback()
+            raise
+    logger.info("표지 매니페스트 %s건 PG 반영", len(rows))
+
+
+def store_detail_pg(rows):
+    """enrich.py 상세 정보 행 (id, title, description, image, keywords, author, fetched_at)을 PG에 upsert"""
+    MunpiaDetail.__table__.create(engine, checkfirst=True)
+    columns = ["id", "title", "description", "image", "keywords", "author", "fetched_at"]
+    with Session() as session:
+        try:
+            for batch in chunked(rows, BATCH_SIZE):
+                stmt = pg_insert(MunpiaDetail).values([dict(zip(columns, row)) for row in batch])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[MunpiaDetail.id],
+                    set_={column: stmt.excluded[column] for column in columns[1:]})
+                session.execute(stmt)
+            session.commit()
+        except Exception as e:
+            logger.error("[DB 작업 에러] 롤백합니다: %s", e)
+            session.rollback()
+            raise
+    logger.info("상세 정보 %s건 PG 반영", len(rows))
 
 
 # 실행 예시
 
 if __name__ == "__main__":
+    setup_logging()
     print("데이터베이스 연결 및 기본 쿼리 테스트:")
     main_queries()
     print("-" * 40)
@@ -1,16 +1,28 @@
 import sqlite3
-import json
+import json_codec
+from logger import setup_logging
 import time
 import os
 from datetime import datetime
-from pprint import pprint
+import logging
+from store import iter_snapshot, SNAPSHOT_PATH
+from schema import DB_COLUMNS, SQLITE_UPDATE_COLUMNS, encode_sqlite_insert, encode_sqlite_update, sqlite_changes
 
+logger = logging.getLogger("DB_processing")
 
-def load_munpia_data():
-    with open('Munpia_novel_info.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        pprint(f"총 {len(data)}개 데이터 로드 완료")
-        return data
+# novel 테이블 열 순서와 파라미터 순서는 schema.RECORD_FIELDS에서 만듦
+INSERT_SQL = f"INSERT INTO novel ({', '.join(DB_COLUMNS)}) VALUES ({', '.join('?' * len(DB_COLUMNS))})"
+UPDATE_SQL = f"UPDATE novel SET {', '.join(f'{column}=?' for column in SQLITE_UPDATE_COLUMNS)} WHERE id=?"
+
+
+def load_munpia_data(path=SNAPSHOT_PATH):
+    """스냅샷 레코드를 하나씩 돌려줌 (JSON Lines 스냅샷은 파일에서 바로 스트리밍)
+
+    sqlite novel 테이블은 날짜를 스냅샷과 같은 문자열로 저장하므로 datetime으로 바꾸지 않는다.
+    스트리밍 파이프라인이나 store_db(novel_list=...)로 받는 datetime은 sqlite_date가 같은 형식으로 맞춤.
+    """
+    logger.info("%s 데이터 로드", path)
+    return iter_snapshot(path)
 
 def change_log(result):
     timestamp = time.strftime("%Y-%m-%d_%H-%M-%S")
@@ -27,16 +39,10 @@ def change_log(result):
             return obj.strftime('%Y-%m-%d %H:%M:%S')
         raise TypeError(f'Type {type(obj)} not supported.')
 
-    with open(log_file_path, 'w', encoding='utf-8') as f :
-        json.dump(result, f, ensure_ascii=False, indent=4, default=datetime_convert)
+    json_codec.dump_file(result, log_file_path, indent=True, default=datetime_convert)
 
 
-def store_db():
-    novel_list = load_munpia_data()
-    conn = sqlite3.connect('munpia_novel.db')
-    cur = conn.cursor()
-    start_time = time.time()
-
+def create_table(cur):
     cur.execute("""
         CREATE TABLE IF NOT EXISTS novel (
             id INTEGER PRIMARY KEY,
@@ -58,67 +64,54 @@ def store_db():
         )
     """)
 
+
+def store_novels(cur, novel_list, dt, total):
+    """novel_list를 novel 테이블에 추가/갱신하고 변경 내역은 total에 누적"""
     count = 1
-    total = []
-    dt = datetime.now()
     for novel in novel_list:
         if novel is None:
-            print("데이터가 없습니다 또는 삭제, 작업이 정상으로 완료되지 않음.")
+            logger.warning("데이터가 없습니다 또는 삭제, 작업이 정상으로 완료되지 않음.")
             continue
 
         existing_record = cur.execute("SELECT * FROM novel WHERE id=?", (novel["id"],)).fetchone()
 
         if existing_record:
-            print(f"{novel['id']}는 이미 존재합니다. 레코드를 업데이트하거나 무시합니다.")
-            column = existing_record
-            changes = {}
-            pprint(novel)
-
-            fields = [
-                ("platform", 1), ("title", 2), ("info", 3), ("author", 4), ("href", 5),
-                ("thumbnail", 6), ("tag", 7), ("the_number_of_serials", 8), ("view", 9), ("newstatus", 10), ("finishstatus", 11),
-                ("agegrade", 12), ("registdate", 13), ("updatedate", 14)
-            ]
-
-            for field, index in fields:
-                if column[index] != novel[field]:
-                    changes[field] = {"before": column[index], "after": novel[field]}
+            logger.debug("%s는 이미 존재합니다. 레코드를 업데이트하거나 무시합니다.", novel['id'])
+            logger.debug("%s", novel)
+            # 스트리밍 모드에서는 날짜가 datetime으로 들어오므로 인코더가 기존 행과 같은 문자열로 바꿔 비교
+            changes = sqlite_changes(existing_record, novel)
 
             if changes:
-                pprint(f"변경된 사항: {changes}")
+                logger.debug("변경된 사항: %s", changes)
                 total.append({"ID": novel["id"], "Changes": changes})
-
-                cur.execute("""
-                    UPDATE novel
-                    SET title=?, info=?, author=?, location=?, thumbnail=?, tags=?, chapter=?, 
-                        views=?, newstatus=?, finishstatus=?, agegrade=?, registdate=?, updatedate=?, crawltime=?
-                    WHERE id=?
-                """, (
-                    novel["title"], novel["info"], novel["author"], novel["href"], novel["thumbnail"],
-                    novel["tag"], novel["the_number_of_serials"], novel["view"], novel["newstatus"], novel["finishstatus"],
-                    novel['agegrade'], novel["registdate"], novel["updatedate"], dt,
-                    novel["id"]
-                ))
+                cur.execute(UPDATE_SQL, encode_sqlite_update(novel, dt))
 
         else:
-            pprint(f"ID:{novel['id']}는 기존에 존재하지 않습니다. 새 래코드를 추가합니다.")
-            cur.execute("""
-                INSERT INTO novel
-                (id, platform, title, info, author, location, thumbnail, tags, chapter, views, 
-                newstatus, finishstatus, agegrade, registdate, updatedate, crawltime)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                novel['id'], novel["platform"], novel["title"], novel["info"], novel["author"], novel["href"],
-                novel["thumbnail"], novel["tag"], novel["the_number_of_serials"], novel["view"], novel["newstatus"], novel["finishstatus"],
-                novel['agegrade'], novel["registdate"], novel["updatedate"], dt
-            ))
-        pprint(f"{count}/{len(novel_list)}번째 데이터 저장 완료")
+            logger.debug("ID:%s는 기존에 존재하지 않습니다. 새 래코드를 추가합니다.", novel['id'])
+            cur.execute(INSERT_SQL, encode_sqlite_insert(novel, dt))
+        logger.debug("%d번째 데이터 저장 완료", count)
         count += 1
+    return count - 1
+
+
+def store_db(path=SNAPSHOT_PATH, novel_list=None):
+    """novel_list가 있으면 스냅샷 파일을 다시 읽지 않고 그 레코드 dict(날짜는 datetime)를 저장"""
+    if novel_list is None:
+        novel_list = load_munpia_data(path)
+    conn = sqlite3.connect('munpia_novel.db')
+    cur = conn.cursor()
+    start_time = time.time()
+
+    create_table(cur)
 
+    total = []
+    dt = datetime.now()
+    count = store_novels(cur, novel_list, dt, total)
+    logger.info("총 %s개 데이터 처리 완료", count)
 
     end_time = time.time()
-    pprint(f"총 {end_time - start_time:.2f}초 소요")
-    pprint("데이터 저장 완료")
+    logger.info("총 %.2f초 소요", end_time - start_time)
+    logger.info("데이터 저장 완료")
     conn.commit()
     conn.close()
 
@@ -127,4 +120,5 @@ def store_db():
 
 
 if __name__ == '__main__':
+    setup_logging()
     store_db()
\ No newline at end of file
@@ -0,0 +1,465 @@
+"""크롤러 구성 요소별 성능 측정
+
+    python benchmark.py json
+    python benchmark.py crawl --size 30000 --latency 50
+    python benchmark.py loop --size 30000 --latency 5
+    python benchmark.py timestamps --rows 50000
+    python benchmark.py extract --rows 50000
+    python benchmark.py memory --rows 200000
+    python benchmark.py codec --rows 50000
+    python benchmark.py intern --rows 100000
+    python benchmark.py snapshot --rows 100000
+    python benchmark.py columns --rows 100000
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from datetime import datetime
+import json_codec
+from client import create_session, ConnectionStats, CLIENT_CONFIG
+from crawler import Crawler, FREE_TABS, PL_TABS, WINDOW_SIZE
+from info import set_novel_info, NovelInfo, NovelBatch
+import schema
+from schema import NovelExtractor, convert_timestamps, convert_timestamps_batch
+from store import novel_to_dict, store_info, load_snapshot, iter_snapshot
+from rate_limit import RateController, MAX_RATE
+from logger import setup_logging
+import event_loop
+import columnar
+from mock_server import catalog_item
+
+
+def sample_page(page, rows=30):
+    return {"content": {"list": [catalog_item((page - 1) * rows + i) for i in range(rows)]}}
+
+
+def sample_record(n):
+    """Munpia_novel_info.json에 저장되는 레코드와 같은 모양의 가짜 데이터"""
+    item = catalog_item(n)
+    return {
+        "platform": "Munpia",
+        "id": item["nvSrl"],
+        "title": item["title"],
+        "info": item["story"],
+        "author": item["author"],
+        "href": f"https://novel.munpia.com/{item['nvSrl']}",
+        "thumbnail": item["cover"],
+        "tag": item["genreText"],
+        "the_number_of_serials": int(item["sumEntry"].replace(",", "")),
+        "view": item["nvSumHit"],
+        "newstatus": item["isNew"],
+        "finishstatus": item["isFinish"],
+        "agegrade": item["isAdult"],
+        "registdate": "2020-01-01 00:00:00",
+        "updatedate": "2024-01-01 00:00:00",
+        "sort_option": item["nvNgCode"],
+    }
+
+
+def measure(func, number):
+    """number번 실행한 평균 시간(초). 가장 빠른 3회 반복 기준"""
+    return min(timeit.repeat(func, number=number, repeat=3)) / number
+
+
+def bench_json(args):
+    page = json.dumps(sample_page(1), ensure_ascii=False).encode("utf-8")
+    records = [sample_record(n) for n in range(args.rows)]
+    snapshot = json.dumps(records, ensure_ascii=False, indent=4).encode("utf-8")
+    print(f"JSON 구현: {json_codec.BACKEND}")
+    print(f"페이지 {len(page) / 1024:.1f}KB, 스냅샷 {args.rows}건 {len(snapshot) / 1024 / 1024:.1f}MB")
+
+    results = [
+        ("페이지 디코딩", lambda: json.loads(page), lambda: json_codec.loads(page), 2000),
+        ("스냅샷 디코딩", lambda: json.loads(snapshot), lambda: json_codec.loads(snapshot), 3),
+        ("스냅샷 인코딩", lambda: json.dumps(records, ensure_ascii=False, indent=4).encode("utf-8"),
+         lambda: json_codec.dumps(records, indent=True), 3),
+    ]
+    for name, stdlib, codec, number in results:
+        t_std = measure(stdlib, number)
+        t_codec = measure(codec, number)
+        print(f"{name}: json {t_std * 1000:.3f}ms, {json_codec.BACKEND} {t_codec * 1000:.3f}ms "
+              f"({t_std / t_codec:.1f}배)")
+
+
+class LatencyStats(ConnectionStats):
+    """연결 통계에 요청별 응답 시간(요청 시작~응답 헤더)을 더함"""
+
+    def __init__(self):
+        super().__init__()
+        self.latencies = []
+        self.statuses = {}
+
+    def trace_config(self):
+        trace = super().trace_config()
+        trace.on_request_start.append(self._on_latency_start)
+        trace.on_request_end.append(self._on_latency_end)
+        return trace
+
+    async def _on_latency_start(self, session, ctx, params):
+        ctx.started = time.perf_counter()
+
+    async def _on_latency_end(self, session, ctx, params):
+        self.latencies.append(time.perf_counter() - ctx.started)
+        status = params.response.status
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def percentile(self, q):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_mock_server(args):
+    """대역 서버를 별도 프로세스로 띄움 (크롤러와 CPU를 나눠 쓰지 않도록)"""
+    port = free_port()
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_server.py"),
+               "--port", str(port), "--size", str(args.size), "--latency", str(args.latency),
+               "--jitter", str(args.jitter), "--p429", str(args.p429), "--error-rate", str(args.error_rate),
+               "--seed", "0"]
+    if args.replay:
+        command += ["--replay", "--fixtures", args.replay]
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return server, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.05)
+    server.kill()
+    raise RuntimeError("대역 서버가 시작되지 않았습니다.")
+
+
+async def run_crawl(args, base_url):
+    stats = LatencyStats()
+    novel_list = []
+    async with create_session(stats, limit_per_host=args.limit_per_host) as session:
+        crawler = Crawler(session, novel_list, window=args.window, base_url=base_url,
+                          rate=RateController(args.rate, max_rate=max(args.rate, MAX_RATE)))
+        tabs = (FREE_TABS + PL_TABS)[:args.tabs]
+        started = time.perf_counter()
+        await crawler.crawl_tabs(tabs)
+        elapsed = time.perf_counter() - started
+    return stats, crawler, novel_list, elapsed
+
+
+def bench_crawl(args):
+    setup_logging("ERROR")  # 429 재시도 로그는 결과 출력에 섞이지 않도록
+    server, base_url = start_mock_server(args)
+    try:
+        stats, crawler, novel_list, elapsed = event_loop.run(run_crawl(args, base_url), args.loop)
+    finally:
+        server.terminate()
+        server.wait()
+    pages = sum(p for p, _ in crawler.progress.values())
+    print(f"대역 서버: 탭 {args.tabs}개 x {args.size}건, 지연 {args.latency}ms(+{args.jitter}ms), "
+          f"429 {args.p429:.1%}, 오류 {args.error_rate:.1%}")
+    print(f"페이지 {pages}개, 레코드 {len(novel_list)}건, {elapsed:.2f}초")
+    print(f"처리량: {pages / elapsed:.1f} 페이지/초, {len(novel_list) / elapsed:.0f} 레코드/초")
+    print(f"응답 시간: p50 {stats.percentile(0.5) * 1000:.1f}ms, p99 {stats.percentile(0.99) * 1000:.1f}ms "
+          f"(요청 {len(stats.latencies)}회, 상태 코드 {dict(sorted(stats.statuses.items()))})")
+    print(f"{crawler.rate.report()}, {stats.report()}")
+
+
+def bench_loop(args):
+    """같은 대역 서버 설정으로 루프 구현별 처리량과 페이지당 CPU 시간 비교"""
+    setup_logging("ERROR")
+    print(f"대역 서버: 탭 {args.tabs}개 x {args.size}건, 지연 {args.latency}ms(+{args.jitter}ms)")
+    missing = [kind for kind in ("asyncio", "uvloop") if kind not in event_loop.available_loops()]
+    if missing:
+        print(f"설치되지 않은 루프: {', '.join(missing)}")
+    for kind in event_loop.available_loops():
+        server, base_url = start_mock_server(args)
+        try:
+            cpu_started = time.process_time()
+            stats, crawler, novel_list, elapsed = event_loop.run(run_crawl(args, base_url), kind)
+            cpu = time.process_time() - cpu_started
+        finally:
+            server.terminate()
+            server.wait()
+        pages = sum(p for p, _ in crawler.progress.values())
+        print(f"{kind}: {len(stats.latencies) / elapsed:.1f} 요청/초, {pages / elapsed:.1f} 페이지/초, "
+              f"페이지당 CPU {cpu / max(pages, 1) * 1000:.2f}ms, p99 {stats.percentile(0.99) * 1000:.1f}ms")
+
+
+def bench_timestamps(args):
+    """nvTimeReg/nvTimeUpdate 변환: 레코드마다 convert_timestamps vs 페이지(30건)/스냅샷 단위 배치 변환"""
+    items = [catalog_item(n) for n in range(args.rows)]
+    regs = [item["nvTimeReg"] for item in items]
+    updates = [item["nvTimeUpdate"] for item in items]
+    pages = [(regs[i:i + 30], updates[i:i + 30]) for i in range(0, args.rows, 30)]
+    assert [convert_timestamps(r, u) for r, u in zip(regs, updates)] == list(zip(*convert_timestamps_batch(regs, updates)))
+
+    t_record = measure(lambda: [convert_timestamps(r, u) for r, u in zip(regs, updates)], 1)
+    t_page = measure(lambda: [convert_timestamps_batch(r, u) for r, u in pages], 1)
+    t_snapshot = measure(lambda: convert_timestamps_batch(regs, updates), 1)
+    print(f"{args.rows}건 변환")
+    print(f"레코드 단위: {t_record * 1000:.1f}ms")
+    print(f"페이지 단위 배치: {t_page * 1000:.1f}ms ({t_record / t_page:.1f}배)")
+    print(f"스냅샷 단위 배치: {t_snapshot * 1000:.1f}ms ({t_record / t_snapshot:.1f}배)")
+
+
+def legacy_parse(page_list):
+    """추출기 도입 전의 파싱: 항목마다 키워드 인자 17개로 set_novel_info, 회차 수는 저장할 때 문자열에서 변환"""
+    records = []
+    for i in page_list:
+        registdate, updatedate = convert_timestamps(i.get('nvTimeReg', 0), i.get('nvTimeUpdate', 0))
+        novel_info = set_novel_info(platform="Munpia", id=i['nvSrl'], title=i['title'], info=i['story'],
+                                    author=i['author'], href=f"https://novel.munpia.com/{i['nvSrl']}",
+                                    thumbnail=i['cover'], tag=i['genreText'], the_number_of_serials=i['sumEntry'],
+                                    chapter=i['sumEntry'], view=i['nvSumHit'], newstatus=i['isNew'],
+                                    finishstatus=i['isFinish'], agegrade=i['isAdult'], registdate=registdate,
+                                    updatedate=updatedate, sort_option=i['nvNgCode'])
+        novel_info.the_number_of_serials = int(novel_info.the_number_of_serials.replace(',', ''))
+        records.append(novel_info)
+    return records
+
+
+def bench_extract(args):
+    """목록 항목 -> NovelInfo 변환: 기존 파싱 vs 필드 정의로 만든 추출기 (30건 페이지 단위)"""
+    pages = [sample_page(page)["content"]["list"] for page in range(1, args.rows // 30 + 1)]
+    extractor = NovelExtractor()
+    assert [novel_to_dict(r) for r in legacy_parse(pages[0])] == [novel_to_dict(r) for r in extractor.parse(pages[0])]
+
+    rows = len(pages) * 30
+    t_legacy = measure(lambda: [legacy_parse(page) for page in pages], 1)
+    t_extract = measure(lambda: [extractor.parse(page) for page in pages], 1)
+    print(f"{rows}건 ({len(pages)}페이지) 변환")
+    print(f"기존 파싱: {t_legacy * 1000:.1f}ms ({rows / t_legacy:.0f} 레코드/초)")
+    print(f"추출기: {t_extract * 1000:.1f}ms ({rows / t_extract:.0f} 레코드/초, {t_legacy / t_extract:.1f}배)")
+
+
+class DictNovelInfo:
+    """__slots__ 도입 전의 NovelInfo처럼 인스턴스마다 __dict__를 가진 레코드"""
+    __init__ = NovelInfo.__init__
+
+
+def traced_size(build):
+    """build()가 만든 객체가 차지하는 메모리(바이트)와 만드는 동안의 최대값"""
+    tracemalloc.start()
+    try:
+        result = build()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return current, peak
+
+
+def bench_memory(args):
+    """레코드 args.rows개를 들고 있을 때의 메모리: __dict__ 레코드 vs __slots__ 레코드 vs NovelBatch
+
+    원본 항목의 문자열은 미리 만들어 두고 세 방식이 같이 참조하므로, 레코드 구조 자체의 비용만 비교한다.
+    """
+    pages = [sample_page(page)["content"]["list"] for page in range(1, args.rows // 30 + 1)]
+    extractor = NovelExtractor()
+    records = [record for page in pages for record in extractor.parse(page)]
+    fields = [[getattr(record, name) for name in NovelInfo.__slots__[:-2]] for record in records]
+
+    def build_records(record_type):
+        # 실제 크롤링처럼 tabs/sort_options는 병합기(merge.NovelMerger)가 가진 목록을 공유
+        built = [record_type(*values) for values in fields]
+        for novel, record in zip(built, records):
+            novel.tabs, novel.sort_options = record.tabs, record.sort_options
+        return built
+
+    results = [
+        ("__dict__ 레코드", lambda: build_records(DictNovelInfo)),
+        ("__slots__ 레코드", lambda: build_records(NovelInfo)),
+        ("NovelBatch", lambda: NovelBatch(records)),
+    ]
+    print(f"레코드 {len(records)}건 (문자열 제외한 레코드 구조 비용)")
+    baseline = None
+    for name, build in results:
+        current, peak = traced_size(build)
+        baseline = baseline or current
+        print(f"{name}: {current / 1024 / 1024:.1f}MB (레코드당 {current / len(records):.0f}B, "
+              f"최대 {peak / 1024 / 1024:.1f}MB, {current / baseline:.0%})")
+
+
+def legacy_copy_row(row, dt):
+    """인코더 도입 전 DB_connect.copy_update_rows의 열 이름 분기 루프"""
+    values = []
+    for col in schema.DB_COLUMNS:
+        val = row.get(col, None)
+        if col in ["chapter", "views"]:
+            try:
+                values.append(int(val))
+            except (ValueError, TypeError):
+                values.append(0)
+        elif col in ["newstatus", "finishstatus", "agegrade"]:
+            values.append('t' if val else 'f')
+        elif col in ["registdate", "updatedate", "crawltime"]:
+            if isinstance(val, datetime):
+                values.append(val.isoformat())
+            elif val is None:
+                values.append(dt.isoformat())
+            else:
+                try:
+                    values.append(datetime.fromisoformat(str(val)).isoformat())
+                except Exception:
+                    values.append(dt.isoformat())
+        else:
+            values.append('' if val is None or val == '' else schema.clean_text(val))
+    return values
+
+
+def bench_codec(args):
+    """schema.RECORD_FIELDS에서 만든 형식별 인코더의 초당 처리 행 수"""
+    pages = [sample_page(page)["content"]["list"] for page in range(1, args.rows // 30 + 1)]
+    extractor = NovelExtractor()
+    records = [record for page in pages for record in extractor.parse(page)]
+    rows = [schema.encode_dict(record) for record in records]
+    snapshot = json_codec.loads(json_codec.dumps(rows))
+    dt = datetime.now()
+    pg_rows = [{"id": row["id"], "crawltime": dt,
+                **{column: row[key] for key, column in schema.DB_FIELD_MAP.items()}} for row in snapshot]
+    # id는 기존 루프에선 문자열, 인코더는 int지만 CSV로 쓰면 같음
+    assert ([[str(v) for v in legacy_copy_row(row, dt)] for row in pg_rows[:100]] ==
+            [[str(v) for v in schema.encode_copy_row(row, dt)] for row in pg_rows[:100]])
+
+    results = [
+        ("스냅샷 dict (encode_dict)", lambda: [schema.encode_dict(r) for r in records]),
+        ("스냅샷 dict -> NovelInfo (decode_dict)", lambda: [schema.decode_dict(row) for row in snapshot]),
+        ("sqlite INSERT 파라미터", lambda: [schema.encode_sqlite_insert(row, dt) for row in snapshot]),
+        ("sqlite UPDATE 파라미터", lambda: [schema.encode_sqlite_update(row, dt) for row in snapshot]),
+        ("PG executemany 파라미터", lambda: [schema.encode_pg_params(row, dt) for row in pg_rows]),
+        ("PG COPY CSV 행", lambda: [schema.encode_copy_row(row, dt) for row in pg_rows]),
+        ("PG COPY CSV 행 (기존 분기 루프)", lambda: [legacy_copy_row(row, dt) for row in pg_rows]),
+    ]
+    print(f"레코드 {len(records)}건")
+    for name, encode in results:
+        t = measure(encode, 1)
+        print(f"{name}: {len(records) / t:,.0f} 행/초")
+
+
+def bench_intern(args):
+    """작가/장르/정렬 코드 공유(intern)와 사전 인코딩 스냅샷의 메모리/파일 크기 비교"""
+    # 실제 크롤링처럼 페이지마다 JSON을 디코딩해서 값마다 새 문자열 객체가 생기게 함
+    bodies = [json_codec.dumps(sample_page(page)) for page in range(1, args.rows // 30 + 1)]
+    plain_fields = tuple((name, key, "raw" if kind == "intern" else kind) for name, key, kind in schema.FIELDS)
+
+    def parse_all(extractor):
+        return [record for body in bodies for record in extractor.parse(json_codec.loads(body)["content"]["list"])]
+
+    print(f"레코드 {len(bodies) * 30}건")
+    plain, _ = traced_size(lambda: parse_all(NovelExtractor(plain_fields)))
+    interned, _ = traced_size(lambda: parse_all(NovelExtractor()))
+    print(f"레코드 메모리: 공유 안 함 {plain / 1024 / 1024:.1f}MB, intern {interned / 1024 / 1024:.1f}MB "
+          f"({1 - interned / plain:.0%} 감소)")
+
+    records = parse_all(NovelExtractor())
+    with tempfile.TemporaryDirectory() as tmp:
+        sizes = {}
+        for name, dictionary in (("json", False), ("dict", True)):
+            path = os.path.join(tmp, f"{name}.json")
+            store_info(records, path, dictionary=dictionary)
+            sizes[name] = os.path.getsize(path)
+            loaded, _ = traced_size(lambda: load_snapshot(path))
+            print(f"스냅샷 {name}: {sizes[name] / 1024 / 1024:.1f}MB, load_snapshot 결과 {loaded / 1024 / 1024:.1f}MB")
+        assert load_snapshot(os.path.join(tmp, "json.json")) == load_snapshot(os.path.join(tmp, "dict.json"))
+    print(f"파일 크기 {1 - sizes['dict'] / sizes['json']:.0%} 감소")
+
+
+def legacy_store_info(info_list, path):
+    """스트리밍 기록 전의 store_info: 전체 dict 목록을 만든 뒤 들여쓰기 JSON으로 한 번에 기록"""
+    with open(path, "wb") as f:
+        f.write(json_codec.dumps([novel_to_dict(info) for info in info_list], indent=True))
+
+
+def bench_snapshot(args):
+    """스냅샷 기록 방식별 최대 메모리/파일 크기/스트리밍 적재 속도 비교"""
+    extractor = NovelExtractor()
+    records = [record for page in range(1, args.rows // 30 + 1)
+               for record in extractor.parse(sample_page(page)["content"]["list"])]
+    print(f"레코드 {len(records)}건")
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = [
+            ("json(indent, 기존)", os.path.join(tmp, "legacy.json"), legacy_store_info),
+            ("json", os.path.join(tmp, "snapshot.json"), store_info),
+            ("jsonl", os.path.join(tmp, "snapshot.jsonl"), store_info),
+            ("jsonl.gz", os.path.join(tmp, "snapshot.jsonl.gz"), store_info),
+        ]
+        for name, path, write in cases:
+            start = time.perf_counter()
+            _, peak = traced_size(lambda: write(records, path))
+            t_write = time.perf_counter() - start
+            start = time.perf_counter()
+            count = sum(1 for _ in iter_snapshot(path))
+            t_read = time.perf_counter() - start
+            assert count == len(records)
+            print(f"{name}: 기록 {t_write * 1000:.0f}ms (최대 {peak / 1024 / 1024:.1f}MB), "
+                  f"파일 {os.path.getsize(path) / 1024 / 1024:.1f}MB, 읽기 {t_read * 1000:.0f}ms")
+
+
+def bench_columns(args):
+    """조회수 열 하나를 읽을 때 스냅샷 JSON 파싱과 열 단위 스냅샷(memmap) 비교"""
+    extractor = NovelExtractor()
+    records = [record for page in range(1, args.rows // 30 + 1)
+               for record in extractor.parse(sample_page(page)["content"]["list"])]
+    print(f"레코드 {len(records)}건")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "snapshot.json")
+        store_info(records, path)
+        start = time.perf_counter()
+        directory = columnar.export_snapshot(path)
+        print(f"열 스냅샷 변환: {(time.perf_counter() - start) * 1000:.0f}ms")
+
+        def from_json():
+            return sum(row["view"] for row in load_snapshot(path))
+
+        def from_columns():
+            return int(columnar.ColumnarSnapshot(directory).column("view").sum())
+
+        assert from_json() == from_columns()
+        for name, load in (("JSON 파싱", from_json), ("memmap", from_columns)):
+            start = time.perf_counter()
+            _, peak = traced_size(load)
+            print(f"{name}: {(time.perf_counter() - start) * 1000:.1f}ms (최대 {peak / 1024 / 1024:.2f}MB)")
+
+
+BENCHMARKS = {
+    "json": bench_json,
+    "crawl": bench_crawl,
+    "loop": bench_loop,
+    "timestamps": bench_timestamps,
+    "extract": bench_extract,
+    "memory": bench_memory,
+    "codec": bench_codec,
+    "intern": bench_intern,
+    "snapshot": bench_snapshot,
+    "columns": bench_columns,
+}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="크롤러 성능 측정")
+    parser.add_argument("name", choices=BENCHMARKS)
+    parser.add_argument("--rows", type=int, default=50000, help="스냅샷 레코드 수")
+    crawl = parser.add_argument_group("crawl")
+    crawl.add_argument("--size", type=int, default=30000, help="대역 서버의 탭당 소설 수")
+    crawl.add_argument("--tabs", type=int, default=len(FREE_TABS + PL_TABS), help="크롤링할 탭 수")
+    crawl.add_argument("--latency", type=float, default=50.0, help="대역 서버 응답 지연(ms)")
+    crawl.add_argument("--jitter", type=float, default=20.0, help="지연에 더할 무작위 값의 최대(ms)")
+    crawl.add_argument("--p429", type=float, default=0.0, help="429 응답 확률")
+    crawl.add_argument("--error-rate", type=float, default=0.0, help="500 응답 확률")
+    crawl.add_argument("--replay", metavar="DIR", help="생성 데이터 대신 이 디렉터리의 픽스처를 재생")
+    crawl.add_argument("--window", type=int, default=WINDOW_SIZE, help="탭마다 동시에 요청할 페이지 수")
+    crawl.add_argument("--rate", type=float, default=MAX_RATE, help="초기 초당 요청 수 (크면 속도 조절기 상한도 같이 올림)")
+    crawl.add_argument("--loop", default="auto", choices=event_loop.LOOP_CHOICES, help="crawl에서 쓸 이벤트 루프")
+    crawl.add_argument("--limit-per-host", type=int, default=CLIENT_CONFIG["limit_per_host"], help="호스트당 동시 연결 수")
+    args = parser.parse_args()
+    BENCHMARKS[args.name](args)
@@ -0,0 +1,118 @@
+import logging
+import os
+import time
+import json_codec
+
+CHECKPOINT_PATH = "crawl_checkpoint.json"
+SPILL_PATH = "crawl_spill.jsonl"
+# 이 간격(초)마다 쌓인 페이지를 스필 파일에 붙이고 체크포인트를 저장
+CHECKPOINT_INTERVAL = 30.0
+
+logger = logging.getLogger("checkpoint")
+
+
+class Checkpoint:
+    """탭별로 처리가 끝난 페이지 위치와 그 페이지들의 원본 목록(스필 파일)을 디스크에 기록
+
+    크롤러는 페이지를 순서대로 처리하므로 탭마다 "다음에 처리할 페이지" 하나만 저장하면 된다.
+    체크포인트에는 스필 파일의 유효 길이도 같이 저장해서, 체크포인트 이후에 쓰다 만 부분은 재개할 때 잘라낸다.
+    """
+
+    def __init__(self, path=CHECKPOINT_PATH, spill_path=SPILL_PATH, interval=CHECKPOINT_INTERVAL, resume=False):
+        self.path = path
+        self.spill_path = spill_path
+        self.interval = interval
+        self.next_pages = {}  # 탭 키 -> 다음에 처리할 페이지
+        self.done_tabs = set()
+        self.spill_size = 0
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        self.resumed = False
+
+        if resume and os.path.exists(path):
+            state = json_codec.load_file(path)
+            self.next_pages = state.get("next_pages", {})
+            self.done_tabs = set(state.get("done_tabs", []))
+            self.spill_size = state.get("spill_size", 0)
+            self.resumed = True
+            logger.info("체크포인트에서 재개: %s", self.report())
+        elif resume:
+            logger.warning("체크포인트 %s가 없어 처음부터 크롤링합니다.", path)
+
+        if self.resumed:
+            size = os.path.getsize(spill_path) if os.path.exists(spill_path) else 0
+            if size < self.spill_size:
+                # truncate로 늘리면 빈 바이트가 채워져 복원할 때 깨지므로 이어가지 않음
+                raise ValueError(f"{spill_path}({size} bytes)가 체크포인트의 spill_size({self.spill_size})보다 짧아 "
+                                 f"재개할 수 없습니다. --resume 없이 다시 실행하세요.")
+        elif os.path.exists(path):
+            # 새로 시작하면 지난 체크포인트를 먼저 지움. 첫 저장 전에 멈춘 뒤 --resume해도 비운 스필과 짝지어지지 않음
+            os.remove(path)
+
+        # 재개하지 않으면 스필 파일을 비우고, 재개하면 체크포인트 이후에 쓰인 부분을 잘라냄
+        self.spill = open(spill_path, "ab" if self.resumed else "wb")
+        self.spill.truncate(self.spill_size)
+        self.spill.seek(self.spill_size)
+
+    def start_page(self, tab_key):
+        """탭을 이어서 순회할 페이지. 이미 끝난 탭이면 None"""
+        if tab_key in self.done_tabs:
+            return None
+        return self.next_pages.get(tab_key, 1)
+
+    def add_page(self, tab_key, page, page_list=None, cached=None):
+        """처리가 끝난 페이지 기록. 원본 목록(또는 캐시 페이지의 id)은 다음 저장 때 스필 파일에 붙음"""
+        if cached is not None:
+            self.buffer.append({"tab": tab_key, "page": page, "ids": cached.ids, "newest": cached.newest})
+        elif page_list:
+            self.buffer.append({"tab": tab_key, "page": page, "list": list(page_list)})
+        self.next_pages[tab_key] = page + 1
+        if time.monotonic() - self.last_flush >= self.interval:
+            self.flush()
+
+    def finish_tab(self, tab_key):
+        self.done_tabs.add(tab_key)
+        self.flush()
+
+    def flush(self):
+        """스필을 먼저 디스크에 내린 뒤 체크포인트를 원자적으로 교체"""
+        self.last_flush = time.monotonic()
+        if self.buffer:
+            self.spill.write(b"".join(json_codec.dumps(entry) + b"\n" for entry in self.buffer))
+            self.buffer = []
+        self.spill.flush()
+        os.fsync(self.spill.fileno())
+        self.spill_size = self.spill.tell()
+
+        state = {
+            "next_pages": self.next_pages,
+            "done_tabs": sorted(self.done_tabs),
+            "spill_size": self.spill_size,
+        }
+        tmp_path = self.path + ".tmp"
+        json_codec.dump_file(state, tmp_path, indent=True)
+        os.replace(tmp_path, self.path)
+
+    def iter_spill(self):
+        """재개할 때 지난 실행에서 처리한 페이지 기록을 순서대로"""
+        if not self.resumed:
+            return
+        with open(self.spill_path, "rb") as f:
+            for line in f:
+                yield json_codec.loads(line)
+
+    def report(self):
+        tabs = ", ".join(f"{key} {page}p" for key, page in self.next_pages.items() if key not in self.done_tabs)
+        return f"완료된 탭 {len(self.done_tabs)}개, 진행 중 [{tabs}]"
+
+    def close(self):
+        self.flush()
+        self.spill.close()
+
+    def clear(self):
+        """결과를 모두 저장한 뒤 호출. 다음 --resume은 처음부터 시작"""
+        if not self.spill.closed:
+            self.spill.close()
+        for path in (self.path, self.spill_path):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,98 @@
+import aiohttp
+
+# 크롤러 세션 기본 설정 (create_session에 키워드로 덮어쓸 수 있음)
+CLIENT_CONFIG = {
+    "limit": 100,              # 전체 동시 연결 수
+    "limit_per_host": 16,      # 호스트당 동시 연결 수
+    "ttl_dns_cache": 300,      # DNS 캐시 유지 시간(초)
+    "keepalive_timeout": 60,   # 유휴 연결을 재사용하기 위해 붙잡아 둘 시간(초)
+    "connect_timeout": 10,     # 연결(+TLS) 타임아웃(초)
+    "read_timeout": 30,        # 소켓 읽기 타임아웃(초), 멈춘 연결이 탭 전체를 붙잡지 않도록
+    "total_timeout": None,     # 요청 전체 타임아웃(초), None이면 제한 없음
+}
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36",
+    "X-Requested-With": "XMLHttpRequest",
+}
+
+
+def accept_encoding():
+    """aiohttp가 풀 수 있는 압축만 요청 (brotli는 Brotli/brotlicffi 설치 시에만)"""
+    try:
+        import brotli  # noqa: F401
+        return "gzip, deflate, br"
+    except ImportError:
+        pass
+    try:
+        import brotlicffi  # noqa: F401
+        return "gzip, deflate, br"
+    except ImportError:
+        return "gzip, deflate"
+
+
+class ConnectionStats:
+    """연결 생성/재사용 횟수를 세서 요청마다 TLS 핸드셰이크를 하고 있지 않은지 확인"""
+
+    def __init__(self):
+        self.requests = 0
+        self.created = 0
+        self.reused = 0
+        self.dns_hit = 0
+        self.dns_miss = 0
+
+    def trace_config(self):
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self._on_request_start)
+        trace.on_connection_create_end.append(self._on_connection_create)
+        trace.on_connection_reuseconn.append(self._on_connection_reuse)
+        trace.on_dns_cache_hit.append(self._on_dns_hit)
+        trace.on_dns_cache_miss.append(self._on_dns_miss)
+        return trace
+
+    async def _on_request_start(self, session, ctx, params):
+        self.requests += 1
+
+    async def _on_connection_create(self, session, ctx, params):
+        self.created += 1
+
+    async def _on_connection_reuse(self, session, ctx, params):
+        self.reused += 1
+
+    async def _on_dns_hit(self, session, ctx, params):
+        self.dns_hit += 1
+
+    async def _on_dns_miss(self, session, ctx, params):
+        self.dns_miss += 1
+
+    @property
+    def reuse_ratio(self):
+        total = self.created + self.reused
+        return self.reused / total if total else 0.0
+
+    def report(self):
+        return (f"요청 {self.requests}회, 새 연결 {self.created}회, 연결 재사용 {self.reused}회 "
+                f"(재사용률 {self.reuse_ratio:.1%}), DNS 캐시 적중 {self.dns_hit}/{self.dns_hit + self.dns_miss}")
+
+
+def create_session(stats=None, headers=None, **overrides):
+    """튜닝된 커넥터/타임아웃/기본 헤더를 가진 ClientSession 생성"""
+    config = {**CLIENT_CONFIG, **overrides}
+    connector = aiohttp.TCPConnector(
+        limit=config["limit"],
+        limit_per_host=config["limit_per_host"],
+        ttl_dns_cache=config["ttl_dns_cache"],
+        use_dns_cache=config["ttl_dns_cache"] is not None,
+        keepalive_timeout=config["keepalive_timeout"],
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=config["total_timeout"],
+        connect=config["connect_timeout"],
+        sock_read=config["read_timeout"],
+    )
+    session_headers = {**DEFAULT_HEADERS, "Accept-Encoding": accept_encoding()}
+    if headers:
+        session_headers.update(headers)
+    trace_configs = [stats.trace_config()] if stats is not None else None
+    return aiohttp.ClientSession(connector=connector, timeout=timeout, headers=session_headers,
+                                 trace_configs=trace_configs)
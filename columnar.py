@@ -0,0 +1,285 @@
+"""열 단위 바이너리 스냅샷 (--snapshot-columns)
+
+스냅샷 JSON과 함께 Munpia_novel_info.columns/ 디렉터리에 열마다 파일 하나씩 저장한다.
+
+    meta.json                     {"format", "rows", "source", "columns": [{"name", "kind", "dtype", "files"}, ...]}
+    id.bin, view.bin, ...         int: <i8 (None은 NULL_INT)
+    newstatus.bin, ...            bool: i1 (1/0, None은 -1)
+    registdate.bin, ...           date: <M8[s] = 1970-01-01 00:00:00(시간대 없음)부터의 초, None은 NaT
+    title.offsets, title.blob     text: 행 i의 값은 blob[offsets[i]:offsets[i + 1]] (UTF-8)
+    title.valid                   text 열에 None이 있을 때만 (1/0)
+    tabs.offsets, tabs.blob       json: 목록 값은 JSON으로 인코딩해서 text와 같은 방식
+
+숫자/날짜 열은 numpy.memmap으로 바로 열리므로 큰 스냅샷에서도 열 하나만 읽을 때 JSON을 파싱하지 않는다.
+
+    python columnar.py Munpia_novel_info.json      # 기존 스냅샷을 변환
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+from array import array
+import numpy as np
+import json_codec
+from info import encode_column_value, NO_DATE
+from schema import RECORD_FIELDS, parse_date, to_int
+from store import iter_snapshot
+from logger import setup_logging
+
+logger = logging.getLogger("columnar")
+
+COLUMNAR_FORMAT = "munpia-columnar-v1"
+COLUMNS_SUFFIX = ".columns"
+META_FILE = "meta.json"
+NULL_INT = NO_DATE  # datetime64에서는 NaT와 같은 값
+NULL_BOOL = -1
+# RECORD_FIELDS의 raw 중 문자열인 필드 (나머지 raw는 목록이라 json으로 저장)
+KIND_OVERRIDES = {"sort_option": "text"}
+DTYPES = {"int": "<i8", "bool": "i1", "date": "<M8[s]", "text": "|u1", "json": "|u1"}
+# DB 열 이름(chapter, views 등)으로도 열을 찾을 수 있게
+ALIASES = {column: key for key, column, _ in RECORD_FIELDS if column is not None and column != key}
+
+
+def columns_path(path):
+    """스냅샷 경로 옆의 열 디렉터리 (Munpia_novel_info.jsonl.gz -> Munpia_novel_info.columns)"""
+    base = os.path.basename(path).split(".", 1)[0]
+    return os.path.join(os.path.dirname(path), base + COLUMNS_SUFFIX)
+
+
+def column_kinds():
+    return [(key, KIND_OVERRIDES.get(key, "json" if kind == "raw" else kind)) for key, _, kind in RECORD_FIELDS]
+
+
+def fixed_value(kind, value):
+    """고정 폭 배열에 넣을 값. 읽을 수 없는 값은 None"""
+    if value is None:
+        return None
+    try:
+        if kind == "int":
+            return to_int(value)
+        if kind == "bool":
+            return int(bool(value))
+        return encode_column_value("date", parse_date(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class ColumnWriter:
+    def __init__(self, directory, name, kind):
+        self.name = name
+        self.kind = kind
+        self.invalid = 0
+        self.fixed = kind in ("int", "bool", "date")
+        if self.fixed:
+            self.files = [name + ".bin"]
+            self.f = open(os.path.join(directory, self.files[0]), "wb")
+            self.null = NULL_BOOL if kind == "bool" else NULL_INT
+        else:
+            self.files = [name + ".offsets", name + ".blob"]
+            self.offsets = open(os.path.join(directory, self.files[0]), "wb")
+            self.f = open(os.path.join(directory, self.files[1]), "wb")
+            self.valid = bytearray()
+            self.end = 0
+            self.write_native(self.offsets, array("q", [0]))
+
+    @staticmethod
+    def write_native(f, values):
+        if sys.byteorder == "big":
+            values.byteswap()
+        values.tofile(f)
+
+    def write(self, values):
+        if self.fixed:
+            column = array("b" if self.kind == "bool" else "q")
+            for value in values:
+                encoded = fixed_value(self.kind, value)
+                if encoded is None:
+                    if value is not None:
+                        self.invalid += 1
+                    encoded = self.null
+                column.append(encoded)
+            self.write_native(self.f, column)
+            return
+        offsets = array("q")
+        chunks = []
+        for value in values:
+            self.valid.append(value is not None)
+            if value is not None:
+                data = json_codec.dumps(value) if self.kind == "json" else str(value).encode("utf-8")
+                chunks.append(data)
+                self.end += len(data)
+            offsets.append(self.end)
+        self.f.write(b"".join(chunks))
+        self.write_native(self.offsets, offsets)
+
+    def close(self, directory):
+        self.f.close()
+        if self.fixed:
+            return
+        self.offsets.close()
+        if not all(self.valid):
+            self.files.append(self.name + ".valid")
+            with open(os.path.join(directory, self.files[-1]), "wb") as f:
+                f.write(self.valid)
+
+    def describe(self):
+        return {"name": self.name, "kind": self.kind, "dtype": DTYPES[self.kind], "files": self.files}
+
+
+class ColumnarWriter:
+    """레코드 dict를 배치 단위로 받아 열 파일에 이어 쓰고 close()에서 디렉터리째 바꿔 끼움
+
+    StreamingStore/SnapshotWriter와 같은 write()/close()/abort() 인터페이스.
+    """
+
+    def __init__(self, directory, source=None):
+        self.directory = directory
+        self.tmp_directory = directory + ".tmp"
+        self.source = source
+        self.count = 0
+        if os.path.exists(self.tmp_directory):
+            shutil.rmtree(self.tmp_directory)
+        os.makedirs(self.tmp_directory)
+        self.columns = [ColumnWriter(self.tmp_directory, name, kind) for name, kind in column_kinds()]
+
+    def write(self, novel_dicts):
+        rows = list(novel_dicts)
+        if not rows:
+            return
+        for column in self.columns:
+            column.write([row.get(column.name) for row in rows])
+        self.count += len(rows)
+
+    def close(self):
+        for column in self.columns:
+            column.close(self.tmp_directory)
+            if column.invalid:
+                logger.warning("%s 열에서 %s로 바꿀 수 없는 값 %s개를 빈 값으로 저장", column.name, column.kind, column.invalid)
+        meta = {
+            "format": COLUMNAR_FORMAT,
+            "rows": self.count,
+            "source": self.source,
+            "columns": [column.describe() for column in self.columns],
+        }
+        json_codec.dump_file(meta, os.path.join(self.tmp_directory, META_FILE), indent=True)
+        # 디렉터리는 os.replace로 덮어쓸 수 없으므로 기존 것을 옆으로 옮긴 뒤 교체
+        old_directory = self.directory + ".old"
+        if os.path.exists(old_directory):
+            shutil.rmtree(old_directory)
+        if os.path.exists(self.directory):
+            os.replace(self.directory, old_directory)
+        os.replace(self.tmp_directory, self.directory)
+        if os.path.exists(old_directory):
+            shutil.rmtree(old_directory)
+        logger.info("열 단위 스냅샷 %s행 저장 (%s)", self.count, self.directory)
+
+    def abort(self):
+        for column in self.columns:
+            column.f.close()
+            if not column.fixed:
+                column.offsets.close()
+        shutil.rmtree(self.tmp_directory, ignore_errors=True)
+
+
+def export_snapshot(path, directory=None, batch_size=10000):
+    """저장된 스냅샷(JSON/사전 인코딩/JSON Lines)을 읽어서 열 단위 스냅샷을 만듦"""
+    directory = directory or columns_path(path)
+    writer = ColumnarWriter(directory, source=os.path.basename(path))
+    try:
+        batch = []
+        for row in iter_snapshot(path):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                writer.write(batch)
+                batch = []
+        writer.write(batch)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+    return directory
+
+
+class TextColumn:
+    """text/json 열. 행을 꺼낼 때만 blob에서 잘라 디코딩"""
+
+    def __init__(self, offsets, blob, valid, kind):
+        self.offsets = offsets
+        self.blob = blob
+        self.valid = valid
+        self.kind = kind
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        if self.valid is not None and not self.valid[i]:
+            return None
+        data = self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes()
+        return json_codec.loads(data) if self.kind == "json" else data.decode("utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def lengths(self):
+        """행별 바이트 길이 (디코딩 없이)"""
+        return np.diff(self.offsets)
+
+
+class ColumnarSnapshot:
+    """열 단위 스냅샷 읽기. column()은 열 하나만 memmap으로 열어서 돌려줌
+
+        snap = ColumnarSnapshot("Munpia_novel_info.columns")
+        views = snap.column("view")          # numpy.memmap (int64)
+        snap.column("registdate")            # datetime64[s], 빈 값은 NaT
+        snap.column("title")[0]              # TextColumn
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.meta = json_codec.load_file(os.path.join(directory, META_FILE))
+        if self.meta.get("format") != COLUMNAR_FORMAT:
+            raise ValueError(f"알 수 없는 열 스냅샷 형식: {self.meta.get('format')}")
+        self.rows = self.meta["rows"]
+        self.specs = {spec["name"]: spec for spec in self.meta["columns"]}
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def names(self):
+        return list(self.specs)
+
+    def _map(self, file_name, dtype, count):
+        if count == 0:
+            return np.empty(0, dtype)
+        return np.memmap(os.path.join(self.directory, file_name), dtype=dtype, mode="r", shape=(count,))
+
+    def column(self, name):
+        spec = self.specs.get(ALIASES.get(name, name))
+        if spec is None:
+            raise KeyError(name)
+        files = spec["files"]
+        if spec["kind"] in ("int", "bool", "date"):
+            return self._map(files[0], spec["dtype"], self.rows)
+        offsets = self._map(files[0], "<i8", self.rows + 1)
+        blob = self._map(files[1], "|u1", int(offsets[-1]))
+        valid = self._map(files[2], "|u1", self.rows) if len(files) > 2 else None
+        return TextColumn(offsets, blob, valid, spec["kind"])
+
+    def __getitem__(self, name):
+        return self.column(name)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="스냅샷을 열 단위 바이너리 스냅샷으로 변환")
+    parser.add_argument("path", nargs="?", default="Munpia_novel_info.json", help="스냅샷 경로 (json/dict/jsonl)")
+    parser.add_argument("--out", help="열 디렉터리 (기본: 스냅샷 이름.columns)")
+    args = parser.parse_args()
+    setup_logging()
+    export_snapshot(args.path, args.out)
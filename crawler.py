@@ -0,0 +1,460 @@
+import asyncio
+import json_codec
+import time
+from urllib.parse import urlencode, urlsplit
+import logging
+import aiohttp
+from schema import NovelExtractor
+from rate_limit import RateController, parse_retry_after
+from page_cache import PageList, CachedPage, page_digest
+from watermark import as_datetime as watermark_value
+from retry import RetryPolicy, HostBreakers
+
+BASE_URL = "https://mm.munpia.com"
+ROWS = 30
+# 탭마다 동시에 요청할 페이지 수 (슬라이딩 윈도우 크기)
+WINDOW_SIZE = 8
+MAX_PAGE = 100000
+# 페이지 순서로 이만큼 연속 오류가 나면 탭 순회를 멈춤
+MAX_CONSECUTIVE_ERRORS = 20
+# 순서대로 준비된 페이지를 이만큼 모아서 한 번에 파싱 (ROWS * 8 = 240건). 날짜 변환이 페이지(30건) 단위가 아니라
+# schema.BATCH_MIN 이상의 배치로 NumPy 경로를 타도록 함 (증분 순회는 워터마크 확인이 늦어지지 않게 모으지 않음)
+PARSE_PAGES = 8
+
+logger = logging.getLogger("crawler")
+
+#---유료 소설 목록
+# 연재 신규베스트 "https://mm.munpia.com/pl/getList?page=1&rows=30&tab=plserial&subtab=new&selectbox="
+# 신규베스트 2   "https://mm.munpia.com/pl/getList?page=1&rows=30&tab=new&subtab=&selectbox=&selectbox2="
+# 최신 "https://mm.munpia.com/pl/getList?page=1&rows=30&tab=plserial&subtab=serial&selectbox="
+#최신2 "https://mm.munpia.com/pl/getList?page=1&rows=30&tab=serial&subtab=&selectbox=&selectbox2=new"
+# 완결 "https://mm.munpia.com/pl/getList?page=1&rows=30&tab=plserial&subtab=serial_end&selectbox=
+#완결2 "https://mm.munpia.com/pl/getList?page=1&rows=30&tab=serial_end&subtab=&selectbox=&selectbox2=fin"
+
+#---무료 소설 목록
+# 작가 "https://mm.munpia.com/free/getList?page=1&rows=30&tab=pro&subtab=&selectbox="
+# 일반 "https://mm.munpia.com/free/getList?page=1&rows=30&tab=regular&subtab=&selectbox="
+# 자유 "https://mm.munpia.com/free/getList?page=1&rows=30&tab=free&subtab=&selectbox="
+# 완결 "https://mm.munpia.com/free/getList?page=1&rows=30&tab=finish&subtab=&selectbox="
+
+# 탭 정의: 키, 라벨, 경로, 쿼리 파라미터 (page, rows는 크롤러가 채움)
+# latest: 최신 업데이트순 정렬 탭 (증분 모드에서 워터마크를 지나면 멈출 수 있음)
+FREE_TABS = [
+    {"key": "free_pro", "label": "무료 작가", "path": "/free/getList",
+     "params": {"tab": "pro", "subtab": "", "selectbox": "", "selectbox2": "new", "selectbox3": "all"}, "latest": True},
+    {"key": "free_regular", "label": "무료 일반", "path": "/free/getList",
+     "params": {"tab": "regular", "subtab": "", "selectbox": "", "selectbox2": "new", "selectbox3": "all"}, "latest": True},
+    {"key": "free_free", "label": "무료 자유", "path": "/free/getList",
+     "params": {"tab": "free", "subtab": "", "selectbox": "", "selectbox2": "new", "selectbox3": "all"}, "latest": True},
+    {"key": "free_finish", "label": "무료 완결", "path": "/free/getList",
+     "params": {"tab": "finish", "subtab": "", "selectbox": "", "selectbox2": "new", "selectbox3": "all"}, "latest": True},
+]
+
+PL_TABS = [
+    {"key": "pl_new", "label": "유료 신규베스트", "path": "/pl/getList",
+     "params": {"tab": "new", "subtab": "", "selectbox": "", "selectbox2": ""}},
+    {"key": "pl_serial", "label": "유료 최신", "path": "/pl/getList",
+     "params": {"tab": "serial", "subtab": "", "selectbox": "", "selectbox2": "new"}, "latest": True},
+    {"key": "pl_serial_end", "label": "유료 완결", "path": "/pl/getList",
+     "params": {"tab": "serial_end", "subtab": "", "selectbox": "", "selectbox2": "fin"}},
+]
+
+# 탭 키 -> 탭 정의 (체크포인트/실패 목록에는 키만 저장)
+TABS = {tab["key"]: tab for tab in FREE_TABS + PL_TABS}
+
+
+class Crawler:
+    """탭 정의를 받아 페이지를 윈도우 단위로 겹쳐서 가져오는 목록 크롤러"""
+
+    def __init__(self, session, novel_list, window=WINDOW_SIZE, base_url=BASE_URL, max_page=MAX_PAGE, rate=None,
+                 pipeline=None, merger=None, watermarks=None, incremental=False, page_cache=None, checkpoint=None,
+                 retry=None, breakers=None, dead_letter=None, metrics=None):
+        self.session = session
+        self.novel_list = novel_list
+        self.pipeline = pipeline  # 있으면 novel_list 대신 파이프라인으로 흘려보냄
+        self.merger = merger  # 있으면 탭 간 중복 소설은 처음 한 번만 내보냄
+        self.watermarks = watermarks  # 탭별 최신 updatedate 기록 (watermark.WatermarkStore)
+        self.incremental = incremental
+        self.page_cache = page_cache  # 있으면 지난 실행과 같은 페이지는 파싱하지 않음 (기록은 저장이 끝난 뒤 호출한 쪽에서)
+        self.checkpoint = checkpoint  # 있으면 처리한 페이지를 디스크에 기록 (checkpoint.Checkpoint)
+        self.progress = {}  # 탭 키 -> [처리한 페이지 수, 레코드 수]
+        self.extractor = NovelExtractor()
+        self.started = time.monotonic()
+        self.rate = rate if rate is not None else RateController()
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.breakers = breakers if breakers is not None else HostBreakers()  # 모든 탭이 공유
+        self.dead_letter = dead_letter  # 있으면 끝내 실패한 페이지를 기록 (retry.DeadLetterQueue)
+        self.metrics = metrics  # 있으면 탭별 요청/지연/오류 지표를 기록 (metrics.CrawlMetrics)
+        self.window = max(1, window)
+        self.base_url = base_url.rstrip("/")
+        self.max_page = max_page
+
+    def page_url(self, tab, page):
+        query = urlencode({"page": page, "rows": ROWS, **tab["params"]})
+        return f"{self.base_url}{tab['path']}?{query}"
+
+    async def fetch_page(self, tab, page):
+        """페이지 하나의 content.list를 반환. 지난 실행과 같으면 CachedPage, 재시도해도 실패하면 None"""
+        url = self.page_url(tab, page)
+        breaker = self.breakers.get(urlsplit(url).netloc)
+        request_headers = None
+        if self.page_cache is not None:
+            request_headers = self.page_cache.conditional_headers(tab["key"], page)
+        attempt = 0
+        while True:
+            await breaker.wait()
+            await self.rate.acquire()
+            status = None
+            started = time.monotonic()
+            try:
+                async with self.session.get(url, headers=request_headers) as response:
+                    status = response.status
+                    if status != 200 and self.metrics is not None:
+                        self.metrics.observe_response(tab["key"], status, time.monotonic() - started)
+                    if status == 429:  # HTTP 상태 코드 429 (Too Many Requests)는 속도 조절기가 늦춘 뒤 재시도
+                        breaker.record_throttle()
+                        wait_time = self.rate.on_throttle(parse_retry_after(response.headers.get("Retry-After")))
+                        if self.metrics is not None:
+                            self.metrics.observe_throttle(tab["key"], wait_time)
+                        logger.warning("%s %d페이지 HTTP 오류 429: 대기 후 재시도 (%.2f초 대기, %s)",
+                                       tab['label'], page, wait_time, self.rate.report())
+                        continue
+                    elif status == 304 and self.page_cache is not None:
+                        self.rate.on_success()
+                        breaker.record_success()
+                        cached = self.page_cache.lookup(tab["key"], page)
+                        if cached is not None:
+                            logger.debug("%s 순회 %d회 (변경 없음)", tab['label'], page)
+                            return self.fetched(tab, page, cached)
+                        request_headers = None  # 캐시가 없는데 304면 조건 없이 다시 요청
+                        continue
+                    elif status == 200:
+                        self.rate.on_success()
+                        body = await response.read()
+                        breaker.record_success()
+                        if self.metrics is not None:
+                            self.metrics.observe_response(tab["key"], status, time.monotonic() - started, len(body))
+                        logger.debug("%s 순회 %d회", tab['label'], page)
+                        if self.page_cache is None:
+                            return self.fetched(tab, page, json_codec.loads(body)['content']['list'])
+                        digest = page_digest(body)
+                        cached = self.page_cache.lookup(tab["key"], page, digest)
+                        if cached is not None:
+                            return self.fetched(tab, page, cached)
+                        return self.fetched(tab, page, PageList(
+                            json_codec.loads(body)['content']['list'], digest,
+                            response.headers.get("ETag"), response.headers.get("Last-Modified")))
+                    error = f"HTTP {status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = repr(e)
+                status = None  # 본문을 받다가 끊긴 경우도 네트워크 오류로 재시도
+                if self.metrics is not None:
+                    self.metrics.observe_network_error(tab["key"], time.monotonic() - started)
+
+            attempt += 1
+            retryable = self.retry.is_retryable(status)
+            if retryable:
+                breaker.record_failure()
+            else:
+                breaker.record_success()  # 404 등: 호스트는 응답했으므로 회로에는 성공 (반열림으로 남지 않게)
+            if not retryable or attempt >= self.retry.max_attempts:
+                logger.warning("%s 가져오기 실패 (%s, %d회 시도)", url, error, attempt)
+                if self.dead_letter is not None:
+                    self.dead_letter.add(tab, page, url, error, attempt)
+                return None  # 오류가 발생한 페이지는 스킵
+            logger.info("%s 가져오기 실패 (%s), 재시도 %d/%d", url, error, attempt, self.retry.max_attempts - 1)
+            await self.retry.backoff(attempt)
+
+    def fetched(self, tab, page, page_list):
+        if self.dead_letter is not None:
+            self.dead_letter.discard(tab["key"], page)
+        return page_list
+
+    def parse_page(self, tab, page_list):
+        return self.parse_pages(tab, [page_list])[0]
+
+    def parse_pages(self, tab, page_lists):
+        """같은 탭의 페이지 여러 개를 한 번에 파싱 (날짜는 한 배치로 변환). 페이지별 레코드 목록을 반환"""
+        malformed = self.extractor.malformed
+        parsed = self.extractor.parse_pages(page_lists)
+        if self.extractor.malformed > malformed:
+            logger.warning("%s 잘못된 항목 %s개 건너뜀", tab['label'], self.extractor.malformed - malformed)
+        if logger.isEnabledFor(logging.DEBUG):
+            for records in parsed:
+                for novel in records:
+                    logger.debug("%s", novel)
+        return parsed
+
+    async def emit_unchanged(self, tab, cached):
+        """캐시와 같은 페이지: 레코드는 만들지 않고 소속 정보와 변경 없음만 알림"""
+        if self.merger is not None:
+            for n_id in cached.ids:
+                self.merger.add_id(n_id, tab["key"])
+        if self.pipeline is not None:
+            self.pipeline.mark_unchanged(len(cached.ids))
+
+    async def emit(self, tab, records):
+        if self.merger is not None:
+            records = [novel for novel in records if self.merger.add(novel, tab["key"])]
+            if not records:
+                return
+        if self.pipeline is not None:
+            await self.pipeline.put(records)
+        else:
+            self.novel_list.extend(records)
+
+    async def probe_page(self, tab, page, probed):
+        """페이지에 목록이 있으면 True, 비어 있으면 False, 오류면 None. 가져온 목록은 probed에 보관"""
+        page_list = await self.fetch_page(tab, page)
+        if page_list is None:
+            return None
+        if page_list:
+            probed[page] = page_list
+        return bool(page_list)
+
+    async def find_last_page(self, tab, probed, first_page=1):
+        """지수 탐색 후 이진 탐색으로 탭의 마지막 페이지를 찾음 (약 2*log2(N)회 요청). 실패하면 None
+
+        체크포인트에서 재개하면 first_page부터 탐색해서 이미 처리한 앞 페이지는 다시 요청하지 않는다.
+        """
+        found = await self.probe_page(tab, first_page, probed)
+        if found is None:
+            return None
+        if not found:
+            return first_page - 1
+
+        # lo는 목록이 있는 페이지, hi는 빈 페이지(또는 범위 밖)
+        lo, hi = first_page, first_page * 2
+        while hi < self.max_page:
+            found = await self.probe_page(tab, hi, probed)
+            if found is None:
+                return None
+            if not found:
+                break
+            lo, hi = hi, hi * 2
+        hi = min(hi, self.max_page)
+
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            found = await self.probe_page(tab, mid, probed)
+            if found is None:
+                return None
+            if found:
+                lo = mid
+            else:
+                hi = mid
+        return lo
+
+    async def fetch_or_probed(self, tab, page, probed):
+        if page in probed:
+            return probed.pop(page)
+        return await self.fetch_page(tab, page)
+
+    async def discover_horizon(self, tab, probed, first_page=1):
+        """마지막 페이지를 찾아 순회할 범위를 정함. 찾지 못하면 빈 페이지가 나올 때까지"""
+        last_page = await self.find_last_page(tab, probed, first_page)
+        if last_page is None:
+            logger.warning("%s 마지막 페이지 탐색 실패, 빈 페이지가 나올 때까지 순회", tab['label'])
+            return self.max_page - 1
+        logger.info("%s 마지막 페이지 %s", tab['label'], last_page)
+        # 순회 중에 소설이 추가될 수 있으므로 마지막 다음 페이지 하나는 확인
+        return min(last_page + 1, self.max_page - 1)
+
+    async def crawl_tab(self, tab):
+        """마지막 페이지를 먼저 찾고 그 범위를 윈도우 크기만큼 동시에 요청. 결과는 페이지 순서대로 처리"""
+        probed = {}  # 탐색 중 이미 가져온 페이지는 다시 요청하지 않음
+        first_page = 1
+        if self.checkpoint is not None:
+            first_page = self.checkpoint.start_page(tab["key"])
+            if first_page is None:
+                logger.info("%s 지난 실행에서 완료, 건너뜀", tab['label'])
+                return 0
+            if first_page > 1:
+                logger.info("%s %s페이지부터 이어서 순회", tab['label'], first_page)
+        cutoff = None
+        if self.incremental and tab.get("latest") and self.watermarks is not None:
+            cutoff = self.watermarks.cutoff(tab["key"])
+
+        if cutoff is not None:
+            # 증분 모드: 최신순 탭은 워터마크를 지날 때까지만 앞에서부터 순회
+            logger.info("%s 증분 순회 (%s 이전 페이지에서 종료)", tab['label'], cutoff)
+            horizon = self.max_page - 1
+        else:
+            horizon = await self.discover_horizon(tab, probed, first_page)
+
+        last = await self.crawl_pages(tab, first_page, max(horizon, first_page), probed=probed, cutoff=cutoff)
+        if self.checkpoint is not None:
+            self.checkpoint.finish_tab(tab["key"])
+        logger.info("%s 최대 페이지 도달 (%s페이지, %s)", tab['label'], last, self.rate.report())
+        return last
+
+    async def crawl_pages(self, tab, first_page, horizon, probed=None, cutoff=None, extend=True):
+        """first_page부터 horizon까지 윈도우 크기만큼 동시에 요청하고 페이지 순서대로 처리. 마지막으로 처리한 페이지를 반환
+
+        extend가 True면 horizon 페이지에도 목록이 있을 때 범위를 늘려서 계속 순회한다.
+        """
+        probed = probed if probed is not None else {}
+        pending = {}  # task -> page
+        results = {}  # page -> content.list (오류면 None)
+        next_page = first_page
+        emit_page = first_page
+        stop_page = self.max_page  # 빈 페이지가 확인되거나 오류가 이어지면 줄어듬
+        errors = 0
+
+        def cancel_from(page):
+            for other, other_page in list(pending.items()):
+                if other_page >= page:
+                    other.cancel()
+                    del pending[other]
+
+        try:
+            while True:
+                while len(pending) < self.window and next_page < stop_page and next_page <= horizon:
+                    task = asyncio.ensure_future(self.fetch_or_probed(tab, next_page, probed))
+                    pending[task] = next_page
+                    next_page += 1
+                if not pending:
+                    break
+
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task not in pending:
+                        continue
+                    page = pending.pop(task)
+                    page_list = task.result()
+                    results[page] = page_list
+                    if page_list is not None and not page_list and page < stop_page:
+                        # 빈 페이지 이후는 요청할 필요가 없으므로 취소
+                        stop_page = page
+                        cancel_from(stop_page)
+                    elif extend and page_list and page == horizon:
+                        # 탐색 이후 페이지가 늘어났으면 조금 더 순회
+                        horizon = min(horizon + self.window, self.max_page - 1)
+
+                # 앞 페이지부터 순서대로 처리. 더 가져올 페이지가 남아 있으면 PARSE_PAGES만큼 모일 때까지 기다림
+                ready = []
+                while emit_page + len(ready) < stop_page and emit_page + len(ready) in results:
+                    ready.append(emit_page + len(ready))
+                finished = not pending and (next_page >= stop_page or next_page > horizon)
+                if not ready or (cutoff is None and not finished and len(ready) < PARSE_PAGES):
+                    continue
+                to_parse = [page for page in ready if results[page] and not isinstance(results[page], CachedPage)]
+                parsed = dict(zip(to_parse, self.parse_pages(tab, [results[page] for page in to_parse])))
+                for page in ready:
+                    page_list = results.pop(page)
+                    emit_page = page + 1
+                    if page_list is None:
+                        errors += 1
+                        if self.checkpoint is not None:
+                            self.checkpoint.add_page(tab["key"], page)
+                        if errors >= MAX_CONSECUTIVE_ERRORS:
+                            logger.error("%s 연속 %s회 오류로 순회 중단 (%s페이지)", tab['label'], errors, page)
+                            stop_page = emit_page
+                            cancel_from(stop_page)
+                            break
+                        continue
+                    errors = 0
+                    newest = await self.process_page(tab, page, page_list, parsed.get(page))
+                    if cutoff is not None and newest is not None and newest < cutoff:
+                        logger.info("%s 워터마크 통과, 순회 종료 (%s페이지)", tab['label'], page)
+                        stop_page = emit_page
+                        cancel_from(stop_page)
+                        break
+        finally:
+            for task in pending:
+                task.cancel()
+
+        return emit_page - 1
+
+    async def process_page(self, tab, page, page_list, records=None):
+        """가져온 페이지 하나를 파싱해서 내보냄. 페이지 안의 최신 updatedate를 반환
+
+        records는 parse_pages로 미리 파싱한 이 페이지의 레코드 (없으면 여기서 파싱).
+        """
+        progress = self.progress.setdefault(tab["key"], [0, 0])
+        progress[0] += 1
+        if isinstance(page_list, CachedPage):
+            if self.metrics is not None:
+                self.metrics.observe_page(tab["key"], 0)
+            await self.emit_unchanged(tab, page_list)
+            if self.checkpoint is not None:
+                self.checkpoint.add_page(tab["key"], page, cached=page_list)
+            return watermark_value(page_list.newest)
+        if not page_list:
+            if self.checkpoint is not None:
+                self.checkpoint.add_page(tab["key"], page)
+            return None
+        if records is None:
+            records = self.parse_page(tab, page_list)
+        progress[1] += len(records)
+        if self.metrics is not None:
+            self.metrics.observe_page(tab["key"], len(records))
+        newest = self.watermarks.observe(tab["key"], records) if self.watermarks is not None else None
+        await self.emit(tab, records)
+        if self.page_cache is not None:
+            self.page_cache.put(tab["key"], page, page_list, records)
+        if self.checkpoint is not None:
+            self.checkpoint.add_page(tab["key"], page, page_list)
+        return newest
+
+    async def restore(self):
+        """--resume: 지난 실행에서 처리한 페이지를 스필 파일에서 다시 내보냄 (네트워크 요청 없음)"""
+        if self.checkpoint is None:
+            return 0
+        pages = 0
+        batch = []  # 같은 탭의 연속된 기록 (원본 목록은 한 번에 파싱)
+        for entry in self.checkpoint.iter_spill():
+            if batch and (entry["tab"] != batch[0]["tab"] or len(batch) >= PARSE_PAGES):
+                await self.restore_pages(batch)
+                batch = []
+            batch.append(entry)
+            pages += 1
+        if batch:
+            await self.restore_pages(batch)
+        if pages:
+            logger.info("체크포인트에서 %s페이지 복원", pages)
+        return pages
+
+    async def restore_pages(self, entries):
+        tab = TABS[entries[0]["tab"]]
+        parsed = iter(self.parse_pages(tab, [entry["list"] for entry in entries if "ids" not in entry]))
+        for entry in entries:
+            if "ids" in entry:
+                await self.emit_unchanged(tab, CachedPage(entry["ids"], entry["newest"]))
+                continue
+            records = next(parsed)
+            if self.watermarks is not None:
+                self.watermarks.observe(tab["key"], records)
+            await self.emit(tab, records)
+
+    async def redrive(self):
+        """--redrive: 실패 목록에 있는 페이지만 다시 가져와서 내보냄. 성공한 페이지 수를 반환"""
+        entries = list(self.dead_letter)
+        logger.info("실패한 페이지 %s개 다시 가져오기", len(entries))
+        semaphore = asyncio.Semaphore(self.window)
+
+        async def fetch(entry):
+            async with semaphore:
+                return await self.fetch_page(TABS[entry["tab"]], entry["page"])
+
+        results = await asyncio.gather(*(fetch(entry) for entry in entries))
+        recovered = 0
+        for entry, page_list in zip(entries, results):
+            if page_list is None:
+                continue
+            recovered += 1
+            await self.process_page(TABS[entry["tab"]], entry["page"], page_list)
+        logger.info("%s/%s페이지 복구, 남은 실패 %s페이지", recovered, len(entries), len(self.dead_letter))
+        return recovered
+
+    def progress_report(self):
+        """주기적으로 찍을 전체 진행 상황 한 줄"""
+        pages = sum(p for p, _ in self.progress.values())
+        records = sum(r for _, r in self.progress.values())
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        tabs = ", ".join(f"{key} {p}p" for key, (p, _) in self.progress.items())
+        return (f"진행: 페이지 {pages} ({pages / elapsed:.1f}p/s), 레코드 {records}, "
+                f"{self.rate.report()} | {tabs}")
+
+    async def crawl_tabs(self, tabs):
+        return await asyncio.gather(*(self.crawl_tab(tab) for tab in tabs))
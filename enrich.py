@@ -0,0 +1,279 @@
+"""소설 상세 페이지(novel.munpia.com/{nvSrl}) 보강 수집
+
+목록 API에 없는 정보(상세 소개, 키워드, 대표 이미지 등)를 상세 페이지의 meta 태그에서 가져온다.
+(nvSrl, updatedate)가 캐시와 같고 TTL이 지나지 않은 소설은 다시 요청하지 않는다.
+가져온 필드는 munpia_novel.db의 detail 테이블(--pg면 PG munpia_detail에도)에 nvSrl 기준으로 기록한다.
+
+    python enrich.py                 # 스냅샷에서 새로 생겼거나 바뀐 소설만
+    python enrich.py --backfill      # 전체 카탈로그를 낮은 속도로 채움 (중단해도 이어서 진행)
+"""
+import argparse
+import asyncio
+import logging
+import sqlite3
+import time
+from html.parser import HTMLParser
+import aiohttp
+import json_codec
+from client import create_session
+from logger import setup_logging
+from rate_limit import RateController, parse_retry_after
+import event_loop
+from store import load_snapshot
+
+DETAIL_URL = "https://novel.munpia.com"
+CACHE_PATH = "enrich_cache.db"
+DB_PATH = "munpia_novel.db"
+# 상세 페이지 동시 요청 수 (목록 크롤러와 별도)
+CONCURRENCY = 8
+# updatedate가 그대로여도 이 시간이 지나면 다시 가져옴(초)
+CACHE_TTL = 7 * 24 * 3600
+# 이만큼 가져올 때마다 캐시에 기록
+COMMIT_SIZE = 200
+# 백필은 목록 크롤러를 방해하지 않도록 낮은 속도로
+BACKFILL_CONCURRENCY = 2
+BACKFILL_RATE = 1.0
+
+logger = logging.getLogger("enrich")
+
+
+def create_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS detail (
+            id INTEGER PRIMARY KEY,
+            title TEXT,
+            description TEXT,
+            image TEXT,
+            keywords TEXT,
+            author TEXT,
+            fetched_at DATETIME
+        )
+    """)
+
+
+class MetaParser(HTMLParser):
+    """<head>의 meta 태그(og:*, description, keywords)와 <title>만 모으고 </head>에서 멈춤"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta = {}
+        self.title = None
+        self.in_title = False
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "meta":
+            attrs = dict(attrs)
+            key = attrs.get("property") or attrs.get("name")
+            if key and attrs.get("content") is not None and key not in self.meta:
+                self.meta[key] = attrs["content"].strip()
+        elif tag == "title":
+            self.in_title = True
+
+    def handle_data(self, data):
+        if self.in_title and not self.done:
+            self.title = (self.title or "") + data
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self.in_title = False
+        elif tag == "head":
+            self.done = True
+
+
+def parse_detail(html):
+    """상세 페이지 HTML에서 보강할 필드만 dict로"""
+    parser = MetaParser()
+    head_end = html.find("</head>")
+    parser.feed(html if head_end < 0 else html[:head_end + len("</head>")])
+    meta = parser.meta
+    keywords = meta.get("keywords") or meta.get("news_keywords") or ""
+    return {
+        "title": meta.get("og:title") or (parser.title or "").strip() or None,
+        "description": meta.get("og:description") or meta.get("description"),
+        "image": meta.get("og:image"),
+        "keywords": [k.strip() for k in keywords.split(",") if k.strip()],
+        "author": meta.get("author") or meta.get("og:author"),
+    }
+
+
+class DetailCache:
+    """nvSrl별 상세 정보와, 그 정보를 가져왔을 때의 updatedate/시각을 저장
+
+    캐시(enrich_cache.db)는 다시 가져올지 판단하는 용도이고, 가져온 필드는 db_path의 detail 테이블에도 기록한다.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL, db_path=DB_PATH):
+        self.conn = sqlite3.connect(path)
+        self.db = sqlite3.connect(db_path)
+        create_table(self.db.cursor())
+        self.ttl = ttl
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS novel_detail (
+                id INTEGER PRIMARY KEY,
+                updatedate TEXT,
+                fetched_at REAL,
+                status INTEGER,
+                title TEXT,
+                description TEXT,
+                image TEXT,
+                keywords TEXT,
+                author TEXT
+            )
+        """)
+        self.entries = {n_id: (updatedate, fetched_at) for n_id, updatedate, fetched_at in
+                        self.conn.execute("SELECT id, updatedate, fetched_at FROM novel_detail")}
+        self.pending = []
+        self.details = []  # detail 테이블에 아직 기록하지 않은 행
+        self.changed = []  # 이번 실행에서 바뀐 detail 행 (PG 반영용)
+
+    def is_fresh(self, n_id, updatedate, now=None):
+        entry = self.entries.get(n_id)
+        if entry is None:
+            return False
+        cached_update, fetched_at = entry
+        now = now or time.time()
+        return cached_update == updatedate and now - fetched_at < self.ttl
+
+    def put(self, n_id, updatedate, status, detail=None):
+        detail = detail or {}
+        now = time.time()
+        self.entries[n_id] = (updatedate, now)
+        self.pending.append((n_id, updatedate, now, status, detail.get("title"), detail.get("description"),
+                             detail.get("image"), json_codec.dumps(detail.get("keywords", [])).decode(),
+                             detail.get("author")))
+        if status == 200:
+            row = (n_id, detail.get("title"), detail.get("description"), detail.get("image"),
+                   json_codec.dumps(detail.get("keywords", [])).decode(), detail.get("author"),
+                   time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now)))
+            self.details.append(row)
+            self.changed.append(row)
+        if len(self.pending) >= COMMIT_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        # 상세 필드를 먼저 기록해야 캐시만 남고 detail 행이 빠지는 일이 없음
+        if self.details:
+            self.db.executemany("""
+                INSERT OR REPLACE INTO detail (id, title, description, image, keywords, author, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, self.details)
+            self.db.commit()
+            self.details = []
+        self.conn.executemany("""
+            INSERT OR REPLACE INTO novel_detail
+            (id, updatedate, fetched_at, status, title, description, image, keywords, author)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, self.pending)
+        self.conn.commit()
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+        self.db.close()
+
+
+async def fetch_detail(session, rate, n_id, base_url=DETAIL_URL):
+    """(HTTP 상태, 보강 필드 dict) 반환. 네트워크 오류면 (None, None)"""
+    url = f"{base_url.rstrip('/')}/{n_id}"
+    try:
+        while True:
+            await rate.acquire()
+            async with session.get(url) as response:
+                if response.status == 429:
+                    rate.on_throttle(parse_retry_after(response.headers.get("Retry-After")))
+                    continue
+                rate.on_success()
+                if response.status != 200:
+                    return response.status, None
+                html = await response.text(errors="replace")
+                return 200, parse_detail(html)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.warning("%s 상세 정보를 가져오는 중 오류 발생: %r", url, e)
+        return None, None
+
+
+async def enrich_novels(novels, cache, concurrency=CONCURRENCY, rate=None, base_url=DETAIL_URL):
+    """novel_to_dict 형식의 레코드 중 캐시에 없거나 바뀐 소설만 상세 정보를 가져옴. 가져온(200) 개수를 반환"""
+    targets = [(novel["id"], novel["updatedate"]) for novel in novels
+               if not cache.is_fresh(novel["id"], novel["updatedate"])]
+    logger.info("상세 정보 대상 %s건 (전체 %s건 중 캐시 적중 %s건)", len(targets), len(novels), len(novels) - len(targets))
+    if not targets:
+        return 0
+
+    rate = rate if rate is not None else RateController()
+    semaphore = asyncio.Semaphore(concurrency)
+    fetched = failed = 0
+
+    async def enrich(n_id, updatedate):
+        nonlocal fetched, failed
+        async with semaphore:
+            status, detail = await fetch_detail(session, rate, n_id, base_url)
+        if status is None:
+            failed += 1
+            return  # 네트워크 오류는 캐시하지 않고 다음 실행에서 재시도
+        cache.put(n_id, updatedate, status, detail)
+        if status == 200:
+            fetched += 1
+        else:
+            # 상태는 캐시에 남겨서 TTL 동안 다시 요청하지 않음 (상세 필드는 저장하지 않음)
+            logger.debug("%s 상세 페이지 HTTP 오류: %d", n_id, status)
+            failed += 1
+        if (fetched + failed) % 1000 == 0:
+            logger.info("상세 정보 %s/%s건 (실패 %s건)", fetched + failed, len(targets), failed)
+
+    async with create_session(limit_per_host=concurrency) as session:
+        # 대상이 많아도 태스크가 한꺼번에 쌓이지 않도록 나눠서 진행
+        for start in range(0, len(targets), COMMIT_SIZE):
+            await asyncio.gather(*(enrich(n_id, updatedate) for n_id, updatedate in targets[start:start + COMMIT_SIZE]))
+            cache.flush()
+    logger.info("상세 정보 %s건 저장, 실패 %s건 (%s)", fetched, failed, rate.report())
+    return fetched
+
+
+def enrich_snapshot(path="Munpia_novel_info.json", cache_path=CACHE_PATH, ttl=CACHE_TTL, concurrency=CONCURRENCY,
+                    rate=None, max_rate=None, base_url=DETAIL_URL, db_path=DB_PATH, pg=False):
+    """스냅샷 JSON의 소설을 보강 (크롤링이 끝난 뒤 main.py --enrich에서 호출). max_rate로 속도 상한을 둠
+
+    pg면 이번에 바뀐 detail 행을 PG에도 반영한다.
+    """
+    novels = load_snapshot(path)
+    cache = DetailCache(cache_path, ttl, db_path)
+    controller = None
+    if rate or max_rate:
+        controller = RateController(rate or max_rate)
+        if max_rate:
+            controller.max_rate = max_rate
+    try:
+        fetched = event_loop.run(enrich_novels(novels, cache, concurrency, controller, base_url))
+    finally:
+        cache.close()
+    if pg and cache.changed:
+        from DB_connect import store_detail_pg
+        store_detail_pg(cache.changed)
+    return fetched
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="문피아 소설 상세 정보 보강")
+    parser.add_argument("--snapshot", default="Munpia_novel_info.json", help="대상 소설 목록 (크롤러 스냅샷)")
+    parser.add_argument("--cache", default=CACHE_PATH, help="상세 정보 캐시 SQLite 파일")
+    parser.add_argument("--db", default=DB_PATH, help="상세 정보(detail 테이블)를 기록할 SQLite 파일")
+    parser.add_argument("--pg", action="store_true", help="상세 정보를 PG munpia_detail 테이블에도 반영")
+    parser.add_argument("--ttl-hours", type=float, default=CACHE_TTL / 3600, help="캐시 유지 시간(시간)")
+    parser.add_argument("--concurrency", type=int, default=None, help="동시 요청 수")
+    parser.add_argument("--rate", type=float, default=None, help="초당 요청 수 상한")
+    parser.add_argument("--backfill", action="store_true", help="백그라운드용 낮은 동시성/속도로 전체 카탈로그 보강")
+    parser.add_argument("--base-url", default=DETAIL_URL, help="상세 페이지 주소")
+    args = parser.parse_args()
+    setup_logging()
+
+    concurrency = args.concurrency or (BACKFILL_CONCURRENCY if args.backfill else CONCURRENCY)
+    max_rate = args.rate or (BACKFILL_RATE if args.backfill else None)
+    enrich_snapshot(args.snapshot, args.cache, args.ttl_hours * 3600, concurrency, max_rate=max_rate,
+                    base_url=args.base_url, db_path=args.db, pg=args.pg)
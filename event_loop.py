@@ -0,0 +1,52 @@
+import asyncio
+import logging
+import sys
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# --loop 선택지. auto는 uvloop이 있으면 uvloop, 없으면(Windows 등) 기본 asyncio 루프
+LOOP_CHOICES = ("auto", "uvloop", "asyncio")
+
+logger = logging.getLogger("event_loop")
+
+
+def available_loops():
+    """이 환경에서 쓸 수 있는 루프 구현 이름 목록"""
+    return ["asyncio", "uvloop"] if uvloop is not None and sys.platform != "win32" else ["asyncio"]
+
+
+def resolve(kind="auto"):
+    if kind == "auto":
+        return "uvloop" if "uvloop" in available_loops() else "asyncio"
+    if kind not in available_loops():
+        logger.warning("%s 루프를 쓸 수 없어 기본 asyncio 루프를 사용합니다.", kind)
+        return "asyncio"
+    return kind
+
+
+def new_event_loop(kind="auto"):
+    if resolve(kind) == "uvloop":
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
+
+
+def run(main, kind="auto"):
+    """asyncio.run과 같지만 루프 구현을 고를 수 있음"""
+    loop = new_event_loop(kind)
+    logger.debug("이벤트 루프: %s", type(loop).__module__)
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(main)
+    finally:
+        try:
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
@@ -1,4 +1,16 @@
+import logging
+from array import array
+from datetime import datetime, timedelta
+
+logger = logging.getLogger("info")
+
+
 class NovelInfo:
+    # 전체 크롤링 동안 레코드 수만 개가 살아 있으므로 인스턴스마다 __dict__를 두지 않음
+    __slots__ = ("platform", "id", "title", "info", "author", "href", "thumbnail", "tag", "the_number_of_serials",
+                 "chapter", "view", "newstatus", "finishstatus", "agegrade", "registdate", "updatedate", "sort_option",
+                 "tabs", "sort_options")
+
     def __init__(self, platform, id, title, info, author, href, thumbnail, tag, the_number_of_serials, chapter, view, newstatus, finishstatus, agegrade, registdate, updatedate, sort_option):
         self.platform = platform
         self.id = id
@@ -17,7 +29,9 @@ class NovelInfo:
         self.registdate = registdate
         self.updatedate = updatedate
         self.sort_option = sort_option
-
+        # 탭 간 병합 시 채워짐 (merge.NovelMerger)
+        self.tabs = []
+        self.sort_options = [sort_option]
 
     def __str__(self):
         return f"platform: {self.platform}, " \
@@ -41,44 +55,123 @@ class NovelInfo:
 
 
     def to_dict(self):
-        return {
-            "platform": self.platform,
-            "id": self.info,
-            "title": self.title,
-            "info": self.info,
-            "author": self.author,
-            "href": self.href,
-            "thumbnail": self.thumbnail,
-            "tag": self.tag,
-            "the_number_of_serials": self.the_number_of_serials,
-            "chapter": self.chapter,
-            "view": self.view,
-            "newstatus": self.newstatus,
-            "finishstatus": self.finishstatus,
-            "agegrade": self.agegrade,
-            "registdate": self.registdate,
-            "updatedate": self.updatedate,
-            "sort_option": self.sort_option
-        }
+        """모든 속성을 dict로 (스냅샷 레코드 형식은 store.novel_to_dict)"""
+        from schema import encode_attrs
+        return encode_attrs(self)
 
 def set_novel_info(platform, id, title, info, author, href, thumbnail, tag, the_number_of_serials, chapter, view, newstatus, finishstatus, agegrade, registdate, updatedate, sort_option):
-    print("-" * 100)
-    print(f"platform: {platform}")
-    print(f"id: {id}")
-    print(f"title: {title}")
-    print(f"info: {info}")
-    print(f"author: {author}")
-    print(f"href: {href}")
-    print(f"thumbnail: {thumbnail}")
-    print(f"tag: {tag}")
-    print(f"the_number_of_serials: {the_number_of_serials}")
-    print(f"chapter: {chapter}")
-    print(f"view: {view}")
-    print(f"newstatus: {newstatus}")
-    print(f"finishstatus: {finishstatus}")
-    print(f"agegrade: {agegrade}")
-    print(f"registdate: {registdate}")
-    print(f"updatedate: {updatedate}")
-    print(f"sort_option: {sort_option}")
-    print("-" * 100)
-    return NovelInfo(platform, id, title, info, author, href, thumbnail, tag, the_number_of_serials, chapter, view, newstatus, finishstatus, agegrade, registdate, updatedate, sort_option)
\ No newline at end of file
+    novel = NovelInfo(platform, id, title, info, author, href, thumbnail, tag, the_number_of_serials, chapter, view, newstatus, finishstatus, agegrade, registdate, updatedate, sort_option)
+    # 레코드별 상세는 DEBUG에서만 (전체 크롤링 시 출력 비용이 큼)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s", novel)
+    return novel
+
+
+# NovelBatch 열 종류. 여기 없는 필드(문자열, tabs/sort_options 등)는 list에 그대로 둠
+COLUMN_KINDS = {
+    "id": "int",
+    "the_number_of_serials": "int",
+    "chapter": "int",
+    "view": "int",
+    "newstatus": "bool",
+    "finishstatus": "bool",
+    "agegrade": "bool",
+    "registdate": "date",
+    "updatedate": "date",
+}
+# 날짜 열은 1970-01-01 00:00:00(시간대 없음)부터의 초, None은 이 값으로 저장
+NO_DATE = -2 ** 63
+DATE_EPOCH = datetime(1970, 1, 1)
+
+
+def encode_column_value(kind, value):
+    """열 배열에 넣을 값. 배열에 맞지 않는 값이면 TypeError (그 열은 list로 바뀜)"""
+    if kind == "int":
+        if value.__class__ is not int:
+            raise TypeError(value)
+        return value
+    if kind == "bool":
+        if value.__class__ is not bool:
+            raise TypeError(value)
+        return value
+    if value is None:
+        return NO_DATE
+    if value.__class__ is not datetime or value.tzinfo is not None or value.microsecond:
+        raise TypeError(value)
+    delta = value - DATE_EPOCH
+    return delta.days * 86400 + delta.seconds
+
+
+def decode_column_value(kind, value):
+    if kind == "int":
+        return value
+    if kind == "bool":
+        return bool(value)
+    return None if value == NO_DATE else DATE_EPOCH + timedelta(seconds=value)
+
+
+def new_column(kind):
+    if kind == "int" or kind == "date":
+        return array("q")
+    if kind == "bool":
+        return bytearray()
+    return []
+
+
+class NovelBatch:
+    """NovelInfo 여러 개를 필드별 병렬 배열로 들고 있는 열 단위 컨테이너
+
+    정수/날짜는 array('q'), 불리언은 bytearray, 문자열 등은 list에 저장해서 레코드마다 객체를 만들지 않는다.
+    list처럼 append/extend/len/반복을 지원하고, 꺼낼 때는 NovelInfo로 만들어 준다.
+    배열에 맞지 않는 값(정수 자리의 None 등)이 들어오면 그 열만 list로 바꿔서 값은 그대로 보존한다.
+    """
+
+    def __init__(self, records=()):
+        self.names = NovelInfo.__slots__
+        self.kinds = [COLUMN_KINDS.get(name, "object") for name in self.names]
+        self.columns = [new_column(kind) for kind in self.kinds]
+        self.extend(records)
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def append(self, record):
+        for index, name in enumerate(self.names):
+            value = getattr(record, name)
+            column = self.columns[index]
+            kind = self.kinds[index]
+            if kind != "object":
+                try:
+                    value = encode_column_value(kind, value)
+                    column.append(value)
+                    continue
+                except (TypeError, OverflowError):
+                    column = self.columns[index] = self.column(name)
+                    self.kinds[index] = "object"
+            column.append(value)
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def column(self, name):
+        """열 하나를 값 list로 (정수 열을 배열 그대로 쓰려면 columns를 직접 사용)"""
+        index = self.names.index(name)
+        kind = self.kinds[index]
+        if kind == "object":
+            return list(self.columns[index])
+        return [decode_column_value(kind, value) for value in self.columns[index]]
+
+    def __getitem__(self, i):
+        record = NovelInfo.__new__(NovelInfo)
+        for name, kind, column in zip(self.names, self.kinds, self.columns):
+            value = column[i]
+            setattr(record, name, value if kind == "object" else decode_column_value(kind, value))
+        return record
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def to_records(self):
+        return list(self)
@@ -0,0 +1,47 @@
+import json
+from datetime import datetime
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 사용 중인 JSON 구현 ("orjson" 또는 "json")
+BACKEND = "orjson" if orjson is not None else "json"
+# default를 주지 않았을 때 datetime을 쓰는 형식 (스냅샷 파일 형식)
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def encode_datetime(obj):
+    if isinstance(obj, datetime):
+        return obj.strftime(DATE_FORMAT)
+    raise TypeError(f"Type {type(obj)} not supported.")
+
+
+def loads(data):
+    """bytes/str을 바로 디코딩 (응답 본문을 str로 바꾸지 않아도 됨)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, indent=False, default=None):
+    """UTF-8 bytes로 인코딩. 한글은 그대로 두고 datetime은 default로 넘김 (없으면 DATE_FORMAT 문자열)"""
+    if default is None:
+        default = encode_datetime
+    if orjson is not None:
+        option = orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option)
+    return json.dumps(obj, ensure_ascii=False, indent=4 if indent else None, default=default).encode("utf-8")
+
+
+def load_file(path):
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def dump_file(obj, path, indent=False, default=None):
+    with open(path, "wb") as f:
+        f.write(dumps(obj, indent=indent, default=default))
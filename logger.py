@@ -0,0 +1,61 @@
+import asyncio
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+# LogRecord 기본 속성. 이 외의 속성(extra=...)은 JSON 출력에 필드로 붙임
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """로그 수집기로 보내기 위한 한 줄짜리 JSON 포맷"""
+
+    def format(self, record):
+        data = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                data[key] = value
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def setup_logging(level="INFO", json_output=False, stream=None):
+    """루트 로거를 큐 핸들러로 설정. 실제 출력은 별도 스레드(QueueListener)에서 처리해서 크롤러를 막지 않음"""
+    global _listener
+    if _listener is not None:
+        atexit.unregister(_listener.stop)
+        _listener.stop()
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter() if json_output else logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+async def report_progress(message, interval=10.0, logger_name="progress"):
+    """interval초마다 message()가 돌려주는 집계 진행 상황을 INFO로 한 줄씩 출력 (취소될 때까지)"""
+    log = logging.getLogger(logger_name)
+    while True:
+        await asyncio.sleep(interval)
+        log.info(message())
@@ -1,496 +1,257 @@
 import asyncio
-import pprint
-import aiohttp
-import random
+import argparse
+import logging
 from DB_processing import store_db
 from DB_connect import store_db_munpia_pg_copy
-from info import set_novel_info
-from store import store_info
+from client import create_session, ConnectionStats, CLIENT_CONFIG
+from crawler import Crawler, FREE_TABS, PL_TABS, WINDOW_SIZE, BASE_URL
+from rate_limit import RateController, INITIAL_RATE
+from store import novel_to_dict, store_info, merge_into_snapshot, merge_rows_into_snapshot, iter_snapshot, delta_path, SNAPSHOT_PATH
+import snapshot
+import columnar
+from merge import NovelMerger
+from info import NovelBatch
+from page_cache import PageCache
+from logger import setup_logging, report_progress
+from watermark import WatermarkStore, SAFETY_MARGIN, FULL_SWEEP_INTERVAL
+from pipeline import StreamPipeline, JsonSink, SqliteSink, PgCopySink, BATCH_SIZE as PIPELINE_BATCH_SIZE
+import shard
+from checkpoint import Checkpoint, CHECKPOINT_INTERVAL
+import enrich
+import thumbnail
+import event_loop
+import metrics
+from retry import DeadLetterQueue, RetryPolicy, MAX_ATTEMPTS
 import time
 import datetime
 
-headers = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36",
-    "X-Requested-With": "XMLHttpRequest"
-}
-
-# nvTimeUpdate 변환을 위한 상수
-NVTIME_CONSTANT = 9999990400
-
-def convert_timestamps(nvTimeReg, nvTimeUpdate):
-    """nvTimeReg와 nvTimeUpdate를 실제 날짜시간으로 변환"""
-    registdate = None
-    updatedate = None
-    
-    if nvTimeReg and nvTimeReg != 0:
+logger = logging.getLogger("main")
+
+
+def snapshot_path(args):
+    """--snapshot-format/--snapshot-compression에 맞는 스냅샷 경로"""
+    if args.snapshot_format == "jsonl":
+        return snapshot.jsonl_path(SNAPSHOT_PATH.rsplit(".", 1)[0], args.snapshot_compression)
+    return SNAPSHOT_PATH
+
+async def main_async(args, novel_list, watermarks, page_cache=None, checkpoint=None):
+    """크롤링만 하고 실제로 쓴 증분 모드 여부를 반환 (워터마크/페이지 캐시는 저장이 끝난 뒤 호출한 쪽에서 기록)"""
+    logger.info("크롤러 동작 시작")
+    stats = ConnectionStats()
+    client_config = {
+        "limit_per_host": args.limit_per_host,
+        "connect_timeout": args.connect_timeout,
+        "read_timeout": args.read_timeout,
+    }
+    async with create_session(stats, **client_config) as session:
+        merger = NovelMerger()
+        incremental = args.incremental
+        if incremental and watermarks.needs_full_sweep(datetime.timedelta(hours=args.full_sweep_hours)):
+            logger.info("마지막 전체 순회 후 시간이 지나 이번에는 전체 순회합니다.")
+            incremental = False
+        dead_letter = DeadLetterQueue()
+        # 모든 탭이 하나의 속도 조절기를 공유
+        rate = RateController(args.rate)
+        crawl_metrics = metrics.CrawlMetrics(rate) if args.metrics_file or args.metrics_port else None
+        crawler = Crawler(session, novel_list, window=args.window, base_url=args.base_url, rate=rate, merger=merger,
+                          watermarks=watermarks, incremental=incremental, page_cache=page_cache,
+                          checkpoint=checkpoint, retry=RetryPolicy(args.max_attempts), dead_letter=dead_letter,
+                          metrics=crawl_metrics)
+        progress = asyncio.create_task(report_progress(crawler.progress_report, args.progress_interval))
+        metrics_writer = metrics_server = None
+        if args.metrics_file:
+            metrics_writer = asyncio.create_task(
+                metrics.write_periodically(crawl_metrics, args.metrics_file, args.metrics_interval))
+        if args.metrics_port:
+            metrics_server = await metrics.start_http_server(crawl_metrics, args.metrics_port)
         try:
-            registdate = datetime.datetime.fromtimestamp(nvTimeReg).strftime("%Y-%m-%d %H:%M:%S")
-        except (ValueError, OSError):
-            registdate = None
-    
-    if nvTimeUpdate and nvTimeUpdate != 0:
+            if args.stream:
+                # 파싱된 레코드를 JSON/SQLite/PG로 바로 흘려보냄. 바뀐 소설만 모이는 실행이면 JSON은 델타 파일에 쓰고
+                # 끝난 뒤 전체 스냅샷에 합침
+                json_path = delta_path(args.snapshot_path) if page_cache is not None or incremental else args.snapshot_path
+                # DB 테이블에는 탭 소속 열이 없으므로 나중 탭의 소속은 JSON 스냅샷에만 다시 반영하면 됨
+                sinks = [JsonSink(json_path, args.snapshot_format == "dict", merger.membership), SqliteSink(), PgCopySink()]
+                async with StreamPipeline(sinks, batch_size=args.batch_size) as pipeline:
+                    crawler.pipeline = pipeline
+                    await crawler.restore()
+                    await crawler.crawl_tabs(FREE_TABS)
+                    await crawler.crawl_tabs(PL_TABS)
+            else:
+                await crawler.restore()
+                await crawler.crawl_tabs(FREE_TABS)
+                await crawler.crawl_tabs(PL_TABS)
+        finally:
+            progress.cancel()
+            if metrics_writer is not None:
+                metrics_writer.cancel()
+                await asyncio.gather(metrics_writer, return_exceptions=True)
+            if metrics_server is not None:
+                await metrics_server.cleanup()
+            if checkpoint is not None:
+                checkpoint.close()
+            dead_letter.save()
+        logger.info(crawler.progress_report())
+        logger.info("재시도 %s회, %s", crawler.retry.retries, crawler.breakers.report())
+        if crawler.extractor.malformed:
+            logger.warning("잘못된 항목 %s개 건너뜀", crawler.extractor.malformed)
+        logger.info(merger.report())
+        merger.store_membership()
+        if page_cache is not None:
+            logger.info(page_cache.report())
+    logger.info("연결 통계: %s", stats.report())
+    return incremental
+
+async def redrive_async(args, novel_list):
+    """실패 목록(dead_letter.json)의 페이지만 다시 가져옴"""
+    dead_letter = DeadLetterQueue()
+    if not dead_letter:
+        logger.info("다시 가져올 페이지가 없습니다.")
+        return
+    async with create_session() as session:
+        crawler = Crawler(session, novel_list, window=args.window, base_url=args.base_url, rate=RateController(args.rate),
+                          merger=NovelMerger(), retry=RetryPolicy(args.max_attempts), dead_letter=dead_letter)
         try:
-            actual_timestamp = NVTIME_CONSTANT - nvTimeUpdate
-            updatedate = datetime.datetime.fromtimestamp(actual_timestamp).strftime("%Y-%m-%d %H:%M:%S")
-        except (ValueError, OSError):
-            updatedate = None
-    
-    return registdate, updatedate
-
-#url = f"https://mm.munpia.com/free/getList?page=1&rows=30&tab=regular&subtab=&selectbox="
-#url = f"https://mm.munpia.com/main/v42/slide/free/tab/regular"
-
-#---유료 소설 목로
-# 연재 신규베스트 "https://mm.munpia.com/pl/getList?page=1&rows=30&tab=plserial&subtab=new&selectbox="
-# 신규베스트 2   "https://mm.munpia.com/pl/getList?page=1&rows=30&tab=new&subtab=&selectbox=&selectbox2="
-# 최신 "https://mm.munpia.com/pl/getList?page=1&rows=30&tab=plserial&subtab=serial&selectbox="
-#최신2 "https://mm.munpia.com/pl/getList?page=1&rows=30&tab=serial&subtab=&selectbox=&selectbox2=new"
-# 완결 "https://mm.munpia.com/pl/getList?page=1&rows=30&tab=plserial&subtab=serial_end&selectbox=
-#완결2 "https://mm.munpia.com/pl/getList?page=1&rows=30&tab=serial_end&subtab=&selectbox=&selectbox2=fin"
-
-
-#---무료 소설 목록
-# 작가 "https://mm.munpia.com/free/getList?page=1&rows=30&tab=pro&subtab=&selectbox="
-# 전체 https://mm.munpia.com/free/getList?page=1&rows=30&tab=pro&subtab=&selectbox=&selectbox2=new&selectbox3=all
-# 일반 "https://mm.munpia.com/free/getList?page=1&rows=30&tab=regular&subtab=&selectbox="
-# 전체 "https://mm.munpia.com/free/getList?page=3&rows=30&tab=regular&subtab=&selectbox=&selectbox2=new&selectbox3=all"
-# 자유 "https://mm.munpia.com/free/getList?page=1&rows=30&tab=free&subtab=&selectbox="
-# 전체 "https://mm.munpia.com/free/getList?page=1&rows=30&tab=free&subtab=&selectbox=&selectbox2=new&selectbox3=all"
-# 완결 "https://mm.munpia.com/free/getList?page=1&rows=30&tab=finish&subtab=&selectbox="
-
-async def get_pl_sort_new_best_list(session, novel_list):
-    end = False
-    if end == False:
-        for i in range(1, end_num):
-            url = f"https://mm.munpia.com/pl/getList?page={i}&rows=30&tab=new&subtab=&selectbox=&selectbox2="
-            try:
-                while True:  # 무한 루프를 통해 재시도
-                    async with session.get(url, headers=headers) as response:
-                        if response.status == 429:  # HTTP 상태 코드 429 (Too Many Requests) 처리
-                            # 대기시간을 무작위로 설정한 후 재시도
-                            wait_time = random.randint(5, 10)  # 예: 5~10초 대기
-                            print(f"유료 신규베스트 순회{i}회 오류")
-                            print(f"HTTP 오류 429: 대기 후 재시도 ({wait_time}초 대기)")
-                            await asyncio.sleep(wait_time)
-                            continue  # 현재 페이지 재시도
-                        elif response.status != 200:
-                            print(f"HTTP 오류: {response.status}")
-                            break  # 오류가 발생한 경우 현재 페이지를 스킵하고 다음 페이지로 이동
-                        print(f"유료 작가 순회 {i}회")
-                        page = await response.json()
-                        page = page['content']['list']
-                        if not page:
-                            print("최대 페이지 도달")
-                            end = True
-                            return end
-                            break
-                        else:
-                            for i in page:
-                                nvTimeReg = i.get('nvTimeReg', 0)
-                                nvTimeUpdate = i.get('nvTimeUpdate', 0)
-                                registdate, updatedate = convert_timestamps(nvTimeReg, nvTimeUpdate)
-
-                                novel_info = set_novel_info(platform="Munpia",
-                                                            id=i['nvSrl'],
-                                                            title=i['title'],
-                                                            info=i['story'],
-                                                            author=i['author'],
-                                                            href=f"https://novel.munpia.com/{i['nvSrl']}",
-                                                            thumbnail=i['cover'],
-                                                            tag=i['genreText'],
-                                                            the_number_of_serials=i['sumEntry'],
-                                                            chapter=i['sumEntry'],
-                                                            view=i['nvSumHit'],
-                                                            newstatus=i['isNew'],
-                                                            finishstatus=i['isFinish'],
-                                                            agegrade=i['isAdult'],
-                                                            registdate=registdate,
-                                                            updatedate=updatedate,
-                                                            sort_option=i['nvNgCode'])
-                                novel_list.append(novel_info)
-                            break
-            except aiohttp.ClientError as e:
-                print(f"{url}에서 데이터를 가져오는 중 오류 발생: {e}")
-
-        return end
-
-
-async def get_pl_sort_latest_list(session, novel_list):
-    end = False
-    if end == False:
-        for i in range(1, end_num):
-            url = f"https://mm.munpia.com/pl/getList?page={i}&rows=30&tab=serial&subtab=&selectbox=&selectbox2=new"
-            try:
-                while True:  # 무한 루프를 통해 재시도
-                    async with session.get(url, headers=headers) as response:
-                        if response.status == 429:  # HTTP 상태 코드 429 (Too Many Requests) 처리
-                            # 대기시간을 무작위로 설정한 후 재시도
-                            wait_time = random.randint(5, 10)  # 예: 5~10초 대기
-                            print(f"유료 최신 순회{i}회 오류")
-                            print(f"HTTP 오류 429: 대기 후 재시도 ({wait_time}초 대기)")
-                            await asyncio.sleep(wait_time)
-                            continue  # 현재 페이지 재시도
-                        elif response.status != 200:
-                            print(f"HTTP 오류: {response.status}")
-                            break  # 오류가 발생한 경우 현재 페이지를 스킵하고 다음 페이지로 이동
-                        print(f"유료 최신 순회 {i}회")
-                        page = await response.json()
-                        page = page['content']['list']
-                        if not page:
-                            print("최대 페이지 도달")
-                            end = True
-                            return end
-                            break
-                        else:
-                            for i in page:
-                                nvTimeReg = i.get('nvTimeReg', 0)
-                                nvTimeUpdate = i.get('nvTimeUpdate', 0)
-                                registdate, updatedate = convert_timestamps(nvTimeReg, nvTimeUpdate)
-
-                                novel_info = set_novel_info(platform="Munpia",
-                                                            id=i['nvSrl'],
-                                                            title=i['title'],
-                                                            info=i['story'],
-                                                            author=i['author'],
-                                                            href=f"https://novel.munpia.com/{i['nvSrl']}",
-                                                            thumbnail=i['cover'],
-                                                            tag=i['genreText'],
-                                                            the_number_of_serials=i['sumEntry'],
-                                                            chapter=i['sumEntry'],
-                                                            view=i['nvSumHit'],
-                                                            newstatus=i['isNew'],
-                                                            finishstatus=i['isFinish'],
-                                                            agegrade=i['isAdult'],
-                                                            registdate=registdate,
-                                                            updatedate=updatedate,
-                                                            sort_option=i['nvNgCode'])
-                                novel_list.append(novel_info)
-                            break
-            except aiohttp.ClientError as e:
-                print(f"{url}에서 데이터를 가져오는 중 오류 발생: {e}")
-
-async def get_pl_sort_end_list(session, novel_list):
-    end = False
-    if end == False:
-        for i in range(1, end_num):
-            url = f"https://mm.munpia.com/pl/getList?page={i}&rows=30&tab=serial_end&subtab=&selectbox=&selectbox2=fin"
-            try:
-                while True:  # 무한 루프를 통해 재시도
-                    async with session.get(url, headers=headers) as response:
-                        if response.status == 429:  # HTTP 상태 코드 429 (Too Many Requests) 처리
-                            # 대기시간을 무작위로 설정한 후 재시도
-                            wait_time = random.randint(5, 10)  # 예: 5~10초 대기
-                            print(f"유료 완결 순회{i}회 오류")
-                            print(f"HTTP 오류 429: 대기 후 재시도 ({wait_time}초 대기)")
-                            await asyncio.sleep(wait_time)
-                            continue  # 현재 페이지 재시도
-                        elif response.status != 200:
-                            print(f"HTTP 오류: {response.status}")
-                            break  # 오류가 발생한 경우 현재 페이지를 스킵하고 다음 페이지로 이동
-                        print(f"유료 완결 순회 {i}회")
-                        page = await response.json()
-                        page = page['content']['list']
-                        if not page:
-                            print("최대 페이지 도달")
-                            end = True
-                            return end
-                            break
-                        else:
-                            for i in page:
-                                nvTimeReg = i.get('nvTimeReg', 0)
-                                nvTimeUpdate = i.get('nvTimeUpdate', 0)
-                                registdate, updatedate = convert_timestamps(nvTimeReg, nvTimeUpdate)
-
-                                novel_info = set_novel_info(platform="Munpia",
-                                                            id=i['nvSrl'],
-                                                            title=i['title'],
-                                                            info=i['story'],
-                                                            author=i['author'],
-                                                            href=f"https://novel.munpia.com/{i['nvSrl']}",
-                                                            thumbnail=i['cover'],
-                                                            tag=i['genreText'],
-                                                            the_number_of_serials=i['sumEntry'],
-                                                            chapter=i['sumEntry'],
-                                                            view=i['nvSumHit'],
-                                                            newstatus=i['isNew'],
-                                                            finishstatus=i['isFinish'],
-                                                            agegrade=i['isAdult'],
-                                                            registdate=registdate,
-                                                            updatedate=updatedate,
-                                                            sort_option=i['nvNgCode'])
-                                novel_list.append(novel_info)
-                            break
-            except aiohttp.ClientError as e:
-                print(f"{url}에서 데이터를 가져오는 중 오류 발생: {e}")
-
-
-async def get_free_sort_author_list(session, novel_list):
-    end = False
-    if end == False:
-        for i in range(1, end_num):
-            url = f"https://mm.munpia.com/free/getList?page={i}&rows=30&tab=pro&subtab=&selectbox=&selectbox2=new&selectbox3=all"
-            try:
-                while True:  # 무한 루프를 통해 재시도
-                    async with session.get(url, headers=headers) as response:
-                        if response.status == 429:  # HTTP 상태 코드 429 (Too Many Requests) 처리
-                            # 대기시간을 무작위로 설정한 후 재시도
-                            wait_time = random.randint(5, 10)  # 예: 5~10초 대기
-                            print(f"무료 작가 순회{i}회 오류")
-                            print(f"HTTP 오류 429: 대기 후 재시도 ({wait_time}초 대기)")
-                            await asyncio.sleep(wait_time)
-                            continue  # 현재 페이지 재시도
-                        elif response.status != 200:
-                            print(f"HTTP 오류: {response.status}")
-                            break  # 오류가 발생한 경우 현재 페이지를 스킵하고 다음 페이지로 이동
-                        print(f"무료 작가 순회 {i}회")
-                        page = await response.json()
-                        #pprint.pprint(page)
-                        page = page['content']['list']
-                        if not page:
-                            print("최대 페이지 도달")
-                            end = True
-                            return end
-                            break
-                        else:
-                            for i in page:
-                                nvTimeReg = i.get('nvTimeReg', 0)
-                                nvTimeUpdate = i.get('nvTimeUpdate', 0)
-                                registdate, updatedate = convert_timestamps(nvTimeReg, nvTimeUpdate)
-
-                                novel_info = set_novel_info(platform="Munpia",
-                                                            id=i['nvSrl'],
-                                                            title=i['title'],
-                                                            info=i['story'],
-                                                            author=i['author'],
-                                                            href=f"https://novel.munpia.com/{i['nvSrl']}",
-                                                            thumbnail=i['cover'],
-                                                            tag=i['genreText'],
-                                                            the_number_of_serials=i['sumEntry'],
-                                                            chapter=i['sumEntry'],
-                                                            view=i['nvSumHit'],
-                                                            newstatus=i['isNew'],
-                                                            finishstatus=i['isFinish'],
-                                                            agegrade=i['isAdult'],
-                                                            registdate=registdate,
-                                                            updatedate=updatedate,
-                                                            sort_option=i['nvNgCode'])
-                                novel_list.append(novel_info)
-                            break
-            except aiohttp.ClientError as e:
-                print(f"{url}에서 데이터를 가져오는 중 오류 발생: {e}")
-
-async def get_free_sort_regular_list(session, novel_list):
-    end = False
-    if end == False:
-        for i in range(1, end_num):
-            url = f"https://mm.munpia.com/free/getList?page={i}&rows=30&tab=regular&subtab=&selectbox=&selectbox2=new&selectbox3=all"
-            try:
-                while True:  # 무한 루프를 통해 재시도
-                    async with session.get(url, headers=headers) as response:
-                        if response.status == 429:  # HTTP 상태 코드 429 (Too Many Requests) 처리
-                            # 대기시간을 무작위로 설정한 후 재시도
-                            wait_time = random.randint(5, 10)  # 예: 5~10초 대기
-                            print(f"무료 일반 순회{i}회 오류")
-                            print(f"HTTP 오류 429: 대기 후 재시도 ({wait_time}초 대기)")
-                            await asyncio.sleep(wait_time)
-                            continue  # 현재 페이지 재시도
-                        elif response.status != 200:
-                            print(f"HTTP 오류: {response.status}")
-                            break  # 오류가 발생한 경우 현재 페이지를 스킵하고 다음 페이지로 이동
-                        print(f"무료 일반 순회 {i}회")
-                        page = await response.json()
-                        page = page['content']['list']
-                        if not page:
-                            print("최대 페이지 도달")
-                            end = True
-                            return end
-                            break
-                        else:
-                            for i in page:
-                                nvTimeReg = i.get('nvTimeReg', 0)
-                                nvTimeUpdate = i.get('nvTimeUpdate', 0)
-                                registdate, updatedate = convert_timestamps(nvTimeReg, nvTimeUpdate)
-
-                                novel_info = set_novel_info(platform="Munpia",
-                                                            id=i['nvSrl'],
-                                                            title=i['title'],
-                                                            info=i['story'],
-                                                            author=i['author'],
-                                                            href=f"https://novel.munpia.com/{i['nvSrl']}",
-                                                            thumbnail=i['cover'],
-                                                            tag=i['genreText'],
-                                                            the_number_of_serials=i['sumEntry'],
-                                                            chapter=i['sumEntry'],
-                                                            view=i['nvSumHit'],
-                                                            newstatus=i['isNew'],
-                                                            finishstatus=i['isFinish'],
-                                                            agegrade=i['isAdult'],
-                                                            registdate=registdate,
-                                                            updatedate=updatedate,
-                                                            sort_option=i['nvNgCode'])
-                                novel_list.append(novel_info)
-                            break
-            except aiohttp.ClientError as e:
-                print(f"{url}에서 데이터를 가져오는 중 오류 발생: {e}")
-
-async def get_free_sort_free_list(session, novel_list):
-    end = False
-    if end == False:
-        for i in range(1, end_num):
-            url = f"https://mm.munpia.com/free/getList?page={i}&rows=30&tab=free&subtab=&selectbox=&selectbox2=new&selectbox3=all"
-            try:
-                while True:  # 무한 루프를 통해 재시도
-                    async with session.get(url, headers=headers) as response:
-                        if response.status == 429:  # HTTP 상태 코드 429 (Too Many Requests) 처리
-                            # 대기시간을 무작위로 설정한 후 재시도
-                            wait_time = random.randint(5, 10)  # 예: 5~10초 대기
-                            print(f"무료 자유 순회{i}회 오류")
-                            print(f"HTTP 오류 429: 대기 후 재시도 ({wait_time}초 대기)")
-                            await asyncio.sleep(wait_time)
-                            continue  # 현재 페이지 재시도
-                        elif response.status != 200:
-                            print(f"HTTP 오류: {response.status}")
-                            break  # 오류가 발생한 경우 현재 페이지를 스킵하고 다음 페이지로 이동
-
-                        print(f"무료 자유 순회 {i}회")
-                        page = await response.json()
-                        page = page['content']['list']
-                        if not page:
-                            print("최대 페이지 도달")
-                            end = True
-                            return end
-                            break
-                        else:
-                            for i in page:
-                                nvTimeReg = i.get('nvTimeReg', 0)
-                                nvTimeUpdate = i.get('nvTimeUpdate', 0)
-                                registdate, updatedate = convert_timestamps(nvTimeReg, nvTimeUpdate)
-
-                                novel_info = set_novel_info(platform="Munpia",
-                                                            id=i['nvSrl'],
-                                                            title=i['title'],
-                                                            info=i['story'],
-                                                            author=i['author'],
-                                                            href=f"https://novel.munpia.com/{i['nvSrl']}",
-                                                            thumbnail=i['cover'],
-                                                            tag=i['genreText'],
-                                                            the_number_of_serials=i['sumEntry'],
-                                                            chapter=i['sumEntry'],
-                                                            view=i['nvSumHit'],
-                                                            newstatus=i['isNew'],
-                                                            finishstatus=i['isFinish'],
-                                                            agegrade=i['isAdult'],
-                                                            registdate=registdate,
-                                                            updatedate=updatedate,
-                                                            sort_option=i['nvNgCode'])
-                                novel_list.append(novel_info)
-                            break
-            except aiohttp.ClientError as e:
-                print(f"{url}에서 데이터를 가져오는 중 오류 발생: {e}")
-
-async def get_free_sort_end_list(session, novel_list):
-    end = False
-    if end == False:
-        for i in range(1, end_num):
-            url = f"https://mm.munpia.com/free/getList?page={i}&rows=30&tab=finish&subtab=&selectbox=&selectbox2=new&selectbox3=all"
-            try:
-                while True:  # 무한 루프를 통해 재시도
-                    async with session.get(url, headers=headers) as response:
-                        if response.status == 429:  # HTTP 상태 코드 429 (Too Many Requests) 처리
-                            # 대기시간을 무작위로 설정한 후 재시도
-                            wait_time = random.randint(5, 10)  # 예: 5~10초 대기
-                            print(f"무료 완결 순회{i}회 오류")
-                            print(f"HTTP 오류 429: 대기 후 재시도 ({wait_time}초 대기)")
-                            await asyncio.sleep(wait_time)
-                            continue  # 현재 페이지 재시도
-                        elif response.status != 200:
-                            print(f"HTTP 오류: {response.status}")
-                            break  # 오류가 발생한 경우 현재 페이지를 스킵하고 다음 페이지로 이동
-                        print(f"무료 완결 순회 {i}회")
-                        page = await response.json()
-                        page = page['content']['list']
-                        if not page:
-                            print("최대 페이지 도달")
-                            end = True
-                            return end
-                            break
-                        else:
-                            for i in page:
-                                nvTimeReg = i.get('nvTimeReg', 0)
-                                nvTimeUpdate = i.get('nvTimeUpdate', 0)
-                                registdate, updatedate = convert_timestamps(nvTimeReg, nvTimeUpdate)
-
-                                novel_info = set_novel_info(platform="Munpia",
-                                                            id=i['nvSrl'],
-                                                            title=i['title'],
-                                                            info=i['story'],
-                                                            author=i['author'],
-                                                            href=f"https://novel.munpia.com/{i['nvSrl']}",
-                                                            thumbnail=i['cover'],
-                                                            tag=i['genreText'],
-                                                            the_number_of_serials=i['sumEntry'],
-                                                            chapter=i['sumEntry'],
-                                                            view=i['nvSumHit'],
-                                                            newstatus=i['isNew'],
-                                                            finishstatus=i['isFinish'],
-                                                            agegrade=i['isAdult'],
-                                                            registdate=registdate,
-                                                            updatedate=updatedate,
-                                                            sort_option=i['nvNgCode'])
-                                novel_list.append(novel_info)
-                            break
-            except aiohttp.ClientError as e:
-                print(f"{url}에서 데이터를 가져오는 중 오류 발생: {e}")
-
-
-
-
-#response = requests.get(url=url, headers=headers)
-#page = response.json()
-
-#pprint.pprint(page, sort_dicts=False)
-#time.sleep(100)
-""""
-page = page['content']['list']
-
-for i in page:
-    pprint.pprint(i['title'])
-    pprint.pprint(i['story'])
-    pprint.pprint(i['author'])
-    pprint.pprint(i['href'])
-    pprint.pprint(i['cover'])
-    pprint.pprint(i['genreText'])
-    pprint.pprint(i['sumEntry'])
-    pprint.pprint(i['sumHitText'])
-    pprint.pprint(i['isNew'])
-    pprint.pprint(i['isFinish'])
-    pprint.pprint(i['isAdult'])
-    pprint.pprint(i['registDate'])
-    pprint.pprint(i['updateDate'])
-    pprint.pprint(i['nvNgCode'])
-    time.sleep(3)
-"""
-
-async def main_async():
-    print("크롤러 동작 시작")
-    async with aiohttp.ClientSession() as session:
-        await asyncio.gather(get_free_sort_author_list(session, novel_list), get_free_sort_regular_list(session, novel_list), get_free_sort_free_list(session, novel_list), get_free_sort_end_list(session, novel_list))
-        await asyncio.gather(get_pl_sort_new_best_list(session, novel_list), get_pl_sort_latest_list(session, novel_list), get_pl_sort_end_list(session, novel_list))
+            await crawler.redrive()
+        finally:
+            dead_letter.save()
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="문피아 소설 정보 크롤러")
+    parser.add_argument("--base-url", default=BASE_URL, help="목록 API 주소 (mock_server.py로 로컬 테스트할 때 변경)")
+    parser.add_argument("--window", type=int, default=WINDOW_SIZE, help="탭마다 동시에 요청할 페이지 수")
+    parser.add_argument("--rate", type=float, default=INITIAL_RATE, help="초기 초당 요청 수 (429 응답에 따라 자동 조절)")
+    parser.add_argument("--limit-per-host", type=int, default=CLIENT_CONFIG["limit_per_host"], help="호스트당 동시 연결 수")
+    parser.add_argument("--connect-timeout", type=float, default=CLIENT_CONFIG["connect_timeout"], help="연결 타임아웃(초)")
+    parser.add_argument("--read-timeout", type=float, default=CLIENT_CONFIG["read_timeout"], help="소켓 읽기 타임아웃(초)")
+    parser.add_argument("--stream", action="store_true", help="크롤링하면서 배치 단위로 JSON/SQLite/PG에 바로 저장")
+    parser.add_argument("--columnar", action="store_true",
+                        help="배치 모드에서 크롤링 결과를 열 단위(NovelBatch)로 모아 메모리 사용량을 줄임")
+    parser.add_argument("--snapshot-format", default="json", choices=["json", "dict", "jsonl"],
+                        help="스냅샷 형식. dict는 플랫폼/작가/장르를 값 목록 번호로 저장해 파일이 작음 (load_snapshot으로 읽음), "
+                             "jsonl은 한 줄에 레코드 하나씩 이어 쓰고 행 수/체크섬을 .meta.json에 기록")
+    parser.add_argument("--snapshot-compression", default="none", choices=list(snapshot.COMPRESSION_SUFFIX),
+                        help="jsonl 스냅샷 압축 (zstd는 zstandard 패키지가 없으면 gzip)")
+    parser.add_argument("--snapshot-columns", action="store_true",
+                        help="스냅샷 옆에 열 단위 바이너리 스냅샷(Munpia_novel_info.columns/)도 저장 (numpy.memmap으로 열 하나씩 읽음)")
+    parser.add_argument("--batch-size", type=int, default=PIPELINE_BATCH_SIZE, help="스트리밍 모드에서 한 번에 저장할 레코드 수")
+    parser.add_argument("--incremental", action="store_true", help="최신순 탭은 지난 실행의 워터마크를 지나면 순회 종료")
+    parser.add_argument("--safety-margin", type=float, default=SAFETY_MARGIN.total_seconds() / 60,
+                        help="증분 모드에서 워터마크보다 더 확인할 시간(분)")
+    parser.add_argument("--full-sweep-hours", type=float, default=FULL_SWEEP_INTERVAL.total_seconds() / 3600,
+                        help="증분 모드라도 이 시간이 지나면 전체 순회")
+    parser.add_argument("--page-cache", action="store_true",
+                        help="지난 실행과 응답이 같은 페이지는 파싱/저장 생략 (바뀐 소설만 기존 스냅샷에 합침)")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="DEBUG면 페이지/레코드별 상세 로그까지 출력")
+    parser.add_argument("--log-json", action="store_true", help="로그를 한 줄짜리 JSON으로 출력 (로그 수집기용)")
+    parser.add_argument("--progress-interval", type=float, default=10.0, help="진행 상황 로그 간격(초)")
+    parser.add_argument("--checkpoint", action="store_true",
+                        help="중단 후 --resume으로 이어갈 수 있게 체크포인트를 기록. 처리한 페이지 원본을 모두 스필 파일"
+                             "(crawl_spill.jsonl, 스냅샷과 비슷한 크기)에 쓰고 간격마다 fsync하므로 기본은 끔")
+    parser.add_argument("--resume", action="store_true",
+                        help="지난 실행의 체크포인트에서 이어서 크롤링 (--checkpoint 포함)")
+    parser.add_argument("--checkpoint-interval", type=float, default=CHECKPOINT_INTERVAL,
+                        help="체크포인트/스필 파일 저장 간격(초)")
+    parser.add_argument("--enrich", action="store_true",
+                        help="크롤링 후 새로 생겼거나 바뀐 소설의 상세 페이지 정보를 보강 (munpia_novel.db/PG의 detail 테이블)")
+    parser.add_argument("--enrich-concurrency", type=int, default=enrich.CONCURRENCY, help="상세 페이지 동시 요청 수")
+    parser.add_argument("--thumbnails", action="store_true",
+                        help="크롤링 후 표지 이미지를 내용 해시 기준으로 미러링 (URL이 바뀐 소설만 다시 받음)")
+    parser.add_argument("--thumbnail-dir", default=thumbnail.THUMB_DIR, help="표지 저장 디렉터리")
+    parser.add_argument("--thumbnail-concurrency", type=int, default=thumbnail.CONCURRENCY, help="표지 동시 다운로드 수")
+    parser.add_argument("--metrics-file", help="크롤링하는 동안 Prometheus 텍스트 형식 지표를 이 파일에 주기적으로 기록")
+    parser.add_argument("--metrics-port", type=int, help="크롤링하는 동안 http://127.0.0.1:PORT/metrics로 지표 제공")
+    parser.add_argument("--metrics-interval", type=float, default=metrics.METRICS_INTERVAL, help="지표 파일 갱신 간격(초)")
+    parser.add_argument("--loop", default="auto", choices=event_loop.LOOP_CHOICES,
+                        help="이벤트 루프 구현 (auto: uvloop이 설치되어 있으면 uvloop)")
+    parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS,
+                        help="페이지 하나당 최대 시도 횟수 (네트워크 오류/5xx는 지수 백오프로 재시도)")
+    parser.add_argument("--redrive", action="store_true",
+                        help="전체 크롤링 대신 실패 목록(dead_letter.json)의 페이지만 다시 가져와 스냅샷/DB에 반영")
+    parser.add_argument("--shards", type=int, default=0,
+                        help="작업 단위를 나눠 워커 프로세스 N개로 크롤링 (증분/페이지 캐시/스트리밍과는 같이 쓰지 않음)")
+    parser.add_argument("--shard-worker", action="store_true", help="--shard-db의 작업 큐에 워커로만 참여 (다른 머신용)")
+    parser.add_argument("--shard-db", default=shard.SHARD_DB, help="샤드 작업 큐 SQLite 파일")
+    parser.add_argument("--shard-units", type=int, default=2, help="워커 하나가 동시에 진행할 작업 단위 수")
+    args = parser.parse_args()
+    setup_logging(args.log_level, args.log_json)
+    args.snapshot_path = snapshot_path(args)
+
+    shard_options = {
+        "rate": args.rate,
+        "base_url": args.base_url,
+        "window": args.window,
+        "units": args.shard_units,
+        "client": {"limit_per_host": args.limit_per_host, "connect_timeout": args.connect_timeout,
+                   "read_timeout": args.read_timeout},
+        "log_level": args.log_level,
+        "log_json": args.log_json,
+        "loop": args.loop,
+    }
+    if args.shard_worker:
+        event_loop.run(shard.worker_async(args.shard_db, shard.worker_name(), shard_options), args.loop)
+        raise SystemExit(0)
+
+    if args.redrive:
+        novel_list = []
+        event_loop.run(redrive_async(args, novel_list), args.loop)
+        if novel_list:
+            merge_into_snapshot(novel_list, args.snapshot_path)
+            if args.snapshot_columns:
+                columnar.export_snapshot(args.snapshot_path)
+            store_db(args.snapshot_path)
+            store_db_munpia_pg_copy(args.snapshot_path)
+        raise SystemExit(0)
+
     start = time.time()
-    end_num = 100000
-    novel_list = []
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(main_async())
-    loop.close()
-    store_info(novel_list)
+    watermarks = page_cache = checkpoint = rows = None
+    if args.shards:
+        args.stream = False
+        shard.run_coordinator(args.shards, args.shard_db, shard_options, args.snapshot_path,
+                              args.snapshot_format == "dict")
+    else:
+        novel_list = NovelBatch() if args.columnar else []
+        if args.checkpoint or args.resume:
+            checkpoint = Checkpoint(interval=args.checkpoint_interval, resume=args.resume)
+        watermarks = WatermarkStore(margin=datetime.timedelta(minutes=args.safety_margin))
+        page_cache = PageCache() if args.page_cache else None
+        incremental = event_loop.run(main_async(args, novel_list, watermarks, page_cache, checkpoint), args.loop)
+        dictionary = args.snapshot_format == "dict"
+        if page_cache is not None or incremental:
+            # 바뀐 소설만 모였으므로 전체 스냅샷을 덮어쓰지 않고 합침 (열 스냅샷/보강/표지는 전체 스냅샷을 읽음)
+            if args.stream:
+                merge_rows_into_snapshot(iter_snapshot(delta_path(args.snapshot_path)), args.snapshot_path, dictionary)
+            else:
+                merge_into_snapshot(novel_list, args.snapshot_path, dictionary)
+        elif not args.stream:
+            store_info(novel_list, args.snapshot_path, dictionary)
+            rows = novel_list
     end = time.time()
     sec = (end - start)
     result = datetime.timedelta(seconds=sec)
-    pprint.pprint(f"크롤러 동작 시간 : {result}")
-    store_db()
-    store_db_munpia_pg_copy("Munpia_novel_info.json")
-
+    logger.info("크롤러 동작 시간 : %s", result)
+    if args.snapshot_columns:
+        columnar.export_snapshot(args.snapshot_path)
+    if not args.stream:
+        if rows is not None:
+            # 전체 목록이 메모리에 있으면 날짜를 datetime 그대로 넘김 (스냅샷 문자열을 다시 파싱하지 않음)
+            store_db(args.snapshot_path, map(novel_to_dict, rows))
+            store_db_munpia_pg_copy(args.snapshot_path, map(novel_to_dict, rows))
+        else:
+            store_db(args.snapshot_path)
+            store_db_munpia_pg_copy(args.snapshot_path)
+    if checkpoint is not None:
+        # 결과가 DB까지 모두 저장됐으므로 다음 실행은 처음부터 (저장에 실패하면 --resume으로 다시 이어감)
+        checkpoint.clear()
+    if watermarks is not None:
+        # 스냅샷/DB 저장이 끝난 뒤에 기록해야 저장에 실패한 변경분을 다음 증분 실행이 다시 가져옴
+        watermarks.commit(full_sweep=not incremental)
+    if page_cache is not None:
+        # 페이지 캐시도 마찬가지. 저장 전에 기록하면 다음 실행이 같은 페이지를 건너뛰어 변경분을 영영 놓침
+        page_cache.flush()
+        page_cache.close()
+    if args.enrich:
+        enrich.enrich_snapshot(args.snapshot_path, concurrency=args.enrich_concurrency, pg=True)
+    if args.thumbnails:
+        thumbnail.mirror_snapshot(args.snapshot_path, root=args.thumbnail_dir, concurrency=args.thumbnail_concurrency, pg=True)
 
@@ -0,0 +1,70 @@
+import logging
+import json_codec
+
+logger = logging.getLogger("merge")
+
+
+class NovelMerger:
+    """nvSrl 기준으로 소설 하나당 레코드 하나만 남기고, 어느 탭/정렬 코드에서 나왔는지 기록
+
+    membership은 id -> (탭 키 목록, sort_option 목록)만 들고 있어서 스트리밍 모드에서도 가볍다.
+    배치 모드에서는 처음 본 레코드의 tabs/sort_options가 같은 목록을 가리키므로 나중 탭도 반영된다.
+    """
+
+    def __init__(self):
+        self.membership = {}
+        self.duplicates = 0
+
+    def add(self, novel, tab_key):
+        """처음 보는 소설이면 True, 이미 본 소설이면 소속만 합치고 False"""
+        entry = self.membership.get(novel.id)
+        if entry is None:
+            entry = ([tab_key], [novel.sort_option])
+            self.membership[novel.id] = entry
+            novel.tabs, novel.sort_options = entry
+            return True
+        self.duplicates += 1
+        tabs, sort_options = entry
+        if tab_key not in tabs:
+            tabs.append(tab_key)
+        if novel.sort_option not in sort_options:
+            sort_options.append(novel.sort_option)
+        return False
+
+    def add_row(self, row, tab_key):
+        """novel_to_dict 형식의 dict를 병합 (샤드 결과 수집용). 반환값은 add와 같음"""
+        entry = self.membership.get(row["id"])
+        if entry is None:
+            entry = ([tab_key], [row["sort_option"]])
+            self.membership[row["id"]] = entry
+            row["tabs"], row["sort_options"] = entry
+            return True
+        self.duplicates += 1
+        tabs, sort_options = entry
+        if tab_key not in tabs:
+            tabs.append(tab_key)
+        if row["sort_option"] not in sort_options:
+            sort_options.append(row["sort_option"])
+        return False
+
+    def add_id(self, n_id, tab_key):
+        """레코드 없이 id만 아는 경우(변경 없는 캐시 페이지) 소속만 기록"""
+        entry = self.membership.get(n_id)
+        if entry is None:
+            self.membership[n_id] = ([tab_key], [])
+            return
+        self.duplicates += 1
+        if tab_key not in entry[0]:
+            entry[0].append(tab_key)
+
+    def __len__(self):
+        return len(self.membership)
+
+    def report(self):
+        return f"고유 소설 {len(self.membership)}건, 탭 간 중복 {self.duplicates}건 병합"
+
+    def store_membership(self, path="Munpia_tab_membership.json"):
+        data = {str(n_id): {"tabs": tabs, "sort_options": sort_options}
+                for n_id, (tabs, sort_options) in self.membership.items()}
+        json_codec.dump_file(data, path)
+        logger.info("탭 소속 정보 저장: %s", path)
@@ -0,0 +1,158 @@
+"""크롤링 지표 수집과 Prometheus 텍스트 형식 내보내기
+
+    python main.py --metrics-file /var/lib/node_exporter/textfile/munpia.prom
+    python main.py --metrics-port 9108      # http://127.0.0.1:9108/metrics
+"""
+import asyncio
+import bisect
+import logging
+import os
+from aiohttp import web
+
+# 요청 응답 시간 히스토그램 구간(초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_INTERVAL = 5.0
+PREFIX = "munpia_crawler"
+
+logger = logging.getLogger("metrics")
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.values = {}
+
+    def inc(self, *label_values, amount=1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{format_labels(list(zip(self.label_names, label_values)))} {value:g}")
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, *label_values, value):
+        self.values[label_values] = value
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self.values = {}  # 레이블 -> [구간별 개수..., 합계, 전체 개수]
+
+    def observe(self, *label_values, value):
+        entry = self.values.get(label_values)
+        if entry is None:
+            entry = self.values[label_values] = [0] * (len(self.buckets) + 2)
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            entry[index] += 1
+        entry[-2] += value
+        entry[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, entry in sorted(self.values.items()):
+            labels = list(zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{format_labels(labels + [('le', f'{bound:g}')])} {cumulative}")
+            lines.append(f"{self.name}_bucket{format_labels(labels + [('le', '+Inf')])} {entry[-1]}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {entry[-2]:g}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {entry[-1]}")
+        return lines
+
+
+class CrawlMetrics:
+    """탭별 요청/페이지/레코드/지연/429 대기/수신 바이트/오류 지표"""
+
+    def __init__(self, rate=None):
+        self.rate = rate  # 있으면 현재 요청 속도도 내보냄 (rate_limit.RateController)
+        self.requests = Counter(f"{PREFIX}_requests_total", "HTTP 요청 수", ("tab", "status"))
+        self.pages = Counter(f"{PREFIX}_pages_total", "처리한 페이지 수", ("tab",))
+        self.records = Counter(f"{PREFIX}_records_total", "파싱한 레코드 수", ("tab",))
+        self.latency = Histogram(f"{PREFIX}_request_duration_seconds", "요청 시작부터 본문 수신까지 걸린 시간", ("tab",))
+        self.throttle = Counter(f"{PREFIX}_throttle_backoff_seconds_total", "429 응답으로 대기한 시간(초)", ("tab",))
+        self.bytes = Counter(f"{PREFIX}_response_bytes_total", "수신한 응답 본문 크기", ("tab",))
+        self.errors = Counter(f"{PREFIX}_errors_total", "실패한 요청 수 (status=network는 연결/타임아웃 오류)",
+                              ("tab", "status"))
+        self.request_rate = Gauge(f"{PREFIX}_request_rate", "속도 조절기의 현재 초당 요청 수")
+
+    def observe_response(self, tab_key, status, seconds, size=0):
+        self.requests.inc(tab_key, str(status))
+        self.latency.observe(tab_key, value=seconds)
+        if size:
+            self.bytes.inc(tab_key, amount=size)
+        if status not in (200, 304):
+            self.errors.inc(tab_key, str(status))
+
+    def observe_network_error(self, tab_key, seconds):
+        self.requests.inc(tab_key, "network")
+        self.latency.observe(tab_key, value=seconds)
+        self.errors.inc(tab_key, "network")
+
+    def observe_throttle(self, tab_key, wait_seconds):
+        self.throttle.inc(tab_key, amount=wait_seconds)
+
+    def observe_page(self, tab_key, records):
+        self.pages.inc(tab_key)
+        self.records.inc(tab_key, amount=records)
+
+    def render(self):
+        if self.rate is not None:
+            self.request_rate.set(value=self.rate.rate)
+        metrics = (self.requests, self.pages, self.records, self.latency, self.throttle, self.bytes, self.errors,
+                   self.request_rate)
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+    def write_file(self, path):
+        """node_exporter textfile 수집기가 반쯤 쓴 파일을 읽지 않도록 임시 파일에 쓰고 교체"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+async def write_periodically(metrics, path, interval=METRICS_INTERVAL):
+    """크롤링하는 동안 interval초마다 지표 파일을 갱신 (취소될 때 마지막으로 한 번 더 기록)"""
+    try:
+        while True:
+            metrics.write_file(path)
+            await asyncio.sleep(interval)
+    finally:
+        metrics.write_file(path)
+
+
+async def start_http_server(metrics, port, host="127.0.0.1"):
+    """/metrics 엔드포인트를 여는 작은 aiohttp 서버. 반환한 runner.cleanup()으로 종료"""
+    async def handle(request):
+        return web.Response(body=metrics.render().encode("utf-8"),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info("지표 엔드포인트: http://%s:%s/metrics", host, port)
+    return runner
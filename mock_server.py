@@ -0,0 +1,184 @@
+"""문피아 목록 API(/free/getList, /pl/getList) 대역 서버
+
+    python mock_server.py --size 30000 --latency 50 --p429 0.01
+    python mock_server.py --record https://mm.munpia.com --fixtures fixtures   # 실제 응답 저장
+    python mock_server.py --replay --fixtures fixtures                          # 저장한 응답 재생
+    python main.py --base-url http://127.0.0.1:8765
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import random
+from urllib.parse import urlencode
+from aiohttp import web
+import json_codec
+from client import create_session
+from logger import setup_logging
+
+# 대역 서버 기본 설정 (create_app에 키워드로 덮어쓸 수 있음)
+MOCK_CONFIG = {
+    "size": 30000,         # 탭마다 내려줄 소설 수
+    "latency": 0.05,       # 응답 지연(초)
+    "jitter": 0.02,        # 지연에 더할 무작위 값의 최대(초)
+    "p429": 0.0,           # 429 응답 확률
+    "retry_after": None,   # 429 응답의 Retry-After(초)
+    "error_rate": 0.0,     # 500 응답 확률
+    "seed": None,          # 429/오류 주입 난수 시드
+}
+FIXTURE_DIR = "fixtures"
+HOST = "127.0.0.1"
+PORT = 8765
+
+# 목록 최신순 정렬과 비슷하도록 n번째 소설은 이 시각에서 n*10분 전에 업데이트된 것으로 만듦
+CATALOG_UPDATED = 1700000000
+NVTIME_CONSTANT = 9999990400
+
+logger = logging.getLogger("mock_server")
+
+
+def catalog_item(n):
+    """content.list 항목 하나. 같은 n이면 항상 같은 값"""
+    rnd = random.Random(n)
+    return {
+        "nvSrl": 100000 + n,
+        "title": f"문피아 소설 제목 {n}",
+        "story": "회귀한 주인공이 다시 한 번 정상에 오르는 이야기. " * rnd.randint(2, 6),
+        "author": f"작가{rnd.randint(1, 3000)}",
+        "cover": f"https://cdn1.munpia.com/files/attach/images/{n}/cover.jpg",
+        "genreText": rnd.choice(["판타지", "무협", "현대판타지", "로맨스", "SF", "대체역사"]),
+        "sumEntry": f"{rnd.randint(1, 2000):,}",
+        "nvSumHit": rnd.randint(0, 5000000),
+        "sumHitText": "1.2만",
+        "isNew": rnd.random() < 0.1,
+        "isFinish": rnd.random() < 0.3,
+        "isAdult": rnd.random() < 0.05,
+        "nvTimeReg": 1500000000 + rnd.randint(0, 100000000),
+        "nvTimeUpdate": NVTIME_CONSTANT - (CATALOG_UPDATED - n * 600),
+        "nvNgCode": rnd.choice(["pro", "regular", "free"]),
+    }
+
+
+def fixture_key(path, query):
+    """요청 경로와 쿼리(순서 무관)로 픽스처 파일 이름을 만듦"""
+    canonical = urlencode(sorted(query.items()))
+    digest = hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+    return f"{path.strip('/').replace('/', '_')}_{digest}.json"
+
+
+def etag_response(request, body):
+    """본문 해시를 ETag로 붙이고, If-None-Match가 같으면 304"""
+    etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+    if request.headers.get("If-None-Match") == etag:
+        return web.Response(status=304, headers={"ETag": etag})
+    return web.Response(body=body, content_type="application/json", headers={"ETag": etag})
+
+
+def create_app(fixtures=None, record=None, **overrides):
+    """대역 서버 앱. record가 있으면 그 주소로 프록시하면서 응답을 저장, fixtures만 있으면 저장한 응답을 재생"""
+    config = {**MOCK_CONFIG, **overrides}
+    rnd = random.Random(config["seed"])
+    app = web.Application()
+
+    async def inject_faults():
+        await asyncio.sleep(config["latency"] + rnd.random() * config["jitter"])
+        if rnd.random() < config["p429"]:
+            headers = {}
+            if config["retry_after"] is not None:
+                headers["Retry-After"] = str(config["retry_after"])
+            return web.Response(status=429, headers=headers)
+        if rnd.random() < config["error_rate"]:
+            return web.Response(status=500)
+        return None
+
+    async def generate(request):
+        fault = await inject_faults()
+        if fault is not None:
+            return fault
+        page = int(request.query.get("page", 1))
+        rows = int(request.query.get("rows", 30))
+        start = (page - 1) * rows
+        items = [catalog_item(n) for n in range(max(start, 0), min(start + rows, config["size"]))]
+        return etag_response(request, json_codec.dumps({"content": {"list": items}}))
+
+    async def replay(request):
+        fault = await inject_faults()
+        if fault is not None:
+            return fault
+        path = os.path.join(fixtures, fixture_key(request.path, request.query))
+        if not os.path.exists(path):
+            logger.warning("픽스처 없음: %s", request.path_qs)
+            return web.json_response({"error": "fixture not found"}, status=404)
+        with open(path, "rb") as f:
+            return etag_response(request, f.read())
+
+    async def proxy(request):
+        upstream = app["upstream"]
+        async with upstream.get(record.rstrip("/") + request.path_qs) as response:
+            body = await response.read()
+            if response.status == 200:
+                with open(os.path.join(fixtures, fixture_key(request.path, request.query)), "wb") as f:
+                    f.write(body)
+                logger.info("저장: %s", request.path_qs)
+            return web.Response(status=response.status, body=body, content_type="application/json")
+
+    async def detail(request):
+        """상세 페이지(novel.munpia.com/{nvSrl}) 대역. enrich.py가 읽는 meta 태그만 담음"""
+        fault = await inject_faults()
+        if fault is not None:
+            return fault
+        n = int(request.match_info["nv_srl"]) - 100000
+        if not 0 <= n < config["size"]:
+            return web.Response(status=404)
+        item = catalog_item(n)
+        html = (f'<html><head><title>{item["title"]}</title>'
+                f'<meta property="og:title" content="{item["title"]}">'
+                f'<meta property="og:description" content="{item["story"]}">'
+                f'<meta property="og:image" content="{item["cover"]}">'
+                f'<meta name="keywords" content="{item["genreText"]},문피아">'
+                f'<meta name="author" content="{item["author"]}"></head><body></body></html>')
+        return web.Response(text=html, content_type="text/html")
+
+    if record:
+        os.makedirs(fixtures, exist_ok=True)
+
+        async def upstream_session(app):
+            app["upstream"] = create_session()
+            yield
+            await app["upstream"].close()
+
+        app.cleanup_ctx.append(upstream_session)
+        handler = proxy
+    elif fixtures:
+        handler = replay
+    else:
+        handler = generate
+    app.router.add_get("/free/getList", handler)
+    app.router.add_get("/pl/getList", handler)
+    if handler is generate:
+        app.router.add_get(r"/{nv_srl:\d+}", detail)
+    return app
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="문피아 목록 API 대역 서버")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--size", type=int, default=MOCK_CONFIG["size"], help="탭마다 내려줄 소설 수")
+    parser.add_argument("--latency", type=float, default=MOCK_CONFIG["latency"] * 1000, help="응답 지연(ms)")
+    parser.add_argument("--jitter", type=float, default=MOCK_CONFIG["jitter"] * 1000, help="지연에 더할 무작위 값의 최대(ms)")
+    parser.add_argument("--p429", type=float, default=0.0, help="429 응답 확률")
+    parser.add_argument("--retry-after", type=int, default=None, help="429 응답의 Retry-After(초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 응답 확률")
+    parser.add_argument("--seed", type=int, default=None, help="429/오류 주입 난수 시드")
+    parser.add_argument("--record", metavar="URL", help="이 주소로 프록시하면서 응답을 --fixtures에 저장")
+    parser.add_argument("--replay", action="store_true", help="--fixtures에 저장한 응답을 재생")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help="픽스처 디렉터리")
+    args = parser.parse_args()
+    setup_logging()
+
+    app = create_app(fixtures=args.fixtures if args.record or args.replay else None, record=args.record,
+                     size=args.size, latency=args.latency / 1000, jitter=args.jitter / 1000, p429=args.p429,
+                     retry_after=args.retry_after, error_rate=args.error_rate, seed=args.seed)
+    web.run_app(app, host=args.host, port=args.port, print=None)
@@ -0,0 +1,107 @@
+import hashlib
+import json_codec
+import sqlite3
+
+CACHE_PATH = "page_cache.db"
+
+
+def page_digest(body):
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class PageList(list):
+    """content.list에 응답 본문 digest와 검증자(ETag/Last-Modified)를 붙인 것"""
+
+    def __init__(self, items, digest=None, etag=None, last_modified=None):
+        super().__init__(items)
+        self.digest = digest
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class CachedPage:
+    """지난 실행과 내용이 같은 페이지. 파싱 없이 소설 id와 최신 updatedate만 넘겨줌"""
+
+    def __init__(self, ids, newest):
+        self.ids = ids
+        self.newest = newest
+
+    def __bool__(self):
+        return True  # 빈 페이지(마지막 페이지 이후)와 구분
+
+
+class PageCache:
+    """(탭, 페이지)별 응답 digest와 검증자를 저장해서 바뀌지 않은 페이지는 건너뜀"""
+
+    def __init__(self, path=CACHE_PATH):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS page_cache (
+                tab TEXT,
+                page INTEGER,
+                digest TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                ids TEXT,
+                newest TEXT,
+                updated DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (tab, page)
+            )
+        """)
+        self.entries = {}
+        for tab, page, digest, etag, last_modified, ids, newest in self.conn.execute(
+                "SELECT tab, page, digest, etag, last_modified, ids, newest FROM page_cache"):
+            self.entries[(tab, page)] = (digest, etag, last_modified, ids, newest)
+        self.dirty = {}
+        self.hits = 0
+        self.misses = 0
+
+    def conditional_headers(self, tab_key, page):
+        entry = self.entries.get((tab_key, page))
+        if entry is None:
+            return None
+        _, etag, last_modified, _, _ = entry
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers or None
+
+    def lookup(self, tab_key, page, digest=None):
+        """304 응답(digest=None)이거나 digest가 같으면 CachedPage, 아니면 None"""
+        entry = self.entries.get((tab_key, page))
+        if entry is None or (digest is not None and entry[0] != digest):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CachedPage(json_codec.loads(entry[3]), entry[4])
+
+    def put(self, tab_key, page, page_list, records):
+        """페이지 처리가 끝난 뒤 호출. 다음 실행에서 비교할 digest와 id 목록을 메모리에 모아 둠 (flush에서 기록)"""
+        if not isinstance(page_list, PageList) or page_list.digest is None:
+            return
+        newest = max((str(r.updatedate) for r in records if r.updatedate), default=None)
+        entry = (page_list.digest, page_list.etag, page_list.last_modified,
+                 json_codec.dumps([r.id for r in records]).decode(), newest)
+        self.entries[(tab_key, page)] = entry
+        self.dirty[(tab_key, page)] = entry
+
+    def flush(self):
+        """모아 둔 항목을 기록. 스냅샷/DB 저장이 모두 성공한 뒤에만 호출해야 함"""
+        if not self.dirty:
+            return
+        self.conn.executemany("""
+            INSERT OR REPLACE INTO page_cache (tab, page, digest, etag, last_modified, ids, newest)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [(tab, page, *entry) for (tab, page), entry in self.dirty.items()])
+        self.conn.commit()
+        self.dirty = {}
+
+    def report(self):
+        return f"페이지 캐시 적중 {self.hits}회, 미적중 {self.misses}회"
+
+    def close(self):
+        """flush하지 않은 항목은 버림 (저장에 실패한 실행의 페이지는 다음 실행에서 다시 처리)"""
+        self.dirty = {}
+        self.conn.close()
@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from store import novel_to_dict, open_writer, rewrite_membership
+import DB_processing
+import DB_connect
+
+# 크롤러 → 파이프라인 큐에 쌓아둘 페이지 수 (가득 차면 크롤러가 기다림)
+QUEUE_SIZE = 64
+# 싱크에 한 번에 넘길 레코드 수
+BATCH_SIZE = 500
+
+logger = logging.getLogger("pipeline")
+
+
+class ThreadSink:
+    """블로킹 DB 작업을 전용 스레드 하나에서 순서대로 처리하는 싱크"""
+
+    name = "sink"
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.name)
+        self.dt = datetime.now()
+
+    async def write(self, rows):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.write_rows, rows)
+
+    async def close(self, failed=False):
+        """정상 종료면 finish(), 크롤링/다른 싱크가 실패했으면 abort()"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.abort if failed else self.finish)
+        self.executor.shutdown()
+
+    def write_rows(self, rows):
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+    def abort(self):
+        # 배치마다 커밋하는 싱크는 이미 저장한 만큼은 그대로 두고 정리만 함
+        self.finish()
+
+
+class JsonSink(ThreadSink):
+    name = "json"
+
+    def __init__(self, path="Munpia_novel_info.json", dictionary=False, membership=None):
+        super().__init__()
+        self.path = path
+        self.dictionary = dictionary
+        self.membership = membership  # 있으면 나중 탭에서 합쳐진 소속을 끝날 때 반영 (merge.NovelMerger.membership)
+        self.written = {}  # id -> 기록할 때의 (탭 수, sort_option 수)
+        self.store = None
+
+    def write_rows(self, rows):
+        if self.store is None:
+            self.store = open_writer(self.path, self.dictionary)
+        if self.membership is not None:
+            # 크롤러가 목록을 계속 늘리므로 직렬화하기 전에 길이를 재둠 (그 사이 늘어난 것은 끝날 때 다시 씀)
+            for row in rows:
+                self.written[row["id"]] = (len(row["tabs"]), len(row["sort_options"]))
+        self.store.write(rows)
+
+    def finish(self):
+        if self.store is None:
+            self.store = open_writer(self.path, self.dictionary)
+        self.store.close()
+        if self.membership is None:
+            return
+        stale = sum(1 for n_id, sizes in self.written.items() if sizes != tuple(map(len, self.membership[n_id])))
+        if stale:
+            rewrite_membership(self.path, self.membership, self.dictionary)
+            logger.info("나중 탭에서 합쳐진 소속 %s건을 %s에 반영", stale, self.path)
+
+    def abort(self):
+        # 일부만 담긴 스냅샷을 공개하지 않음 (임시 파일만 지우고 기존 스냅샷 유지)
+        if self.store is not None:
+            self.store.abort()
+
+
+class SqliteSink(ThreadSink):
+    name = "sqlite"
+
+    def __init__(self, db_path='munpia_novel.db'):
+        super().__init__()
+        self.db_path = db_path
+        self.conn = None
+        self.total = []
+
+    def write_rows(self, rows):
+        # sqlite 연결은 만든 스레드에서만 쓸 수 있으므로 싱크 스레드 안에서 연다
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_path)
+            DB_processing.create_table(self.conn.cursor())
+        DB_processing.store_novels(self.conn.cursor(), rows, self.dt, self.total)
+        self.conn.commit()
+
+    def finish(self):
+        if self.conn is not None:
+            self.conn.close()
+        if self.total:
+            DB_processing.change_log(self.total)
+
+
+class PgCopySink(ThreadSink):
+    name = "pg"
+
+    def __init__(self):
+        super().__init__()
+        self.update_log = []
+
+    def write_rows(self, rows):
+        self.update_log.extend(DB_connect.store_db_munpia_pg_copy_rows(rows, self.dt))
+
+    def finish(self):
+        if self.update_log:
+            DB_connect.write_update_log(self.update_log, 'munpia-stream')
+
+
+class StreamPipeline:
+    """크롤러가 파싱한 레코드를 제한된 큐를 거쳐 배치 단위로 싱크에 바로 흘려보냄
+
+    크롤러는 put()으로 페이지 단위 레코드를 넣기만 하고, DB 작업은 네트워크 대기와 겹쳐서 진행된다.
+    큐 크기가 제한되어 있어 싱크가 느려도 메모리는 늘어나지 않는다.
+    """
+
+    def __init__(self, sinks, batch_size=BATCH_SIZE, queue_size=QUEUE_SIZE):
+        self.sinks = sinks
+        self.batch_size = batch_size
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.count = 0
+        self.unchanged = 0  # 페이지 캐시로 건너뛴(변경 없는) 레코드 수
+        self.failed = False  # 크롤링이 실패해서 남은 레코드를 버리고 싱크를 abort
+        self.task = None
+
+    async def __aenter__(self):
+        self.task = asyncio.create_task(self.run())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            if not self.task.done():
+                await self.put(None)
+            await self.task
+            return
+        # 크롤링이 실패하면 큐에 남은 레코드를 버리고 종료 신호만 넣음 (싱크는 abort)
+        self.failed = True
+        if not self.task.done():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+        # 원래 예외를 그대로 올리도록 싱크 쪽 오류는 삼킴
+        await asyncio.gather(self.task, return_exceptions=True)
+
+    async def put(self, records):
+        """큐에 레코드를 넣음. 싱크가 오류로 멈췄으면 기다리지 않고 그 오류를 그대로 올림"""
+        if self.task.done():
+            self.task.result()
+        if not self.queue.full():
+            self.queue.put_nowait(records)
+            return
+        putter = asyncio.ensure_future(self.queue.put(records))
+        await asyncio.wait({putter, self.task}, return_when=asyncio.FIRST_COMPLETED)
+        if not putter.done():
+            putter.cancel()
+            self.task.result()
+
+    def mark_unchanged(self, count):
+        """변경 없는 페이지의 레코드는 싱크에 보낼 필요가 없으므로 개수만 기록"""
+        self.unchanged += count
+
+    async def run(self):
+        batch = []
+        completed = False
+        try:
+            while True:
+                records = await self.queue.get()
+                if records is None:
+                    break
+                batch.extend(records)
+                if len(batch) >= self.batch_size:
+                    await self.flush(batch)
+                    batch = []
+            if batch and not self.failed:
+                await self.flush(batch)
+            completed = not self.failed
+        finally:
+            for sink in self.sinks:
+                await sink.close(failed=not completed)
+
+    async def flush(self, batch):
+        rows = [novel_to_dict(novel) for novel in batch]
+        await asyncio.gather(*(sink.write(rows) for sink in self.sinks))
+        self.count += len(rows)
+        logger.debug("파이프라인 %d건 저장 (변경 없음 %d건)", self.count, self.unchanged)
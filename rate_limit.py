@@ -0,0 +1,88 @@
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+# 초기/최소/최대 초당 요청 수
+INITIAL_RATE = 10.0
+MIN_RATE = 0.2
+MAX_RATE = 200.0
+
+
+def parse_retry_after(value):
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 대기 초로 변환. 해석할 수 없으면 None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class RateController:
+    """세션의 모든 요청이 공유하는 토큰 버킷 요청 속도 조절기
+
+    정상 응답이 오면 속도를 조금씩 올리고(가산 증가), 429가 오면 절반으로 줄인다(승산 감소).
+    Retry-After가 있으면 그 시간 동안 모든 요청을 멈춘다.
+    """
+
+    def __init__(self, rate=INITIAL_RATE, min_rate=MIN_RATE, max_rate=MAX_RATE, increase=1.0, decrease=0.5):
+        self.rate = float(rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase  # 약 1초 분량의 정상 응답마다 올릴 초당 요청 수
+        self.decrease = decrease
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.throttled = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def capacity(self):
+        # 버스트는 1초 분량까지만 허용
+        return max(1.0, self.rate)
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """요청 하나를 보낼 수 있을 때까지 대기"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_throttle(self, retry_after=None):
+        """429 응답 처리. 동시에 날아간 요청들의 429로 여러 번 줄어들지 않도록 1초에 한 번만 감속"""
+        now = time.monotonic()
+        self.throttled += 1
+        if now - self.last_decrease >= 1.0:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.last_decrease = now
+        self.tokens = 0.0
+        self.updated = now
+        if retry_after:
+            self.paused_until = max(self.paused_until, now + retry_after)
+        return retry_after if retry_after else 1.0 / self.rate
+
+    def report(self):
+        return f"요청 속도 {self.rate:.2f}회/초 (429 {self.throttled}회)"
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from datetime import datetime
+import json_codec
+
+# 페이지 하나당 최대 시도 횟수 (429는 속도 조절기가 따로 처리하므로 세지 않음)
+MAX_ATTEMPTS = 4
+# 재시도 대기: 0 ~ min(BACKOFF_CAP, BACKOFF_BASE * 2^시도) 사이 무작위 (full jitter)
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+# 호스트에 연속으로 이만큼 실패하면 회로를 열고 모든 탭의 요청을 멈춤
+BREAKER_THRESHOLD = 8
+BREAKER_COOLDOWN = 5.0
+BREAKER_MAX_COOLDOWN = 300.0
+# 반열림 상태의 시험 요청이 이 시간 안에 끝나지 않으면 다른 요청으로 다시 시험
+HALF_OPEN_TIMEOUT = 60.0
+DEAD_LETTER_PATH = "dead_letter.json"
+
+logger = logging.getLogger("retry")
+
+
+class RetryPolicy:
+    """네트워크 오류/5xx 응답을 지터를 준 지수 백오프로 재시도하는 정책"""
+
+    def __init__(self, max_attempts=MAX_ATTEMPTS, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+        self.max_attempts = max(1, max_attempts)
+        self.base = base
+        self.cap = cap
+        self.retries = 0
+
+    @staticmethod
+    def is_retryable(status):
+        return status is None or status == 408 or status >= 500
+
+    def delay(self, attempt):
+        """attempt번째 실패 후 기다릴 시간(초)"""
+        return random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+
+    async def backoff(self, attempt):
+        self.retries += 1
+        await asyncio.sleep(self.delay(attempt))
+
+
+class CircuitBreaker:
+    """호스트 하나의 회로 차단기
+
+    닫힘: 요청을 그대로 보냄. 연속 실패가 threshold에 이르면 열림.
+    열림: cooldown 동안 이 호스트로 가는 모든 요청이 wait()에서 멈춤.
+    반열림: cooldown이 지나면 요청 하나만 시험으로 보내서, 성공하면 닫고 실패하면 더 길게 다시 연다.
+    """
+
+    def __init__(self, host, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN, max_cooldown=BREAKER_MAX_COOLDOWN):
+        self.host = host
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.open_until = 0.0
+        self.probe_started = 0.0
+        self.trips = 0
+        self._closed = asyncio.Event()
+        self._closed.set()
+
+    async def wait(self):
+        """요청을 보내도 될 때까지 대기"""
+        while self.state != "closed":
+            now = time.monotonic()
+            if self.state == "open" and now >= self.open_until:
+                self.state = "half_open"
+                self.probe_started = now
+                return  # 이 요청이 시험 요청
+            if self.state == "half_open" and now - self.probe_started >= HALF_OPEN_TIMEOUT:
+                self.probe_started = now
+                return
+            timeout = self.open_until - now if self.state == "open" else 1.0
+            try:
+                await asyncio.wait_for(self._closed.wait(), max(timeout, 0.01))
+            except asyncio.TimeoutError:
+                pass
+
+    def record_success(self):
+        if self.state != "closed":
+            logger.info("%s 응답 회복, 회로 닫음", self.host)
+            self._closed.set()
+        self.state = "closed"
+        self.failures = 0
+        self.cooldown = self.base_cooldown
+
+    def record_throttle(self):
+        """429 응답. 닫힌 상태에서는 속도 조절기가 처리하므로 세지 않고, 시험 요청이었으면 실패로 보고 다시 엶
+
+        반열림 상태로 두면 429 뒤에 재시도하는 시험 요청이 wait()에서 자기 자신을 HALF_OPEN_TIMEOUT까지 기다린다.
+        """
+        if self.state == "half_open":
+            self.record_failure()
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open":
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            self._open()
+        elif self.state == "closed" and self.failures >= self.threshold:
+            self._open()
+
+    def _open(self):
+        self.state = "open"
+        self.trips += 1
+        self.open_until = time.monotonic() + self.cooldown
+        self._closed.clear()
+        logger.warning("%s 연속 %s회 실패, %.1f초 동안 모든 요청 중지", self.host, self.failures, self.cooldown)
+
+
+class HostBreakers:
+    """호스트별 회로 차단기 모음"""
+
+    def __init__(self, **options):
+        self.options = options
+        self.breakers = {}
+
+    def get(self, host):
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = self.breakers[host] = CircuitBreaker(host, **self.options)
+        return breaker
+
+    def report(self):
+        return ", ".join(f"{host} 차단 {b.trips}회" for host, b in self.breakers.items()) or "차단 없음"
+
+
+class DeadLetterQueue:
+    """재시도를 다 써도 실패한 페이지 목록. (탭, 페이지)별로 하나씩 파일에 저장해 --redrive로 다시 가져옴"""
+
+    def __init__(self, path=DEAD_LETTER_PATH):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            for entry in json_codec.load_file(path):
+                self.entries[(entry["tab"], entry["page"])] = entry
+
+    def add(self, tab, page, url, error, attempts):
+        key = (tab["key"], page)
+        previous = self.entries.get(key)
+        self.entries[key] = {
+            "tab": tab["key"],
+            "page": page,
+            "url": url,
+            "error": error,
+            "attempts": attempts + (previous["attempts"] if previous else 0),
+            "failed_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        logger.error("%s %s페이지 %s회 시도 후 실패, 실패 목록에 추가 (%s)", tab['label'], page, attempts, error)
+
+    def discard(self, tab_key, page):
+        """나중에 성공한 페이지는 목록에서 뺌"""
+        self.entries.pop((tab_key, page), None)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(sorted(self.entries.values(), key=lambda e: (e["tab"], e["page"])))
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        json_codec.dump_file(list(self), tmp_path, indent=True)
+        os.replace(tmp_path, self.path)
+        if self.entries:
+            logger.warning("실패한 페이지 %s개를 %s에 저장 (--redrive로 다시 가져올 수 있음)", len(self.entries), self.path)
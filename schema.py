@@ -0,0 +1,441 @@
+"""목록 API 항목(content.list)을 NovelInfo로 바꾸는 필드 정의와 추출기
+
+FIELDS에서 추출 함수를 한 번 만들어 두고, 페이지마다 항목 하나를 한 번의 함수 호출로 변환한다.
+숫자는 파싱할 때 int로 바꾸고, 필드가 빠지거나 숫자가 아닌 항목은 건너뛰고 개수만 센다.
+"""
+import datetime
+import logging
+import math
+import re
+import time
+import numpy as np
+from info import NovelInfo
+
+NOVEL_URL = "https://novel.munpia.com/"
+
+# (NovelInfo 인자, 원본 키, 변환) - NovelInfo.__init__ 인자 순서와 같음
+#   raw: 그대로 / int: "1,234" 같은 문자열도 int로 / url: NOVEL_URL + 값 / const: 원본 키 자리의 값을 그대로 사용
+#   intern: 값 종류가 적은 문자열(작가, 장르, 정렬 코드). 추출기마다 같은 값은 한 객체를 공유
+#   epoch: 원본 에포크 값 (registdate/updatedate, to_epoch로 검사한 뒤 페이지 단위로 모아서 convert_timestamps_batch로 변환)
+FIELDS = (
+    ("platform", "Munpia", "const"),
+    ("id", "nvSrl", "raw"),
+    ("title", "title", "raw"),
+    ("info", "story", "raw"),
+    ("author", "author", "intern"),
+    ("href", "nvSrl", "url"),
+    ("thumbnail", "cover", "raw"),
+    ("tag", "genreText", "intern"),
+    ("the_number_of_serials", "sumEntry", "int"),
+    ("chapter", "sumEntry", "int"),
+    ("view", "nvSumHit", "int"),
+    ("newstatus", "isNew", "raw"),
+    ("finishstatus", "isFinish", "raw"),
+    ("agegrade", "isAdult", "raw"),
+    ("registdate", "nvTimeReg", "epoch"),
+    ("updatedate", "nvTimeUpdate", "epoch"),
+    ("sort_option", "nvNgCode", "intern"),
+)
+
+# 항목을 건너뛰게 만드는 오류 (필드 누락, 숫자가 아닌 값, dict가 아닌 항목)
+MALFORMED_ERRORS = (KeyError, TypeError, ValueError, AttributeError)
+
+logger = logging.getLogger("schema")
+
+
+# nvTimeUpdate 변환을 위한 상수
+NVTIME_CONSTANT = 9999990400
+
+# datetime으로 나타낼 수 있는 초 범위 (0001-01-01 00:00:00 ~ 9999-12-31 23:59:59)
+MIN_EPOCH = -62135596800
+MAX_EPOCH = 253402300799
+# 이보다 큰 값은 int64 계산이 넘치지 않도록 무효로 취급
+EPOCH_LIMIT = 2 ** 53
+# 이보다 적은 건수는 NumPy 호출 비용이 더 커서 레코드별로 변환
+# 손익분기는 약 60건. 한 페이지(30건)씩 배치로 돌리면 오히려 레코드별보다 느리고 (benchmark.py timestamps: 0.9배),
+# crawler.PARSE_PAGES(8페이지, 약 240건)만큼 모아야 이득이 남
+BATCH_MIN = 64
+
+
+def epoch_array(values):
+    """원시 에포크 값 목록을 int64 배열로. None/0/숫자가 아닌 값은 0(무효)"""
+    return np.fromiter((int(v) if isinstance(v, (int, float)) and abs(v) < EPOCH_LIMIT else 0 for v in values),
+                       dtype=np.int64, count=len(values))
+
+
+def local_datetimes(seconds, valid):
+    """UTC 에포크 초 배열을 fromtimestamp와 같은 지역 시각 datetime 목록으로 변환. valid가 아니거나 범위 밖이면 None"""
+    if valid.any():
+        # 지역 시간대 오프셋. 배치의 처음/끝이 같으면(한국처럼 서머타임이 없으면) 한 번에 더함
+        lo, hi = int(seconds[valid].min()), int(seconds[valid].max())
+        try:
+            offsets = [time.localtime(t).tm_gmtoff for t in (lo, hi)]
+        except (OverflowError, OSError, ValueError):
+            offsets = [None, None]
+        if offsets[0] is not None and offsets[0] == offsets[1]:
+            local = seconds + offsets[0]
+        else:
+            local = seconds + np.fromiter((local_offset(int(t)) for t in seconds), dtype=np.int64, count=len(seconds))
+        valid &= (local >= MIN_EPOCH) & (local <= MAX_EPOCH)
+    else:
+        local = seconds
+    stamps = np.where(valid, local, 0).astype("datetime64[s]")
+    stamps[~valid] = np.datetime64("NaT")
+    return stamps.astype(object).tolist()
+
+
+def local_offset(seconds):
+    try:
+        return time.localtime(seconds).tm_gmtoff
+    except (OverflowError, OSError, ValueError):
+        return 0
+
+
+def convert_timestamps_batch(reg_values, update_values):
+    """페이지/스냅샷 단위로 nvTimeReg, nvTimeUpdate 목록을 한 번에 datetime 목록으로 변환"""
+    if len(reg_values) < BATCH_MIN:
+        pairs = [convert_timestamps(r, u) for r, u in zip(reg_values, update_values)]
+        return [r for r, _ in pairs], [u for _, u in pairs]
+    reg = epoch_array(reg_values)
+    update = epoch_array(update_values)
+    # nvTimeUpdate는 NVTIME_CONSTANT에서 뺀 값이 실제 시각
+    return local_datetimes(reg, reg != 0), local_datetimes(NVTIME_CONSTANT - update, update != 0)
+
+
+def convert_timestamps(nvTimeReg, nvTimeUpdate):
+    """nvTimeReg와 nvTimeUpdate를 실제 날짜시간으로 변환 (레코드 하나용, 여러 건은 convert_timestamps_batch)"""
+    registdate = None
+    updatedate = None
+
+    if nvTimeReg and nvTimeReg != 0:
+        try:
+            registdate = datetime.datetime.fromtimestamp(nvTimeReg)
+        except (ValueError, OSError, OverflowError, TypeError):
+            registdate = None
+
+    if nvTimeUpdate and nvTimeUpdate != 0:
+        try:
+            actual_timestamp = NVTIME_CONSTANT - nvTimeUpdate
+            updatedate = datetime.datetime.fromtimestamp(actual_timestamp)
+        except (ValueError, OSError, OverflowError, TypeError):
+            updatedate = None
+
+    return registdate, updatedate
+
+
+def to_int(value):
+    """숫자 필드 변환. 목록 API는 회차 수를 "1,234"처럼 문자열로 줌"""
+    if value.__class__ is int:
+        return value
+    if isinstance(value, str):
+        return int(value.replace(",", ""))
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    raise ValueError(f"숫자가 아닌 값: {value!r}")
+
+
+def to_epoch(value):
+    """에포크 필드 변환. 없으면 0(날짜 없음), 숫자 문자열은 int로, 숫자가 아니거나 EPOCH_LIMIT를 넘으면 ValueError
+
+    배치/레코드별 변환이 같은 정수 값만 받도록 추출 단계에서 걸러서 잘못된 항목으로 센다.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        value = to_int(value)
+    elif isinstance(value, float) and math.isfinite(value):
+        value = int(value)  # 소수 초는 버림 (배치 변환과 같은 초 단위)
+    elif value.__class__ is not int:
+        raise ValueError(f"숫자가 아닌 에포크: {value!r}")
+    if abs(value) >= EPOCH_LIMIT:
+        raise ValueError(f"범위를 벗어난 에포크: {value!r}")
+    return value
+
+
+def compile_extractor(fields=FIELDS, record_type=NovelInfo, strings=None):
+    """필드 정의로 항목 하나 -> 레코드 변환 함수의 소스를 만들어 컴파일
+
+    같은 원본 키/변환은 한 번만 계산하고, epoch 필드는 원본 값을 그대로 넣어 둔다 (페이지 단위로 나중에 변환).
+    intern 필드는 strings(값 -> 같은 값의 첫 객체)에 모아서 레코드끼리 문자열 객체를 공유한다.
+    """
+    lines = ["def extract(i):"]
+    names = {}
+    args = []
+    for index, (name, key, kind) in enumerate(fields):
+        if kind == "const":
+            args.append(f"constants[{index}]")
+            continue
+        if (key, kind) not in names:
+            var = names[(key, kind)] = f"v{len(names)}"
+            if kind == "raw":
+                lines.append(f"    {var} = i[{key!r}]")
+            elif kind == "int":
+                lines.append(f"    {var} = to_int(i[{key!r}])")
+            elif kind == "intern":
+                lines.append(f"    {var} = i[{key!r}]")
+                lines.append(f"    {var} = intern({var}, {var})")
+            elif kind == "url":
+                lines.append(f"    {var} = NOVEL_URL + str(i[{key!r}])")
+            elif kind == "epoch":
+                lines.append(f"    {var} = to_epoch(i.get({key!r}))")
+            else:
+                raise ValueError(f"알 수 없는 변환: {name} {kind}")
+        args.append(names[(key, kind)])
+    lines.append(f"    return record_type({', '.join(args)})")
+    namespace = {
+        "to_int": to_int,
+        "to_epoch": to_epoch,
+        "NOVEL_URL": NOVEL_URL,
+        "record_type": record_type,
+        "constants": [key for _, key, _ in fields],
+        "intern": (strings if strings is not None else {}).setdefault,
+    }
+    exec(compile("\n".join(lines), "<schema.extract>", "exec"), namespace)
+    return namespace["extract"]
+
+
+class NovelExtractor:
+    """목록 페이지(content.list)를 NovelInfo 목록으로 변환하고 잘못된 항목 수를 셈"""
+
+    def __init__(self, fields=FIELDS, record_type=NovelInfo):
+        self.strings = {}  # intern 필드 값 모음 (크롤링 내내 유지, 작가/장르 수만큼만 커짐)
+        self.extract = compile_extractor(fields, record_type, self.strings)
+        self.malformed = 0
+
+    def parse(self, items):
+        return self.parse_pages([items])[0]
+
+    def parse_pages(self, pages):
+        """여러 페이지를 한 번에 파싱해서 페이지별 레코드 목록으로. 날짜는 전체를 한 번에 변환 (BATCH_MIN 이상이면 NumPy)"""
+        extract = self.extract
+        parsed = []
+        records = []
+        for items in pages:
+            page_records = []
+            for item in items:
+                try:
+                    page_records.append(extract(item))
+                except MALFORMED_ERRORS as e:
+                    self.malformed += 1
+                    logger.debug("잘못된 항목 건너뜀 (%r): %s", e, item)
+            parsed.append(page_records)
+            records.extend(page_records)
+        if records:
+            registdates, updatedates = convert_timestamps_batch([r.registdate for r in records],
+                                                                [r.updatedate for r in records])
+            for record, registdate, updatedate in zip(records, registdates, updatedates):
+                record.registdate = registdate
+                record.updatedate = updatedate
+        return parsed
+
+
+# 저장 형식 공통 필드 정의: (스냅샷 JSON 키 = NovelInfo 속성, DB 열 이름, 종류)
+#   DB 열은 sqlite novel 테이블과 PG munpia 테이블이 같음. None이면 스냅샷에만 있는 필드
+#   종류: int / bool / date / text / raw(스냅샷에만 그대로)
+RECORD_FIELDS = (
+    ("platform", "platform", "text"),
+    ("id", "id", "int"),
+    ("title", "title", "text"),
+    ("info", "info", "text"),
+    ("author", "author", "text"),
+    ("href", "location", "text"),
+    ("thumbnail", "thumbnail", "text"),
+    ("tag", "tags", "text"),
+    ("the_number_of_serials", "chapter", "int"),
+    ("view", "views", "int"),
+    ("newstatus", "newstatus", "bool"),
+    ("finishstatus", "finishstatus", "bool"),
+    ("agegrade", "agegrade", "bool"),
+    ("registdate", "registdate", "date"),
+    ("updatedate", "updatedate", "date"),
+    ("sort_option", None, "raw"),
+    ("tabs", None, "raw"),
+    ("sort_options", None, "raw"),
+)
+# 스냅샷 레코드 키 순서
+SNAPSHOT_KEYS = [key for key, _, _ in RECORD_FIELDS]
+# 스냅샷에 문자열로 저장되는 날짜 키 (DB 적재 전에 decode_dates로 datetime으로 되돌림)
+DATE_KEYS = [key for key, _, kind in RECORD_FIELDS if kind == "date"]
+# DB 테이블 열 순서 (id가 처음, 크롤링 시각이 마지막)
+DB_COLUMNS = ["id"] + [column for _, column, _ in RECORD_FIELDS if column not in (None, "id")] + ["crawltime"]
+DB_KINDS = {column: kind for _, column, kind in RECORD_FIELDS if column is not None}
+DB_KINDS["crawltime"] = "date"
+# 스냅샷 키 -> DB 열 (id 제외, DB_connect의 변경 비교용)
+DB_FIELD_MAP = {key: column for key, column, _ in RECORD_FIELDS if column not in (None, "id")}
+# sqlite UPDATE에서 바꾸는 열 (platform은 처음 넣은 값을 유지)
+SQLITE_UPDATE_COLUMNS = [column for column in DB_COLUMNS if column not in ("id", "platform")]
+
+SQLITE_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_BR = re.compile(r'<br\s*/?>', re.IGNORECASE)
+_TAG = re.compile(r'<[^>]+>')
+_SPACE = re.compile(r'\s+')
+
+
+def clean_text(val):
+    if val is None:
+        return ''
+    cleaned = _BR.sub(' ', str(val))
+    cleaned = _TAG.sub('', cleaned)
+    return _SPACE.sub(' ', cleaned).strip()
+
+
+def sqlite_date(value):
+    """datetime은 기존 행과 같은 문자열 형식으로 (sqlite에는 날짜 타입이 없음)"""
+    if isinstance(value, datetime.datetime):
+        return value.strftime(SQLITE_DATE_FORMAT)
+    return value
+
+
+def parse_date(value):
+    """스냅샷의 날짜 문자열을 datetime으로. 비어 있거나 형식이 다르면 None"""
+    if value is None or isinstance(value, datetime.datetime):
+        return value
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def decode_dates(row, keys=DATE_KEYS):
+    """스냅샷 레코드 dict의 날짜 문자열을 datetime으로 바꿈 (제자리 변경, DB 적재용)"""
+    for key in keys:
+        row[key] = parse_date(row.get(key))
+    return row
+
+
+def db_int(val):
+    try:
+        return int(val)
+    except (ValueError, TypeError):
+        return 0
+
+
+def db_date(val, dt):
+    """DB에 넣을 날짜. 없거나 읽을 수 없으면 dt(이번 저장 시각)"""
+    if isinstance(val, datetime.datetime):
+        return val
+    if val is None:
+        return dt
+    try:
+        return datetime.datetime.fromisoformat(str(val))
+    except Exception:
+        return dt
+
+
+def db_text(val):
+    if val is None or val == '':
+        return None
+    return clean_text(val)
+
+
+def compile_function(name, args, body, namespace):
+    source = f"def {name}({args}):\n" + "\n".join(f"    {line}" for line in body)
+    namespace = dict(namespace)
+    exec(compile(source, f"<schema.{name}>", "exec"), namespace)
+    return namespace[name]
+
+
+CODEC_HELPERS = {
+    "NovelInfo": NovelInfo,
+    "parse_date": parse_date,
+    "sqlite_date": sqlite_date,
+    "db_int": db_int,
+    "db_date": db_date,
+    "db_text": db_text,
+    "clean_text": clean_text,
+}
+
+
+def db_value_expr(kind, value):
+    """DB 파라미터 값 식 (psycopg2 executemany용)"""
+    if kind == "int":
+        return f"db_int({value})"
+    if kind == "bool":
+        return f"bool({value})"
+    if kind == "date":
+        return f"db_date({value}, dt)"
+    return f"db_text({value})"
+
+
+def copy_value_expr(kind, value):
+    """COPY ... FORMAT CSV 한 칸의 값 식"""
+    if kind == "int":
+        return f"db_int({value})"
+    if kind == "bool":
+        return f"('t' if {value} else 'f')"
+    if kind == "date":
+        return f"db_date({value}, dt).isoformat()"
+    return f"clean_text({value})"
+
+
+def compile_codecs(fields=RECORD_FIELDS):
+    """필드 정의 하나에서 저장 형식별 변환 함수를 만들어 dict로 반환"""
+    keys = [key for key, _, _ in fields]
+    sqlite_source = {column: key for key, column, _ in fields if column is not None}
+    codecs = {}
+    # NovelInfo -> 스냅샷 dict (Munpia_novel_info.json 레코드)
+    codecs["encode_dict"] = compile_function(
+        "encode_dict", "r", ["return {" + ", ".join(f"{key!r}: r.{key}" for key in keys) + "}"], CODEC_HELPERS)
+    # NovelInfo -> 모든 속성 dict (NovelInfo.to_dict)
+    codecs["encode_attrs"] = compile_function(
+        "encode_attrs", "r", ["return {" + ", ".join(f"{name!r}: r.{name}" for name in NovelInfo.__slots__) + "}"],
+        CODEC_HELPERS)
+    # 스냅샷 dict -> NovelInfo (날짜는 datetime으로)
+    init_args = [name for name in NovelInfo.__slots__ if name not in ("tabs", "sort_options")]
+    values = []
+    for name in init_args:
+        key = "the_number_of_serials" if name == "chapter" else name
+        kind = next(kind for k, _, kind in fields if k == key)
+        values.append(f"parse_date(d.get({key!r}))" if kind == "date" else f"d[{key!r}]")
+    codecs["decode_dict"] = compile_function("decode_dict", "d", [
+        f"r = NovelInfo({', '.join(values)})",
+        "r.tabs = d.get('tabs', r.tabs)",
+        "r.sort_options = d.get('sort_options', r.sort_options)",
+        "return r",
+    ], CODEC_HELPERS)
+    # PG 변경분 dict(DB 열 이름) -> executemany 파라미터 / COPY CSV 한 줄
+    codecs["encode_pg_params"] = compile_function("encode_pg_params", "row, dt", [
+        "get = row.get",
+        "return (" + ", ".join(db_value_expr(DB_KINDS[c], f"get({c!r})") for c in DB_COLUMNS) + ",)",
+    ], CODEC_HELPERS)
+    codecs["encode_copy_row"] = compile_function("encode_copy_row", "row, dt", [
+        "get = row.get",
+        "return [" + ", ".join(copy_value_expr(DB_KINDS[c], f"get({c!r})") for c in DB_COLUMNS) + "]",
+    ], CODEC_HELPERS)
+
+    # 스냅샷 dict -> sqlite INSERT / UPDATE 파라미터
+    def sqlite_expr(column):
+        if column == "crawltime":
+            return "dt"
+        value = f"d[{sqlite_source[column]!r}]"
+        return f"sqlite_date({value})" if DB_KINDS[column] == "date" else value
+
+    codecs["encode_sqlite_insert"] = compile_function(
+        "encode_sqlite_insert", "d, dt", ["return (" + ", ".join(sqlite_expr(c) for c in DB_COLUMNS) + ",)"],
+        CODEC_HELPERS)
+    codecs["encode_sqlite_update"] = compile_function(
+        "encode_sqlite_update", "d, dt",
+        ["return (" + ", ".join(sqlite_expr(c) for c in SQLITE_UPDATE_COLUMNS + ["id"]) + ",)"], CODEC_HELPERS)
+    # sqlite 기존 행(SELECT *)과 스냅샷 dict 비교 -> {스냅샷 키: {"before", "after"}}
+    body = ["changes = {}"]
+    for index, column in enumerate(DB_COLUMNS):
+        if column in ("id", "crawltime"):
+            continue
+        key = sqlite_source[column]
+        body.append(f"v = {sqlite_expr(column)}")
+        body.append(f"if row[{index}] != v: changes[{key!r}] = {{'before': row[{index}], 'after': v}}")
+    body.append("return changes")
+    codecs["sqlite_changes"] = compile_function("sqlite_changes", "row, d", body, CODEC_HELPERS)
+    return codecs
+
+
+_CODECS = compile_codecs()
+encode_dict = _CODECS["encode_dict"]
+encode_attrs = _CODECS["encode_attrs"]
+decode_dict = _CODECS["decode_dict"]
+encode_pg_params = _CODECS["encode_pg_params"]
+encode_copy_row = _CODECS["encode_copy_row"]
+encode_sqlite_insert = _CODECS["encode_sqlite_insert"]
+encode_sqlite_update = _CODECS["encode_sqlite_update"]
+sqlite_changes = _CODECS["sqlite_changes"]
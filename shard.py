@@ -0,0 +1,307 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+import json_codec
+from client import create_session
+from crawler import Crawler, FREE_TABS, PL_TABS, TABS, WINDOW_SIZE, BASE_URL
+from logger import setup_logging
+from merge import NovelMerger
+from rate_limit import RateController, INITIAL_RATE
+from retry import HostBreakers
+import event_loop
+from store import novel_to_dict, open_writer
+
+SHARD_DB = "shard_queue.db"
+# 작업 단위 하나에 들어가는 페이지 수
+UNIT_PAGES = 50
+# 리스(lease) 유지 시간. 워커는 이 시간의 1/3마다 갱신하고, 갱신이 끊기면 다른 워커가 가져감
+LEASE_SECONDS = 60
+# 이 횟수만큼 가져갔는데도 끝나지 않은 작업 단위는 실패로 처리
+MAX_ATTEMPTS = 5
+
+logger = logging.getLogger("shard")
+
+
+class LeaseQueue:
+    """(탭, 페이지 범위) 작업 단위를 SQLite 테이블에 두고 리스 방식으로 나눠주는 작업 큐
+
+    여러 프로세스(공유 파일이면 다른 머신도)가 같은 DB 파일로 작업을 가져간다.
+    결과는 작업 완료와 같은 트랜잭션으로 저장되므로 워커가 죽어도 중복/유실이 없다.
+    """
+
+    def __init__(self, path=SHARD_DB, lease_seconds=LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        # 트랜잭션은 직접 관리 (BEGIN IMMEDIATE로 쓰기 잠금을 먼저 잡음)
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS work_units (
+                id INTEGER PRIMARY KEY,
+                tab TEXT,
+                start_page INTEGER,
+                end_page INTEGER,
+                extend INTEGER DEFAULT 0,
+                status TEXT DEFAULT 'pending',
+                owner TEXT,
+                lease_until REAL,
+                attempts INTEGER DEFAULT 0,
+                pages INTEGER
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS unit_results (
+                unit_id INTEGER PRIMARY KEY,
+                records BLOB
+            )
+        """)
+
+    def reset(self, units):
+        """기존 작업을 지우고 (tab_key, start_page, end_page, extend) 목록으로 새로 채움"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.execute("DELETE FROM work_units")
+        self.conn.execute("DELETE FROM unit_results")
+        self.conn.executemany("INSERT INTO work_units (tab, start_page, end_page, extend) VALUES (?, ?, ?, ?)",
+                              [(tab_key, start, end, int(extend)) for tab_key, start, end, extend in units])
+        self.conn.execute("COMMIT")
+
+    def claim(self, owner):
+        """대기 중이거나 리스가 만료된 작업 단위 하나를 가져감. 없으면 None"""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute("""
+                UPDATE work_units SET status = 'failed'
+                WHERE status = 'leased' AND lease_until < ? AND attempts >= ?
+            """, (now, MAX_ATTEMPTS))
+            row = self.conn.execute("""
+                SELECT id, tab, start_page, end_page, extend, attempts FROM work_units
+                WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?)
+                ORDER BY id LIMIT 1
+            """, (now,)).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            unit_id, tab_key, start, end, extend, attempts = row
+            if attempts:
+                logger.warning("작업 %s (%s %s~%s페이지) 리스 만료, 다시 가져감", unit_id, tab_key, start, end)
+            self.conn.execute("""
+                UPDATE work_units SET status = 'leased', owner = ?, lease_until = ?, attempts = attempts + 1
+                WHERE id = ?
+            """, (owner, now + self.lease_seconds, unit_id))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return {"id": unit_id, "tab": tab_key, "start_page": start, "end_page": end, "extend": bool(extend)}
+
+    def renew(self, unit_id, owner):
+        """리스 연장. 이미 다른 워커가 가져갔으면 False"""
+        cur = self.conn.execute("""
+            UPDATE work_units SET lease_until = ?
+            WHERE id = ? AND owner = ? AND status = 'leased'
+        """, (time.time() + self.lease_seconds, unit_id, owner))
+        return cur.rowcount == 1
+
+    def complete(self, unit_id, owner, rows, pages):
+        """결과 저장과 완료 표시를 한 트랜잭션으로. 리스를 잃었으면 버리고 False"""
+        blob = json_codec.dumps(rows)
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = self.conn.execute("""
+                UPDATE work_units SET status = 'done', pages = ?
+                WHERE id = ? AND owner = ? AND status = 'leased'
+            """, (pages, unit_id, owner))
+            if cur.rowcount != 1:
+                self.conn.execute("ROLLBACK")
+                return False
+            self.conn.execute("INSERT OR REPLACE INTO unit_results (unit_id, records) VALUES (?, ?)", (unit_id, blob))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def remaining(self):
+        """아직 끝나지 않은(대기/진행 중) 작업 단위 수"""
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM work_units WHERE status IN ('pending', 'leased')").fetchone()[0]
+
+    def report(self):
+        counts = dict(self.conn.execute("SELECT status, COUNT(*) FROM work_units GROUP BY status"))
+        return ", ".join(f"{status} {count}" for status, count in sorted(counts.items()))
+
+    def iter_results(self):
+        """완료된 작업 단위의 (탭 키, 레코드 dict 목록)을 작업 순서(탭, 페이지 순)대로"""
+        cur = self.conn.execute("""
+            SELECT w.tab, r.records FROM work_units w JOIN unit_results r ON r.unit_id = w.id
+            ORDER BY w.id
+        """)
+        for tab_key, blob in cur:
+            yield tab_key, json_codec.loads(blob)
+
+    def close(self):
+        self.conn.close()
+
+
+def plan_units(tab_key, last_page, unit_pages=UNIT_PAGES):
+    """1~last_page+1 페이지를 unit_pages씩 나눔. 마지막 단위는 페이지가 늘어났으면 이어서 순회"""
+    units = []
+    end_page = last_page + 1
+    for start in range(1, end_page + 1, unit_pages):
+        end = min(start + unit_pages - 1, end_page)
+        units.append((tab_key, start, end, end == end_page))
+    return units
+
+
+async def discover_units(session, tabs, rate, base_url=BASE_URL, unit_pages=UNIT_PAGES):
+    """탭별 마지막 페이지를 찾아 작업 단위 목록을 만듦"""
+    crawler = Crawler(session, [], base_url=base_url, rate=rate)
+
+    async def discover(tab):
+        last_page = await crawler.find_last_page(tab, {})
+        if last_page is None:
+            # 범위를 모르면 한 워커가 빈 페이지가 나올 때까지 순회
+            logger.warning("%s 마지막 페이지 탐색 실패, 단일 작업으로 순회", tab['label'])
+            return [(tab["key"], 1, crawler.max_page - 1, True)]
+        logger.info("%s 마지막 페이지 %s", tab['label'], last_page)
+        return plan_units(tab["key"], last_page, unit_pages)
+
+    planned = await asyncio.gather(*(discover(tab) for tab in tabs))
+    return [unit for units in planned for unit in units]
+
+
+async def run_unit(queue, session, rate, unit, owner, tabs, window, base_url, breakers=None):
+    """작업 단위 하나를 크롤링하고 결과를 큐에 돌려줌. 리스는 백그라운드에서 갱신"""
+    tab = tabs[unit["tab"]]
+    records = []
+    crawler = Crawler(session, records, window=window, base_url=base_url, rate=rate, breakers=breakers)
+
+    async def keep_lease():
+        while True:
+            await asyncio.sleep(queue.lease_seconds / 3)
+            if not queue.renew(unit["id"], owner):
+                logger.warning("작업 %s 리스를 잃음, 결과는 버려짐", unit['id'])
+                return
+
+    renewer = asyncio.create_task(keep_lease())
+    try:
+        horizon = unit["end_page"]
+        last = await crawler.crawl_pages(tab, unit["start_page"], horizon, extend=unit["extend"])
+    finally:
+        renewer.cancel()
+    pages = last - unit["start_page"] + 1
+    rows = [novel_to_dict(novel) for novel in records]
+    if queue.complete(unit["id"], owner, rows, pages):
+        logger.info("작업 %s 완료: %s %s~%s페이지, %s건", unit['id'], tab['label'], unit['start_page'], last, len(rows))
+
+
+async def worker_async(db_path, owner, options):
+    """작업이 남아 있는 동안 작업 단위를 가져가서 처리. units개의 단위를 동시에 진행"""
+    queue = LeaseQueue(db_path)
+    rate = RateController(options.get("rate", INITIAL_RATE))
+    breakers = HostBreakers()  # 워커 안의 모든 작업 단위가 공유
+    window = options.get("window", WINDOW_SIZE)
+    base_url = options.get("base_url", BASE_URL)
+
+    async def unit_loop(session):
+        while True:
+            unit = queue.claim(owner)
+            if unit is None:
+                if queue.remaining() == 0:
+                    return
+                # 다른 워커가 진행 중인 작업의 리스가 만료되면 가져갈 수 있도록 대기
+                await asyncio.sleep(1)
+                continue
+            await run_unit(queue, session, rate, unit, owner, TABS, window, base_url, breakers)
+
+    try:
+        async with create_session(**options.get("client", {})) as session:
+            await asyncio.gather(*(unit_loop(session) for _ in range(max(1, options.get("units", 2)))))
+    finally:
+        queue.close()
+    logger.info("워커 %s 종료 (%s)", owner, rate.report())
+
+
+def worker_main(db_path, owner, options):
+    """워커 프로세스 진입점 (다른 머신에서는 main.py --shard-worker로 실행)"""
+    setup_logging(options.get("log_level", "INFO"), options.get("log_json", False))
+    event_loop.run(worker_async(db_path, owner, options), options.get("loop", "auto"))
+
+
+def worker_name(index=None):
+    name = f"{socket.gethostname()}-{os.getpid()}"
+    return name if index is None else f"{name}-{index}"
+
+
+def run_coordinator(shards, db_path=SHARD_DB, options=None, path="Munpia_novel_info.json", dictionary=False):
+    """작업 단위를 만들고 로컬 워커 프로세스 shards개를 띄운 뒤 결과를 모아 스냅샷으로 저장
+
+    죽은 워커는 다시 띄우고, 그 워커가 잡고 있던 작업은 리스가 만료되면 다른 워커가 가져간다.
+    초기 요청 속도는 워커 수로 나눠서 전체 속도가 단일 프로세스와 같게 시작한다.
+    """
+    options = dict(options or {})
+    options["rate"] = options.get("rate", INITIAL_RATE) / shards
+
+    async def plan():
+        async with create_session(**options.get("client", {})) as session:
+            return await discover_units(session, FREE_TABS + PL_TABS, RateController(options["rate"] * shards),
+                                        options.get("base_url", BASE_URL), options.get("unit_pages", UNIT_PAGES))
+
+    units = event_loop.run(plan(), options.get("loop", "auto"))
+    queue = LeaseQueue(db_path)
+    queue.reset(units)
+    logger.info("작업 단위 %s개, 워커 %s개로 크롤링 시작", len(units), shards)
+
+    # 포크한 자식이 부모의 로그 스레드/이벤트 루프를 물려받지 않도록 spawn 사용
+    context = multiprocessing.get_context("spawn")
+
+    def spawn(index):
+        process = context.Process(target=worker_main, args=(db_path, worker_name(index), options), daemon=True)
+        process.start()
+        return process
+
+    workers = [spawn(i) for i in range(shards)]
+    try:
+        while queue.remaining():
+            time.sleep(1)
+            for i, process in enumerate(workers):
+                if not process.is_alive() and process.exitcode != 0 and queue.remaining():
+                    logger.warning("워커 %s 비정상 종료 (exit %s), 다시 시작", i, process.exitcode)
+                    workers[i] = spawn(i)
+        for process in workers:
+            process.join()
+    finally:
+        for process in workers:
+            if process.is_alive():
+                process.terminate()
+    logger.info("샤드 작업 상태: %s", queue.report())
+
+    # 작업 순서(탭, 페이지 순)대로 합쳐서 배치 모드와 같은 스냅샷을 만듦
+    # 1차로 소속만 모으고, 2차에서 처음 나온 레코드에 최종 소속을 붙여 바로 기록 (메모리에는 작업 단위 하나씩만)
+    merger = NovelMerger()
+    for tab_key, unit_rows in queue.iter_results():
+        for row in unit_rows:
+            merger.add_row(row, tab_key)
+
+    def merged_rows():
+        written = set()
+        for _, unit_rows in queue.iter_results():
+            for row in unit_rows:
+                if row["id"] in written:
+                    continue
+                written.add(row["id"])
+                row["tabs"], row["sort_options"] = merger.membership[row["id"]]
+                yield row
+
+    try:
+        with open_writer(path, dictionary) as store:
+            store.write(merged_rows())
+    finally:
+        queue.close()
+    logger.info(merger.report())
+    merger.store_membership()
+    return len(merger)
@@ -0,0 +1,216 @@
+"""JSON Lines 스냅샷 (--snapshot-format jsonl)
+
+    Munpia_novel_info.jsonl[.gz|.zst]        한 줄에 레코드 하나 (압축은 확장자로 구분)
+    Munpia_novel_info.jsonl[.gz|.zst].meta.json  {"format", "compression", "rows", "bytes", "sha256", "created_at"}
+
+배치가 들어올 때마다 path.tmp에 이어 쓰고, 다 쓰면 fsync 후 사이드카, 데이터 순으로 os.replace로 바꿔 끼운다.
+읽는 쪽은 한 줄씩 스트리밍하므로 전체 목록을 메모리에 올리지 않는다.
+"""
+import gzip
+import hashlib
+import logging
+import os
+from itertools import islice
+from datetime import datetime
+import json_codec
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger("snapshot")
+
+JSONL_FORMAT = "munpia-jsonl-v1"
+# --snapshot-compression 선택지와 확장자
+COMPRESSION_SUFFIX = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+SIDECAR_SUFFIX = ".meta.json"
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+READ_CHUNK = 1 << 20
+# write()가 한 번에 인코딩해서 내보내는 줄 수 (제너레이터 전체를 메모리에 모으지 않도록)
+WRITE_LINES = 1000
+
+
+def available_compressions():
+    return ["none", "gzip", "zstd"] if zstandard is not None else ["none", "gzip"]
+
+
+def resolve_compression(kind="none"):
+    if kind not in available_compressions():
+        logger.warning("%s 압축을 쓸 수 없어 gzip으로 저장합니다. (pip install zstandard)", kind)
+        return "gzip"
+    return kind
+
+
+def jsonl_path(base="Munpia_novel_info", compression="none"):
+    """압축 방식에 맞는 스냅샷 경로 (zstandard가 없으면 gzip 경로)"""
+    return base + ".jsonl" + COMPRESSION_SUFFIX[resolve_compression(compression)]
+
+
+def is_jsonl(path):
+    return path.endswith((".jsonl", ".jsonl.gz", ".jsonl.zst"))
+
+
+def compression_of(path):
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".zst"):
+        return "zstd"
+    return "none"
+
+
+def sidecar_path(path):
+    return path + SIDECAR_SUFFIX
+
+
+def read_sidecar(path):
+    """사이드카가 없으면 None"""
+    meta_path = sidecar_path(path)
+    if not os.path.exists(meta_path):
+        return None
+    return json_codec.load_file(meta_path)
+
+
+class HashingFile:
+    """실제 파일에 쓰고 읽는 바이트의 sha256과 크기를 셈 (압축기는 이 객체에 씀)"""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.f.write(data)
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.sha256.update(data)
+        self.size += len(data)
+        return data
+
+    def flush(self):
+        self.f.flush()
+
+
+class SnapshotWriter:
+    """JSON Lines 스냅샷을 배치 단위로 이어서 기록하고 close()에서 원자적으로 공개
+
+    StreamingStore와 같은 write()/close() 인터페이스. 중간에 실패하면 abort()로 임시 파일만 지우고
+    기존 스냅샷은 그대로 둔다.
+    """
+
+    def __init__(self, path, compression=None):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.compression = compression or compression_of(path)
+        self.count = 0
+        self.raw = open(self.tmp_path, "wb")
+        self.hashing = HashingFile(self.raw)
+        if self.compression == "gzip":
+            self.f = gzip.GzipFile(fileobj=self.hashing, mode="wb", compresslevel=GZIP_LEVEL, mtime=0)
+        elif self.compression == "zstd":
+            if zstandard is None:
+                self.raw.close()
+                os.remove(self.tmp_path)
+                raise RuntimeError("zstd 스냅샷을 쓰려면 zstandard 패키지가 필요합니다.")
+            self.f = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(self.hashing, closefd=False)
+        else:
+            self.f = self.hashing
+
+    def write(self, novel_dicts):
+        novel_dicts = iter(novel_dicts)
+        while True:
+            lines = [json_codec.dumps(novel) for novel in islice(novel_dicts, WRITE_LINES)]
+            if not lines:
+                break
+            self.f.write(b"\n".join(lines) + b"\n")
+            self.count += len(lines)
+
+    def close(self):
+        if self.f is not self.hashing:
+            self.f.close()  # 압축 스트림의 마지막 블록을 내보냄 (raw 파일은 닫지 않음)
+        self.raw.flush()
+        os.fsync(self.raw.fileno())
+        self.raw.close()
+        meta = {
+            "format": JSONL_FORMAT,
+            "compression": self.compression,
+            "rows": self.count,
+            "bytes": self.hashing.size,
+            "sha256": self.hashing.sha256.hexdigest(),
+            "created_at": datetime.now().strftime(json_codec.DATE_FORMAT),
+        }
+        # 사이드카를 먼저 공개하고 데이터를 바꿔 끼움. 중간에 멈춰도 새 데이터가 검증 정보 없이 남지 않고,
+        # 옛 데이터와 새 사이드카가 짝지어진 경우는 검증(iter_jsonl verify)에서 드러남
+        tmp_meta = sidecar_path(self.path) + ".tmp"
+        with open(tmp_meta, "wb") as f:
+            f.write(json_codec.dumps(meta, indent=True))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_meta, sidecar_path(self.path))
+        os.replace(self.tmp_path, self.path)
+        logger.info("총 %s개의 데이터를 저장하였습니다. (%s, %d bytes)", self.count, self.path, self.hashing.size)
+
+    def abort(self):
+        if self.f is not self.hashing:
+            self.f.close()
+        self.raw.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def iter_lines(stream):
+    """줄 단위로 나눠 돌려줌 (압축 스트림마다 readline 지원이 달라서 직접 자름)"""
+    rest = b""
+    while True:
+        chunk = stream.read(READ_CHUNK)
+        if not chunk:
+            break
+        lines = (rest + chunk).split(b"\n")
+        rest = lines.pop()
+        yield from lines
+    if rest:
+        yield rest
+
+
+def iter_jsonl(path, verify=False):
+    """JSON Lines 스냅샷을 레코드 dict로 하나씩 읽음. verify면 다 읽은 뒤 사이드카의 행 수/sha256과 비교"""
+    meta = read_sidecar(path) if verify else None
+    if verify and meta is None:
+        raise ValueError(f"{sidecar_path(path)}가 없어 스냅샷을 검증할 수 없습니다.")
+    compression = compression_of(path)
+    with open(path, "rb") as raw:
+        hashing = HashingFile(raw)
+        if compression == "gzip":
+            stream = gzip.GzipFile(fileobj=hashing, mode="rb")
+        elif compression == "zstd":
+            if zstandard is None:
+                raise RuntimeError("zstd 스냅샷을 읽으려면 zstandard 패키지가 필요합니다.")
+            stream = zstandard.ZstdDecompressor().stream_reader(hashing, closefd=False)
+        else:
+            stream = hashing
+        count = 0
+        for line in iter_lines(stream):
+            if line.strip():
+                count += 1
+                yield json_codec.loads(line)
+        if not verify:
+            return
+        while hashing.read(READ_CHUNK):
+            pass
+    if count != meta["rows"] or hashing.sha256.hexdigest() != meta["sha256"]:
+        raise ValueError(f"{path} 검증 실패: 행 {count}/{meta['rows']}, sha256 {hashing.sha256.hexdigest()[:12]}"
+                         f"/{meta['sha256'][:12]}")
+    logger.info("%s 검증 완료 (%s행)", path, count)
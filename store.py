@@ -1,30 +1,206 @@
-import json
-import pprint
-
-def store_info(info_list):
-    with open("Munpia_novel_info.json", "w", encoding="utf-8") as f:
-        novel_data = []
-        for info in info_list:
-            novel_dict = {
-                "platform": info.platform,
-                "id": info.id,
-                "title": info.title,
-                "info": info.info,
-                "author": info.author,
-                "href": info.href,
-                "thumbnail": info.thumbnail,
-                "tag": info.tag,
-                "the_number_of_serials": int(info.the_number_of_serials.replace(',', '')),
-                "view": info.view,
-                "newstatus": info.newstatus,
-                "finishstatus": info.finishstatus,
-                "agegrade": info.agegrade,
-                "registdate": info.registdate,
-                "updatedate": info.updatedate,
-                "sort_option": info.sort_option
-            }
-            novel_data.append(novel_dict)
-        json.dump(novel_data, f, ensure_ascii=False, indent=4)
-        count = len(info_list)
-        print(f"총 {count}개의 데이터를 저장하였습니다.")
-        print("store is done!")
\ No newline at end of file
+import logging
+import os
+import json_codec
+from schema import encode_dict, decode_dates, SNAPSHOT_KEYS
+from snapshot import SnapshotWriter, is_jsonl, iter_jsonl
+
+logger = logging.getLogger("store")
+
+SNAPSHOT_PATH = "Munpia_novel_info.json"
+# 사전 인코딩 스냅샷 (--snapshot-format dict)
+#   {"format": DICT_FORMAT, "columns": [...], "rows": [[...], ...], "dictionaries": {필드: [값, ...]}}
+#   행은 columns 순서의 배열이고, DICT_FIELDS는 dictionaries 목록의 번호로 저장
+DICT_FORMAT = "munpia-dict-v1"
+DICT_FIELDS = ("platform", "author", "tag")
+
+# NovelInfo -> 스냅샷 레코드 dict (schema.RECORD_FIELDS에서 만든 인코더)
+novel_to_dict = encode_dict
+
+
+class SnapshotDictionary:
+    """반복이 많은 필드의 값을 번호로 바꾸고 값 목록을 모음"""
+
+    def __init__(self, fields=DICT_FIELDS, columns=SNAPSHOT_KEYS):
+        self.columns = list(columns)
+        self.values = {field: [] for field in fields}
+        self.slots = [(columns.index(field), {}, self.values[field]) for field in fields]
+
+    def encode(self, row):
+        values = [row[key] for key in self.columns]
+        for position, codes, table in self.slots:
+            value = values[position]
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(table)
+                table.append(value)
+            values[position] = code
+        return values
+
+
+def open_writer(path=SNAPSHOT_PATH, dictionary=False):
+    """경로에 맞는 스냅샷 기록기 (.jsonl[.gz|.zst]면 JSON Lines, 아니면 JSON 배열/사전 인코딩)
+
+    with 문으로 쓰면 정상 종료일 때만 close()로 공개하고, 예외가 나면 abort()로 임시 파일만 지운다.
+    """
+    if is_jsonl(path):
+        return SnapshotWriter(path)
+    return StreamingStore(path, dictionary=dictionary)
+
+
+def store_info(info_list, path=SNAPSHOT_PATH, dictionary=False):
+    """전체 목록을 한 번에 만들지 않고 레코드를 하나씩 인코딩해서 기록"""
+    with open_writer(path, dictionary) as store:
+        store.write(novel_to_dict(info) for info in info_list)
+
+
+def is_dictionary_snapshot(path=SNAPSHOT_PATH):
+    if is_jsonl(path):
+        return False
+    with open(path, "rb") as f:
+        return f.read(64).lstrip()[:1] == b"{"
+
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    """스냅샷을 레코드 dict 목록으로 읽음. 기존 JSON 배열과 사전 인코딩 형식 모두 지원
+
+    사전 인코딩 형식이면 같은 작가/장르 값은 모든 레코드가 한 문자열 객체를 공유한다.
+    """
+    if is_jsonl(path):
+        return list(iter_jsonl(path))
+    data = json_codec.load_file(path)
+    if isinstance(data, list):
+        return data
+    if data.get("format") != DICT_FORMAT:
+        raise ValueError(f"알 수 없는 스냅샷 형식: {data.get('format')}")
+    columns = data["columns"]
+    lookups = [(columns.index(field), table) for field, table in data["dictionaries"].items()]
+    rows = []
+    for values in data["rows"]:
+        for position, table in lookups:
+            values[position] = table[values[position]]
+        rows.append(dict(zip(columns, values)))
+    return rows
+
+
+def iter_snapshot(path=SNAPSHOT_PATH, typed=False):
+    """DB 적재용으로 레코드를 하나씩 돌려줌. JSON Lines면 파일을 스트리밍하고 나머지 형식은 전체를 읽음
+
+    typed면 날짜 문자열을 datetime으로 다시 파싱해서 돌려준다 (스냅샷에서 읽는 PG 적재기용).
+    """
+    rows = iter_jsonl(path) if is_jsonl(path) else iter(load_snapshot(path))
+    if typed:
+        return map(decode_dates, rows)
+    return rows
+
+
+def rewrite_membership(path, membership, dictionary=False):
+    """스냅샷 레코드의 tabs/sort_options를 membership(id -> (탭 키 목록, sort_option 목록))으로 바꿔 다시 저장
+
+    스트리밍 모드는 레코드를 처음 본 탭에서 바로 기록하므로, 나중 탭에서 합쳐진 소속은 끝난 뒤 이렇게 반영한다.
+    """
+    def updated(rows):
+        for row in rows:
+            entry = membership.get(row["id"])
+            if entry is not None:
+                row["tabs"], row["sort_options"] = entry
+            yield row
+
+    with open_writer(path, dictionary) as store:
+        store.write(updated(iter_snapshot(path)))
+
+
+def delta_path(path=SNAPSHOT_PATH):
+    """바뀐 소설만 담는 스냅샷 경로 (Munpia_novel_info.jsonl.gz -> Munpia_novel_info.delta.jsonl.gz)"""
+    directory, name = os.path.split(path)
+    base, _, ext = name.partition(".")
+    return os.path.join(directory, f"{base}.delta.{ext}")
+
+
+def merge_into_snapshot(info_list, path=SNAPSHOT_PATH, dictionary=None):
+    """일부 소설만 다시 가져온 경우(--redrive, --page-cache, --incremental) 기존 스냅샷에 갱신/추가해서 다시 저장"""
+    return merge_rows_into_snapshot((novel_to_dict(info) for info in info_list), path, dictionary)
+
+
+def merge_rows_into_snapshot(novel_dicts, path=SNAPSHOT_PATH, dictionary=None):
+    """스냅샷 레코드 dict를 기존 스냅샷에 갱신/추가. 기존 스냅샷이 없으면 그대로 새로 저장
+
+    dictionary가 None이면 기존 스냅샷 형식을 그대로 유지한다.
+    """
+    if not os.path.exists(path):
+        with open_writer(path, bool(dictionary)) as store:
+            store.write(novel_dicts)
+        return
+    if dictionary is None:
+        dictionary = is_dictionary_snapshot(path)
+    rows = load_snapshot(path)
+    index = {row["id"]: i for i, row in enumerate(rows)}
+    updated = added = 0
+    for row in novel_dicts:
+        i = index.get(row["id"])
+        if i is None:
+            index[row["id"]] = len(rows)
+            rows.append(row)
+            added += 1
+            continue
+        previous = rows[i]
+        for key in ("tabs", "sort_options"):
+            row[key] = previous.get(key, []) + [v for v in row[key] if v not in previous.get(key, [])]
+        rows[i] = row
+        updated += 1
+    if not updated and not added:
+        logger.info("스냅샷에 반영할 변경 없음 (%s)", path)
+        return
+    with open_writer(path, dictionary) as store:
+        store.write(rows)
+    logger.info("스냅샷에 %s개 갱신, %s개 추가", updated, added)
+
+
+class StreamingStore:
+    """JSON 배열 스냅샷을 배치가 들어올 때마다 이어서 기록
+
+    dictionary=True면 사전 인코딩 형식으로 쓰고, 값 목록은 모든 행을 쓴 뒤 마지막에 붙인다.
+    path.tmp에 쓰다가 close()에서 바꿔 끼우므로 중간에 실패해도 기존 스냅샷은 남는다.
+    """
+
+    def __init__(self, path=SNAPSHOT_PATH, dictionary=False):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.count = 0
+        self.dictionary = SnapshotDictionary() if dictionary else None
+        self.f = open(self.tmp_path, "wb")
+        if self.dictionary is not None:
+            self.f.write(b'{"format":' + json_codec.dumps(DICT_FORMAT) +
+                         b',"columns":' + json_codec.dumps(self.dictionary.columns) + b',"rows":[')
+        else:
+            self.f.write(b"[")
+
+    def write(self, novel_dicts):
+        for novel in novel_dicts:
+            if self.dictionary is not None:
+                novel = self.dictionary.encode(novel)
+            self.f.write(b",\n" if self.count else b"\n")
+            self.f.write(json_codec.dumps(novel))
+            self.count += 1
+
+    def close(self):
+        if self.dictionary is not None:
+            self.f.write(b'\n],"dictionaries":' + json_codec.dumps(self.dictionary.values) + b"}")
+        else:
+            self.f.write(b"\n]")
+        self.f.close()
+        os.replace(self.tmp_path, self.path)
+        logger.info("총 %s개의 데이터를 저장하였습니다.", self.count)
+
+    def abort(self):
+        self.f.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import time
+import unittest
+
+from shard import LeaseQueue
+
+
+class LeaseExpiryTest(unittest.TestCase):
+    """리스가 만료된 작업 단위를 다른 워커가 가져가고, 원래 워커의 결과는 버려지는지"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "shard_queue.db")
+        LeaseQueue(self.path).reset([("free", 1, 50, True)])
+        self.first = LeaseQueue(self.path, lease_seconds=0.2)
+        self.second = LeaseQueue(self.path, lease_seconds=0.2)
+
+    def tearDown(self):
+        self.first.close()
+        self.second.close()
+        self.directory.cleanup()
+
+    def test_expired_lease_is_reclaimed(self):
+        unit = self.first.claim("worker-a")
+        self.assertIsNotNone(unit)
+        # 리스가 살아 있는 동안에는 다른 워커가 가져갈 수 없음
+        self.assertIsNone(self.second.claim("worker-b"))
+
+        time.sleep(0.3)
+        reclaimed = self.second.claim("worker-b")
+        self.assertEqual(reclaimed, unit)
+
+        # 리스를 잃은 워커는 갱신도 완료도 못 함
+        self.assertFalse(self.first.renew(unit["id"], "worker-a"))
+        self.assertFalse(self.first.complete(unit["id"], "worker-a", [{"id": 1}], 50))
+        self.assertTrue(self.second.complete(unit["id"], "worker-b", [{"id": 2}], 50))
+
+        self.assertEqual(self.second.remaining(), 0)
+        self.assertEqual(list(self.second.iter_results()), [("free", [{"id": 2}])])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,206 @@
+"""표지 이미지(thumbnail) 미러링
+
+표지는 내용 해시(sha256)로 저장해서 같은 이미지는 한 번만 남기고, URL이 바뀐 소설만 다시 받는다.
+nvSrl -> 로컬 경로 매핑은 munpia_novel.db의 thumbnail 테이블(--pg면 PG에도)에 기록한다.
+
+    python thumbnail.py --dir thumbnails --concurrency 16
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from urllib.parse import urlsplit
+import aiohttp
+from client import create_session
+from logger import setup_logging
+from rate_limit import RateController, parse_retry_after
+import event_loop
+from store import load_snapshot
+
+THUMB_DIR = "thumbnails"
+DB_PATH = "munpia_novel.db"
+# 표지 동시 다운로드 수 (목록 크롤러와 별도 커넥터/세마포어)
+CONCURRENCY = 16
+COMMIT_SIZE = 200
+
+EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+
+logger = logging.getLogger("thumbnail")
+
+
+def create_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS thumbnail (
+            id INTEGER PRIMARY KEY,
+            url TEXT,
+            path TEXT,
+            sha256 TEXT,
+            size INTEGER,
+            content_type TEXT,
+            fetched_at DATETIME
+        )
+    """)
+
+
+def blob_path(root, digest, ext):
+    """내용 해시로 정한 저장 위치 (디렉터리 하나에 파일이 몰리지 않도록 두 단계로 나눔)"""
+    return os.path.join(root, digest[:2], digest[2:4], digest + ext)
+
+
+def guess_extension(content_type, url):
+    ext = EXTENSIONS.get((content_type or "").split(";")[0].strip().lower())
+    if ext:
+        return ext
+    _, url_ext = os.path.splitext(urlsplit(url).path)
+    return url_ext.lower() if url_ext else ".img"
+
+
+def store_blob(root, body, content_type, url):
+    """해시 경로에 저장. 같은 내용이 이미 있으면 쓰지 않음. (경로, sha256, 새로 썼는지) 반환"""
+    digest = hashlib.sha256(body).hexdigest()
+    path = blob_path(root, digest, guess_extension(content_type, url))
+    if os.path.exists(path):
+        return path, digest, False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+    return path, digest, True
+
+
+class ThumbnailMirror:
+    """매니페스트를 보고 URL이 바뀌었거나 파일이 없는 표지만 받아서 해시 경로에 저장"""
+
+    def __init__(self, db_path=DB_PATH, root=THUMB_DIR, concurrency=CONCURRENCY, rate=None):
+        self.root = root
+        self.concurrency = concurrency
+        self.rate = rate if rate is not None else RateController()
+        self.conn = sqlite3.connect(db_path)
+        create_table(self.conn.cursor())
+        self.manifest = {n_id: (url, path) for n_id, url, path in
+                         self.conn.execute("SELECT id, url, path FROM thumbnail")}
+        self.pending = []
+        self.changed = []  # 이번 실행에서 바뀐 매니페스트 행 (PG 반영용)
+        self.inflight = {}  # URL -> 다운로드 태스크 (한 실행 안에서 같은 URL은 한 번만 받음)
+        self.downloaded = 0
+        self.deduplicated = 0
+        self.failed = 0
+
+    def needs_download(self, n_id, url):
+        entry = self.manifest.get(n_id)
+        return entry is None or entry[0] != url or not os.path.exists(entry[1])
+
+    async def download(self, session, semaphore, url):
+        """(경로, sha256, 크기, Content-Type) 반환. 실패하면 None"""
+        async with semaphore:
+            try:
+                while True:
+                    await self.rate.acquire()
+                    async with session.get(url) as response:
+                        if response.status == 429:
+                            self.rate.on_throttle(parse_retry_after(response.headers.get("Retry-After")))
+                            continue
+                        self.rate.on_success()
+                        if response.status != 200:
+                            logger.debug("%s 표지 HTTP 오류: %d", url, response.status)
+                            return None
+                        body = await response.read()
+                        content_type = response.headers.get("Content-Type")
+                        break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning("%s 표지를 가져오는 중 오류 발생: %r", url, e)
+                return None
+        loop = asyncio.get_running_loop()
+        path, digest, written = await loop.run_in_executor(None, store_blob, self.root, body, content_type, url)
+        if written:
+            self.downloaded += 1
+        else:
+            self.deduplicated += 1
+        return path, digest, len(body), content_type
+
+    async def mirror_one(self, session, semaphore, n_id, url):
+        task = self.inflight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self.download(session, semaphore, url))
+            self.inflight[url] = task
+        result = await task
+        if result is None:
+            self.failed += 1
+            return
+        path, digest, size, content_type = result
+        row = (n_id, url, path, digest, size, content_type, time.strftime("%Y-%m-%d %H:%M:%S"))
+        self.manifest[n_id] = (url, path)
+        self.pending.append(row)
+        self.changed.append(row)
+        if len(self.pending) >= COMMIT_SIZE:
+            self.flush()
+
+    async def mirror(self, novels):
+        """novel_to_dict 형식의 레코드 중 받을 필요가 있는 표지만 다운로드. 처리한 소설 수를 반환"""
+        targets = [(novel["id"], novel["thumbnail"]) for novel in novels
+                   if novel.get("thumbnail") and self.needs_download(novel["id"], novel["thumbnail"])]
+        logger.info("표지 대상 %s건 (전체 %s건)", len(targets), len(novels))
+        if not targets:
+            return 0
+        semaphore = asyncio.Semaphore(self.concurrency)
+        async with create_session(limit=self.concurrency, limit_per_host=self.concurrency) as session:
+            for start in range(0, len(targets), COMMIT_SIZE):
+                await asyncio.gather(*(self.mirror_one(session, semaphore, n_id, url)
+                                       for n_id, url in targets[start:start + COMMIT_SIZE]))
+                self.flush()
+        logger.info(self.report())
+        return len(targets)
+
+    def flush(self):
+        if not self.pending:
+            return
+        self.conn.executemany("""
+            INSERT OR REPLACE INTO thumbnail (id, url, path, sha256, size, content_type, fetched_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, self.pending)
+        self.conn.commit()
+        self.pending = []
+
+    def report(self):
+        return (f"표지 새로 저장 {self.downloaded}건, 같은 내용 재사용 {self.deduplicated}건, "
+                f"실패 {self.failed}건 ({self.rate.report()})")
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+def mirror_snapshot(path="Munpia_novel_info.json", db_path=DB_PATH, root=THUMB_DIR, concurrency=CONCURRENCY,
+                    pg=False):
+    """스냅샷의 표지를 미러링 (main.py --thumbnails에서 호출). pg면 바뀐 매니페스트를 PG에도 반영"""
+    novels = load_snapshot(path)
+    mirror = ThumbnailMirror(db_path, root, concurrency)
+    try:
+        event_loop.run(mirror.mirror(novels))
+    finally:
+        mirror.close()
+    if pg and mirror.changed:
+        from DB_connect import store_thumbnail_manifest_pg
+        store_thumbnail_manifest_pg(mirror.changed)
+    return len(mirror.changed)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="문피아 표지 이미지 미러링")
+    parser.add_argument("--snapshot", default="Munpia_novel_info.json", help="대상 소설 목록 (크롤러 스냅샷)")
+    parser.add_argument("--db", default=DB_PATH, help="매니페스트를 기록할 SQLite 파일")
+    parser.add_argument("--dir", default=THUMB_DIR, help="표지 저장 디렉터리")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="동시 다운로드 수")
+    parser.add_argument("--pg", action="store_true", help="매니페스트를 PG munpia_thumbnail 테이블에도 반영")
+    args = parser.parse_args()
+    setup_logging()
+    mirror_snapshot(args.snapshot, args.db, args.dir, args.concurrency, args.pg)
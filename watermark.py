@@ -0,0 +1,72 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+STATE_PATH = "crawl_state.json"
+# 워터마크보다 이만큼 더 과거까지는 확인하고 멈춤 (서버 반영 지연/시계 오차 대비)
+SAFETY_MARGIN = timedelta(hours=2)
+# 증분 모드라도 마지막 전체 순회 후 이 시간이 지나면 전체 순회
+FULL_SWEEP_INTERVAL = timedelta(hours=24)
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def as_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class WatermarkStore:
+    """탭별 최신 updatedate(워터마크)와 마지막 전체 순회 시각을 파일에 저장"""
+
+    def __init__(self, path=STATE_PATH, margin=SAFETY_MARGIN):
+        self.path = path
+        self.margin = margin
+        self.watermarks = {}
+        self.last_full_sweep = None
+        self.seen = {}  # 이번 실행에서 관측한 탭별 최신 updatedate
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+            self.watermarks = {k: as_datetime(v) for k, v in state.get("watermarks", {}).items()}
+            self.last_full_sweep = as_datetime(state.get("last_full_sweep"))
+
+    def needs_full_sweep(self, interval=FULL_SWEEP_INTERVAL, now=None):
+        now = now or datetime.now()
+        return self.last_full_sweep is None or now - self.last_full_sweep >= interval
+
+    def cutoff(self, tab_key):
+        """이 시각보다 오래된 페이지에 도달하면 순회를 멈춤. 워터마크가 없으면 None"""
+        watermark = self.watermarks.get(tab_key)
+        return watermark - self.margin if watermark else None
+
+    def observe(self, tab_key, records):
+        """페이지 하나의 레코드를 보고 탭의 최신 updatedate를 갱신, 페이지 안의 최신 updatedate를 반환"""
+        newest = max((r.updatedate for r in records if r.updatedate), default=None)
+        newest = as_datetime(newest)
+        if newest is not None:
+            current = self.seen.get(tab_key)
+            if current is None or newest > current:
+                self.seen[tab_key] = newest
+        return newest
+
+    def commit(self, full_sweep):
+        """크롤링이 끝난 뒤 호출. 관측한 워터마크를 합쳐 파일에 원자적으로 저장"""
+        for tab_key, newest in self.seen.items():
+            current = self.watermarks.get(tab_key)
+            if current is None or newest > current:
+                self.watermarks[tab_key] = newest
+        if full_sweep:
+            self.last_full_sweep = datetime.now()
+        state = {
+            "watermarks": {k: v.strftime(DATE_FORMAT) for k, v in self.watermarks.items()},
+            "last_full_sweep": self.last_full_sweep.strftime(DATE_FORMAT) if self.last_full_sweep else None,
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, self.path)